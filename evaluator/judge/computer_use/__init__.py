@@ -25,6 +25,7 @@ from .app import (
 # loop 모듈
 from .loop import (
     APIProvider,
+    get_shared_client,
     sampling_loop,
 )
 
@@ -39,5 +40,6 @@ __all__ = [
     "run_agent",
     "main",
     "APIProvider",
+    "get_shared_client",
     "sampling_loop",
 ]
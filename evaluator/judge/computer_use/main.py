@@ -20,7 +20,7 @@ from dotenv import load_dotenv
 from screeninfo import get_monitors
 
 # Internal modules
-from judge.computer_use import APIProvider, sampling_loop
+from judge.computer_use import APIProvider, get_shared_client, sampling_loop
 from judge.computer_use.tools import ToolResult
 
 # Load environment variables from .env
@@ -186,6 +186,7 @@ async def run_agent(initial_prompt: str, custom_system_prompt: str = "", max_ite
                 tool_output_callback=partial(tool_output_callback, tool_state=state["tools"]),
                 api_response_callback=api_response_callback,
                 api_key=state["api_key"],
+                client=get_shared_client(state["provider"], state["api_key"]),
                 only_n_most_recent_images=state["only_n_most_recent_images"],
                 tool_version=state["tool_version"],
                 thinking_budget=1024,
@@ -13,7 +13,6 @@ from pathlib import Path
 from typing import Literal, TypedDict, cast, get_args
 from uuid import uuid4
 import io
-from PIL import Image
 
 # Import PyAutoGUI
 import pyautogui
@@ -25,6 +24,10 @@ from anthropic.types.beta import BetaToolComputerUse20241022Param, BetaToolUnion
 
 from .base import BaseAnthropicTool, ToolError, ToolResult
 from .run import run, get_temp_dir
+from .frame_writer import get_frame_writer
+from .image_codec import ImageCodec
+from .screen_grabber import ScreenGrabber
+from dataclasses import replace
 
 # Create screenshots folder in current directory and set output path
 CURRENT_DIR = os.path.abspath(os.path.curdir)
@@ -126,7 +129,9 @@ class PyAutoGUIComputerTool:
     height: int
     display_num: int | None
 
-    _screenshot_delay = 0.5
+    # Upper bound and change threshold for the post-action settle wait
+    _settle_timeout = 2.0
+    _settle_threshold = 0.005
     _scaling_enabled = True
 
     @property
@@ -154,6 +159,9 @@ class PyAutoGUIComputerTool:
             self.height = int(os.getenv("HEIGHT"))
         
         assert self.width and self.height, "Could not determine screen resolution"
+
+        # Payload codec from IMAGE_CODEC / IMAGE_QUALITY; the size is fixed by coordinate scaling
+        self._image_codec = replace(ImageCodec.from_env(), max_edge=None)
         
         # Set display number (if available)
         if (display_num := os.getenv("DISPLAY_NUM")) is not None:
@@ -169,6 +177,10 @@ class PyAutoGUIComputerTool:
         print(f"Retina display: {self._is_retina}")
         print(f"Screen resolution: {self.width} x {self.height}")
 
+        # The scaling target and screenshot size are fixed for the lifetime of the tool
+        self._scaling_target = self._find_scaling_target()
+        self._grabber = ScreenGrabber(self._screenshot_size())
+
     async def __call__(
         self,
         *,
@@ -283,42 +295,22 @@ class PyAutoGUIComputerTool:
 
     async def screenshot(self) -> ToolResult:
         """Take a screenshot of the current screen."""
-        # Add a slight delay before taking the screenshot
-        await asyncio.sleep(self._screenshot_delay)
+        # Wait for the screen to settle instead of a fixed delay
+        await self._grabber.wait_until_stable(self._settle_timeout, self._settle_threshold)
         
         # Use screenshots directory in current folder
         output_dir = Path(OUTPUT_DIR)
         output_dir.mkdir(parents=True, exist_ok=True)
-        path = output_dir / f"screenshot_{uuid4().hex}.png"
-        
-        # Take screenshot with PyAutoGUI
-        screenshot = pyautogui.screenshot()
-        
-        # Handle Retina display
-        if self._scaling_enabled:
-            if self._is_retina:
-                # Scale Retina display to WXGA (maintain 16:10 ratio)
-                target_width, target_height = 1280, 800  # WXGA
-                screenshot = screenshot.resize((target_width, target_height), Image.LANCZOS)
-                print(f"Retina display detected: Scaling screenshot to {target_width}x{target_height}")
-            else:
-                # Maintain existing scaling logic
-                x, y = self.scale_coordinates(
-                    ScalingSource.COMPUTER, self.width, self.height
-                )
-                if x != self.width or y != self.height:
-                    screenshot = screenshot.resize((x, y), Image.LANCZOS)
-                    print(f"Standard display: Scaling screenshot to {x}x{y}")
-        
-        # Save screenshot
-        screenshot.save(path)
+        path = output_dir / f"screenshot_{uuid4().hex}{self._image_codec.extension}"
         
-        if path.exists():
-            print(f"Screenshot saved to: {path}")
-            return ToolResult(
-                base64_image=base64.b64encode(path.read_bytes()).decode()
-            )
-        raise ToolError(f"Failed to take screenshot")
+        # Capture and downscale on the raw buffer to the size fixed at tool start
+        screenshot = self._grabber.grab()
+
+        # Encode once in memory; the background writer persists the same bytes
+        data = self._image_codec.encode(screenshot)
+        get_frame_writer().submit(path, data)
+
+        return ToolResult(base64_image=base64.b64encode(data).decode())
 
     def validate_and_get_coordinates(self, coordinate: tuple[int, int] | None = None):
         """Validate coordinates and scale them appropriately."""
@@ -329,47 +321,47 @@ class PyAutoGUIComputerTool:
 
         return self.scale_coordinates(ScalingSource.API, coordinate[0], coordinate[1])
 
-    def scale_coordinates(self, source: ScalingSource, x: int, y: int):
-        """Scale coordinates to target resolution if scaling is enabled."""
+    def _find_scaling_target(self) -> Resolution | None:
+        """Picks the API resolution the screen is scaled to, or None to keep it as is."""
         if not self._scaling_enabled:
-            return x, y
-        
-        # Handle Retina display
+            return None
+
+        # Scale Retina display to WXGA
         if self._is_retina:
-            # Scale Retina display to WXGA
-            target_dimension = MAX_SCALING_TARGETS["WXGA"]  # Fixed at 1280x800
-        else:
-            # Existing logic - find best matching target based on aspect ratio
-            ratio = self.width / self.height
-            target_dimension = None
-            for dimension in MAX_SCALING_TARGETS.values():
-                if abs(dimension["width"] / dimension["height"] - ratio) < 0.02:
-                    if dimension["width"] < self.width:
-                        target_dimension = dimension
-                        break
-        
+            return MAX_SCALING_TARGETS["WXGA"]
+
+        # Find best matching target based on aspect ratio
+        ratio = self.width / self.height
+        for dimension in MAX_SCALING_TARGETS.values():
+            if abs(dimension["width"] / dimension["height"] - ratio) < 0.02:
+                if dimension["width"] < self.width:
+                    return dimension
+        return None
+
+    def _screenshot_size(self) -> tuple[int, int] | None:
+        """Size screenshots are resized to, or None to send them at capture size."""
+        if self._scaling_target is None:
+            return None
+        return self._scaling_target["width"], self._scaling_target["height"]
+
+    def scale_coordinates(self, source: ScalingSource, x: int, y: int):
+        """Scale coordinates to target resolution if scaling is enabled."""
+        target_dimension = self._scaling_target
         if target_dimension is None:
             return x, y
-        
+
         # Calculate scaling factors
         x_scaling_factor = target_dimension["width"] / self.width
         y_scaling_factor = target_dimension["height"] / self.height
-        
+
         if source == ScalingSource.API:
             # Make sure coordinates are within bounds
             if x > target_dimension["width"] or y > target_dimension["height"]:
                 raise ToolError(f"Coordinates {x}, {y} are out of bounds")
             # Scale up to actual screen coordinates
-            scaled_x = round(x / x_scaling_factor)
-            scaled_y = round(y / y_scaling_factor)
-            print(f"Converting API coordinates {x},{y} to actual coordinates {scaled_x},{scaled_y}")
-            return scaled_x, scaled_y
-        else:
-            # Scale down to target resolution
-            scaled_x = round(x * x_scaling_factor)
-            scaled_y = round(y * y_scaling_factor)
-            print(f"Converting actual coordinates {x},{y} to API coordinates {scaled_x},{scaled_y}")
-            return scaled_x, scaled_y
+            return round(x / x_scaling_factor), round(y / y_scaling_factor)
+        # Scale down to target resolution
+        return round(x * x_scaling_factor), round(y * y_scaling_factor)
 
 
 class ComputerTool20241022(PyAutoGUIComputerTool, BaseAnthropicTool):
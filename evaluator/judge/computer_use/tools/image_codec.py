@@ -0,0 +1,109 @@
+import base64
+import io
+import os
+from dataclasses import dataclass
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+PIL_FORMATS = {
+    "png": "PNG",
+    "jpeg": "JPEG",
+    "webp": "WEBP",
+}
+
+# Leading base64 characters of each format's magic bytes
+BASE64_SIGNATURES = (
+    ("iVBORw0KGgo", "image/png"),
+    ("/9j/", "image/jpeg"),
+    ("UklGR", "image/webp"),
+    ("R0lGOD", "image/gif"),
+)
+
+
+def guess_media_type(base64_image: str, default: str = "image/png") -> str:
+    """
+    Returns the media type of a base64-encoded image by sniffing its magic bytes,
+    so adapters send the right media_type whatever codec produced the payload.
+    """
+    for prefix, media_type in BASE64_SIGNATURES:
+        if base64_image.startswith(prefix):
+            return media_type
+    return default
+
+
+@dataclass(frozen=True)
+class ImageCodec:
+    """
+    Codec settings for image payloads sent to the model.
+    - codec: "png", "jpeg" or "webp"
+    - quality: 1-100, used by jpeg/webp
+    - max_edge: downscale so the longest edge is at most this many pixels (None keeps the size)
+    """
+
+    codec: str = "png"
+    quality: int = 85
+    max_edge: int | None = None
+
+    def __post_init__(self):
+        if self.codec not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported image codec: '{self.codec}'. Use one of {list(MEDIA_TYPES)}.")
+        if not 1 <= self.quality <= 100:
+            raise ValueError(f"Image quality must be between 1 and 100, got {self.quality}.")
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ImageCodec":
+        """Reads image_codec / image_quality / image_max_edge from a run config."""
+        codec = str(config.get("image_codec") or "png").lower()
+        return cls(
+            codec="jpeg" if codec == "jpg" else codec,
+            quality=int(config.get("image_quality") or 85),
+            max_edge=int(config["image_max_edge"]) if config.get("image_max_edge") else None,
+        )
+
+    @classmethod
+    def from_env(cls) -> "ImageCodec":
+        """Reads IMAGE_CODEC / IMAGE_QUALITY / IMAGE_MAX_EDGE from the environment."""
+        return cls.from_config({
+            "image_codec": os.getenv("IMAGE_CODEC"),
+            "image_quality": os.getenv("IMAGE_QUALITY"),
+            "image_max_edge": os.getenv("IMAGE_MAX_EDGE"),
+        })
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.codec]
+
+    @property
+    def extension(self) -> str:
+        return ".jpg" if self.codec == "jpeg" else f".{self.codec}"
+
+    def target_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        width, height = size
+        if not self.max_edge or max(width, height) <= self.max_edge:
+            return width, height
+        scale = self.max_edge / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def encode(self, image) -> bytes:
+        """Encodes a PIL image with these settings."""
+        from PIL import Image
+
+        size = self.target_size(image.size)
+        if size != image.size:
+            image = image.resize(size, Image.BILINEAR)
+        if self.codec == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        if self.codec == "png":
+            image.save(buffer, format="PNG")
+        else:
+            image.save(buffer, format=PIL_FORMATS[self.codec], quality=self.quality)
+        return buffer.getvalue()
+
+    def encode_base64(self, image) -> str:
+        return base64.b64encode(self.encode(image)).decode("utf-8")
@@ -0,0 +1,95 @@
+"""
+Screen capture with a fixed output size, resized on a numpy view of the raw buffer.
+"""
+
+import asyncio
+import threading
+import time
+
+import cv2
+import mss
+import numpy as np
+from PIL import Image
+
+# A sampled pixel counts as changed when a channel moves by more than this
+CHANGE_TOLERANCE = 8
+
+
+def frame_change(before: np.ndarray, after: np.ndarray, tolerance: int = CHANGE_TOLERANCE) -> float:
+    """Returns the fraction of pixels that differ between two same-shaped arrays."""
+    diff = np.abs(before.astype(np.int16) - after.astype(np.int16)).max(axis=-1)
+    return np.count_nonzero(diff > tolerance) / diff.size
+
+
+def resize_bgra(pixels: np.ndarray, size: tuple[int, int] | None) -> np.ndarray:
+    """
+    Downscales an (H, W, 4) BGRA array to size=(width, height) with area
+    averaging and returns it as (h, w, 3) RGB. The colour conversion runs
+    after the resize, on the smaller image.
+    """
+    height, width = pixels.shape[:2]
+    if size and size != (width, height):
+        pixels = cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(pixels, cv2.COLOR_BGRA2RGB)
+
+
+class ScreenGrabber:
+    """
+    Grabs the primary monitor and scales it to a size fixed at construction.
+    One mss instance is kept per thread.
+    """
+
+    def __init__(self, size: tuple[int, int] | None = None):
+        self.size = size
+        self._local = threading.local()
+
+    @property
+    def sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def _grab_bgra(self) -> np.ndarray:
+        shot = self.sct.grab(self.sct.monitors[1])
+        return np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def grab_thumbnail(self, step: int = 8) -> np.ndarray:
+        """Returns a strided (h/step, w/step, 3) view of the unscaled screen."""
+        return self._grab_bgra()[::step, ::step, :3]
+
+    async def wait_until_stable(
+        self,
+        max_wait: float = 2.0,
+        threshold: float = 0.005,
+        interval: float = 0.05,
+        min_wait: float = 0.05,
+        step: int = 8,
+    ) -> float:
+        """
+        Polls downsampled frames until two consecutive ones differ in at most
+        `threshold` of their pixels, or until `max_wait` seconds have passed.
+        Returns the number of seconds waited.
+        """
+        start = time.monotonic()
+        if max_wait <= 0:
+            return 0.0
+
+        await asyncio.sleep(min(min_wait, max_wait))
+        previous = self.grab_thumbnail(step)
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= max_wait:
+                return elapsed
+            await asyncio.sleep(min(interval, max_wait - elapsed))
+            current = self.grab_thumbnail(step)
+            if frame_change(previous, current) <= threshold:
+                return time.monotonic() - start
+            previous = current
+
+    def grab_array(self) -> np.ndarray:
+        """Returns the scaled screen as an (h, w, 3) RGB array."""
+        return resize_bgra(self._grab_bgra(), self.size)
+
+    def grab(self) -> Image.Image:
+        return Image.fromarray(self.grab_array())
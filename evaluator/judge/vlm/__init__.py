@@ -18,10 +18,15 @@ from .load_data import(
     load_game_prompt_eval,
 )
 
+from .batch import (
+    run_offline_judge,
+)
+
 
 
 __all__ = [
     "main",
     "load_game_prompt_eval",
+    "run_offline_judge",
     
 ]
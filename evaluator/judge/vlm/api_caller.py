@@ -1,16 +1,36 @@
 from judge.vlm.tools.serving.api_providers import anthropic_completion, openai_completion, gemini_completion
+from judge.vlm.rate_limit import estimate_tokens, get_rate_limiter
+from judge.vlm.response_cache import cache_key, get_response_cache
  
 def api_caller(api_provider, system_prompt, model_name, move_prompts, base64_image=None, base64_image2=None):    
     base64_images = [img for img in [base64_image, base64_image2] if img] 
 
     if api_provider == "anthropic":
-        response = anthropic_completion(system_prompt, model_name, base64_images, move_prompts)
+        completion = anthropic_completion
     elif api_provider == "openai":
-        response = openai_completion(system_prompt, model_name, base64_images, move_prompts)
+        completion = openai_completion
     elif api_provider == "gemini":
-        response = gemini_completion(system_prompt, model_name, base64_images, move_prompts)
+        completion = gemini_completion
     else:
         raise NotImplementedError(f"API provider '{api_provider}' is not supported.")
+
+    def call():
+        return get_rate_limiter().call(
+            api_provider, model_name,
+            lambda: completion(system_prompt, model_name, base64_images, move_prompts),
+            tokens=estimate_tokens(system_prompt + move_prompts, len(base64_images)),
+        )
+
+    # Served from the on-disk response cache when LLM_CACHE is enabled
+    cache = get_response_cache()
+    if not cache.cacheable(model_name):
+        return call()
+
+    key = cache_key(api_provider, model_name, system_prompt, move_prompts, base64_images)
+    response = cache.get(key)
+    if response is None:
+        response = call()
+        cache.put(key, response, api_provider, model_name)
     
     return response
 
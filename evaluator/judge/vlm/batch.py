@@ -0,0 +1,167 @@
+"""
+Offline VLM judge: scores saved screenshots instead of the live game.
+
+A manifest lists (game, screenshot, milestone) items, one JSON object per
+line (or a JSON list):
+
+    {"game": "Machine Room Escape", "screenshot": "runs/sweep1/final.png", "milestone": 2}
+
+"milestone" selects example_image_path<N> of the game in
+milestone_prompts.json (default 1); "id" defaults to game:screenshot:milestone.
+Items are judged by a bounded pool of worker threads, and every result is
+appended to the results JSONL as soon as it arrives. Re-running with the same
+results file skips the items that already have a result, so an interrupted
+run resumes where it stopped; items that failed are tried again.
+
+Run from evaluator/:
+
+    python -m judge.vlm.batch --manifest manifest.jsonl --results results/judge.jsonl --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+from judge.vlm.evaluator import eval_success
+from judge.vlm.load_data import load_game_prompt_eval
+from judge.vlm.tools.utils import encode_example_image, encode_image
+
+
+@dataclass
+class JudgeItem:
+    game: str
+    screenshot: str
+    milestone: int = 1
+    id: str | None = None
+
+    def __post_init__(self):
+        self.milestone = int(self.milestone)
+        if self.id is None:
+            self.id = f"{self.game}:{self.screenshot}:{self.milestone}"
+
+
+def load_manifest(path):
+    """Reads a JSONL manifest, or a JSON list of items."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [JudgeItem(**entry) for entry in entries]
+
+
+def load_results(path):
+    """Returns {id: result} of the results already written, the last one per id winning."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            results[result["id"]] = result
+    return results
+
+
+def _ends_mid_line(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+@lru_cache(maxsize=None)
+def _prompts(game, milestone):
+    return load_game_prompt_eval(game, milestone)
+
+
+def judge_item(item: JudgeItem, api_provider, model_name):
+    system_prompt, evaluation_prompt, example_image_path = _prompts(item.game, item.milestone)
+    example_base64 = encode_example_image(example_image_path) if example_image_path else None
+    base64_image = encode_image(item.screenshot)
+    return eval_success(api_provider, model_name, system_prompt, evaluation_prompt, base64_image, example_base64)
+
+
+def _judge(item: JudgeItem, api_provider, model_name):
+    start_time = time.time()
+    result = {**asdict(item), "api_provider": api_provider, "model_name": model_name}
+    try:
+        response = judge_item(item, api_provider, model_name)
+        if response is None:
+            raise RuntimeError("empty response")
+        result["response"] = response
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency"] = round(time.time() - start_time, 3)
+    return result
+
+
+def run_offline_judge(manifest_path, results_path, api_provider="anthropic", model_name="claude-3-7-sonnet-20250219", workers=8):
+    """
+    Judges every manifest item that has no successful result in results_path
+    yet, with at most `workers` requests in flight. Returns {id: result} for
+    the whole manifest.
+    """
+    items = load_manifest(manifest_path)
+    results = load_results(results_path)
+    pending = [item for item in items if item.id not in results or "error" in results[item.id]]
+    print(f"[INFO] Offline judge: {len(items)} items, {len(items) - len(pending)} done, {len(pending)} to run")
+    if not pending:
+        return {item.id: results[item.id] for item in items}
+
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    with open(results_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        if _ends_mid_line(results_path):
+            out.write("\n")  # the previous run was cut off mid-write
+
+        queue = iter(pending)
+        running = set()
+        finished = 0
+        while True:
+            # Only `workers` items are submitted at a time, so an interrupt loses at most those
+            while len(running) < workers:
+                item = next(queue, None)
+                if item is None:
+                    break
+                running.add(pool.submit(_judge, item, api_provider, model_name))
+            if not running:
+                break
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[result["id"]] = result
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                finished += 1
+                status = "ERROR " + result["error"] if "error" in result else "ok"
+                print(f"[INFO] [{finished}/{len(pending)}] {result['id']}: {status} ({result['latency']:.1f}s)")
+
+    return {item.id: results[item.id] for item in items}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline VLM judge over saved screenshots")
+    parser.add_argument("--manifest", type=str, required=True, help="JSONL (or JSON list) of {game, screenshot, milestone}")
+    parser.add_argument("--results", type=str, default="results/offline_judge.jsonl", help="Results JSONL, appended to and resumed from")
+    parser.add_argument("--api_provider", type=str, default="anthropic", help="API provider to use")
+    parser.add_argument("--model_name", type=str, default="claude-3-7-sonnet-20250219", help="Model name")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent judge requests")
+    args = parser.parse_args()
+
+    results = run_offline_judge(args.manifest, args.results, args.api_provider, args.model_name, args.workers)
+    failed = sum("error" in result for result in results.values())
+    print(f"[INFO] Offline judge finished: {len(results) - failed} judged, {failed} failed -> {args.results}")
+
+
+if __name__ == "__main__":
+    main()
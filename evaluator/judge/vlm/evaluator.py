@@ -4,9 +4,9 @@ import sys
 import argparse
 from datetime import datetime
 from collections import deque
-from judge.vlm.tools.utils import encode_image, log_output, extract_python_code, extract_action_change
+from judge.vlm.tools.utils import encode_example_image, log_output, extract_python_code, extract_action_change
 from judge.vlm.load_data import save_chat_log, load_game_prompt_eval
-from judge.vlm.screenshot import capture_flash_screenshot
+from judge.vlm.screenshot import capture_flash_frame
 from judge.vlm.api_caller import api_caller
 
 
@@ -94,11 +94,10 @@ def main(game, api_provider, model_name, loop_interval, system_prompt, evaluatio
     os.makedirs(os.path.dirname(log_file), exist_ok=True)
     
     # Encode only if an example image exists
-    example_base64 = encode_image(example_image_path) if example_image_path else None
+    example_base64 = encode_example_image(example_image_path) if example_image_path else None
     os_interaction_prompt = None
     if not os_interaction_prompt:
-        before_screenshot = capture_flash_screenshot()
-        base64_before = encode_image(before_screenshot)
+        base64_before = capture_flash_frame().base64
 
         # If example_base64 exists, send it together; otherwise, do not.
         if example_base64:
@@ -114,8 +113,7 @@ def main(game, api_provider, model_name, loop_interval, system_prompt, evaluatio
     while True:
         try:
             # 1. Capture the current screen and encode
-            before_screenshot = capture_flash_screenshot()
-            base64_before = encode_image(before_screenshot)  
+            base64_before = capture_flash_frame().base64
             
             # 2. Generate code and action
             code, action = generate_code(
@@ -144,8 +142,7 @@ def main(game, api_provider, model_name, loop_interval, system_prompt, evaluatio
                     
             time.sleep(loop_interval)
             
-            after_screenshot = capture_flash_screenshot()
-            base64_after = encode_image(after_screenshot)  # ensure we return the captured image
+            base64_after = capture_flash_frame().base64  # ensure we return the captured image
 
             # 3. Check whether the action succeeded and obtain `base64_after`
             action_success = check_action_success(api_provider, model_name, action, base64_before, base64_after)
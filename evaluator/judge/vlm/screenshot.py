@@ -1,9 +1,12 @@
 import os
 import platform
+import threading
 import mss
 import time
 import subprocess
 
+from judge.vlm.tools.frame import Frame
+
 
 # OS 감지
 IS_MAC = platform.system() == "Darwin"
@@ -15,7 +18,7 @@ SCREENSHOT_DIR = "screenshots/flashpoint/"
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
 
-def get_flashpoint_window_position():
+def get_flashpoint_window_position(title="Flashpoint"):
     print(f"[INFO] Detecting Flashpoint window on {platform.system()}...")
     
     if IS_MAC:
@@ -28,33 +31,141 @@ def get_flashpoint_window_position():
         result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
         windows = result.stdout.strip().split(", ")
         for window in windows:
-            if "Flashpoint" in window:
+            if title in window:
                 return 100, 100, 800, 600  # 기본값
     else:
-        try:
-            import pygetwindow as gw
-            windows = gw.getWindowsWithTitle("Flashpoint")
-            if windows:
-                window = windows[0]
-                return window.left, window.top, window.width, window.height
-        except ImportError:
-            print("[ERROR] pygetwindow is not installed. Run: pip install pygetwindow")
+        window = find_flashpoint_window(title)
+        if window is not None:
+            return window.left, window.top, window.width, window.height
     return None
 
+def find_flashpoint_window(title="Flashpoint"):
+    """Returns the pygetwindow handle of the Flashpoint window, or None."""
+    try:
+        import pygetwindow as gw
+        windows = gw.getWindowsWithTitle(title)
+    except ImportError:
+        print("[ERROR] pygetwindow is not installed. Run: pip install pygetwindow")
+        return None
+    except Exception as e:
+        print(f"[WARN] Window lookup unavailable: {e}")
+        return None
+    return windows[0] if windows else None
+
+
+class CaptureSession:
+    """
+    Long-lived screen grabber.
+
+    Keeps one mss instance open per thread instead of opening a new one per
+    capture. With region="game" only the Flashpoint window is grabbed; its
+    rectangle is cached and re-read from the live window handle, so the
+    title search only runs again when the window disappears (or, on macOS,
+    every `refresh_interval` seconds).
+    """
+
+    def __init__(self, region="screen", window_title="Flashpoint", refresh_interval=5.0):
+        if region not in ("screen", "game"):
+            raise ValueError("Invalid value for 'region'. Use 'screen' or 'game'.")
+
+        self.region = region
+        self.window_title = window_title
+        self.refresh_interval = refresh_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._window = None
+        self._rect = None
+        self._rect_time = 0.0
+
+    @property
+    def sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def invalidate(self):
+        """Forgets the cached window so the next capture re-detects it."""
+        with self._lock:
+            self._window = None
+            self._rect = None
+            self._rect_time = 0.0
+
+    def window_rect(self):
+        """Returns the cached (left, top, width, height) of the game window, or None."""
+        with self._lock:
+            if self._window is not None:
+                try:
+                    rect = (self._window.left, self._window.top, self._window.width, self._window.height)
+                    if rect[2] > 0 and rect[3] > 0:
+                        self._rect = rect
+                        return rect
+                except Exception:
+                    pass
+                # The window was closed or minimized; look it up again right away
+                self._window = None
+                self._rect_time = 0.0
+
+            if self._rect_time and time.monotonic() - self._rect_time < self.refresh_interval:
+                return self._rect
+
+            if IS_MAC:
+                rect = get_flashpoint_window_position(self.window_title)
+            else:
+                self._window = find_flashpoint_window(self.window_title)
+                rect = None
+                if self._window is not None:
+                    rect = (self._window.left, self._window.top, self._window.width, self._window.height)
+
+            self._rect = rect if rect and rect[2] > 0 and rect[3] > 0 else None
+            self._rect_time = time.monotonic()
+            return self._rect
+
+    def monitor(self):
+        """Returns the mss monitor dict of the region to capture."""
+        if self.region == "game":
+            rect = self.window_rect()
+            if rect:
+                left, top, width, height = rect
+                return {"top": top, "left": left, "width": width, "height": height}
+        return self.sct.monitors[1]
+
+    def grab(self) -> Frame:
+        monitor = self.monitor()
+        return Frame.from_mss(self.sct.grab(monitor), origin=(monitor["left"], monitor["top"]))
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_capture_session(region="screen") -> CaptureSession:
+    """Returns the process-wide CaptureSession for a region, creating it once."""
+    with _sessions_lock:
+        if region not in _sessions:
+            _sessions[region] = CaptureSession(region=region)
+        return _sessions[region]
+
+
+def capture_flash_frame(save=True):
+    """
+    Captures the Flashpoint window (or the full monitor if it cannot be found)
+    into an in-memory Frame through the shared CaptureSession.
+    """
+    frame = get_capture_session("game").grab()
+    if save:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        frame.save(os.path.join(SCREENSHOT_DIR, f"flash_screenshot_{timestamp}.png"))
+        print(f"[INFO] Screenshot saved: {frame.path}")
+    return frame
+
+
 def capture_flash_screenshot():
-    position = get_flashpoint_window_position()
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    screenshot_path = os.path.join(SCREENSHOT_DIR, f"flash_screenshot_{timestamp}.png")
-    
-    with mss.mss() as sct:
-        if position:
-            left, top, width, height = position
-            monitor = {"top": top, "left": left, "width": width, "height": height}
-        else:
-            monitor = sct.monitors[1]
-        
-        screenshot = sct.grab(monitor)
-        mss.tools.to_png(screenshot.rgb, screenshot.size, output=screenshot_path)
-        print(f"[INFO] Screenshot saved: {screenshot_path}")
-    
-    return screenshot_path
+    return capture_flash_frame(save=True).path
@@ -1,15 +1,14 @@
-import os
 import dotenv
-from openai import OpenAI
-import anthropic
-import google.generativeai as genai
+from judge.vlm.tools.image_codec import guess_media_type
+from .clients import get_client_registry
+from judge.vlm.metering import get_meter
 
 # Load .env file
 dotenv.load_dotenv()
 
 ## Distinguish between using images and not using images
 def openai_completion(system_prompt, model_name, base64_images, prompt):
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = get_client_registry().openai()
     
     # Basic message structure
     messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": []}]
@@ -19,22 +18,24 @@ def openai_completion(system_prompt, model_name, base64_images, prompt):
         for base64_image in base64_images:
             messages[1]["content"].append({
                 "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{base64_image}"},
+                "image_url": {"url": f"data:{guess_media_type(base64_image)};base64,{base64_image}"},
             })
     
     # Add text prompt
     messages[1]["content"].append({"type": "text", "text": prompt})
 
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=messages,
-        temperature=0,
-        max_tokens=1024,
-    )
+    with get_meter().measure("openai", model_name, caller="judge", images=len(base64_images)) as call:
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            temperature=0,
+            max_tokens=1024,
+        )
+        call.usage = response.usage
     return response.choices[0].message.content
 
 def anthropic_completion(system_prompt, model_name, base64_images, prompt):
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    client = get_client_registry().anthropic()
     
     # Construct user message content
     user_content = []
@@ -46,7 +47,7 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
+                    "media_type": guess_media_type(base64_image),
                     "data": base64_image,
                 }
             })
@@ -58,7 +59,7 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
     })
 
     # Create stream and process response
-    with client.messages.stream(
+    with get_meter().measure("anthropic", model_name, caller="judge", images=len(base64_images)) as call, client.messages.stream(
         max_tokens=1024,
         system=system_prompt,  # system prompt is passed as a separate parameter
         messages=[
@@ -73,12 +74,12 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
         partial_chunks = []
         for chunk in stream.text_stream:
             partial_chunks.append(chunk)
+        call.usage = stream.get_final_message().usage
     
     return "".join(partial_chunks)
 
 def gemini_completion(system_prompt, model_name, base64_images, prompt):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel(model_name=model_name)
+    model = get_client_registry().gemini(model_name)
 
     # Basic message structure
     messages = [
@@ -89,16 +90,19 @@ def gemini_completion(system_prompt, model_name, base64_images, prompt):
     if base64_images:
         for base64_image in base64_images:
             messages.append({
-                "mime_type": "image/png",
+                "mime_type": guess_media_type(base64_image),
                 "data": base64_image,
             })
     
     # Add text prompt
     messages.append(prompt)
     
-    try:
-        response = model.generate_content(messages)
-        return response.text
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
\ No newline at end of file
+    with get_meter().measure("gemini", model_name, caller="judge", images=len(base64_images)) as call:
+        try:
+            response = model.generate_content(messages)
+            call.usage = response.usage_metadata
+            return response.text
+        except Exception as e:
+            call.error = type(e).__name__
+            print(f"Error: {e}")
+            return None
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Process-wide registry of long-lived provider clients.
+
+Building an SDK client per call means a new connection pool, so every
+request pays for DNS, TCP and TLS setup again. The registry builds each
+client once, on an httpx pool with keep-alive, and shares it between all
+callers (threads included) in the process. SDK-level retries are turned
+off; judge.vlm.rate_limit retries with backoff that honours Retry-After.
+
+Pool limits come from the environment:
+- LLM_POOL_MAX_CONNECTIONS (default 20)
+- LLM_POOL_MAX_KEEPALIVE (default 10)
+- LLM_POOL_KEEPALIVE_EXPIRY seconds (default 60)
+"""
+
+import os
+import threading
+
+import anthropic
+import dotenv
+import google.generativeai as genai
+import httpx
+from openai import OpenAI
+
+dotenv.load_dotenv()
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+class ClientRegistry:
+    """Builds each provider client on first use and hands out the same instance afterwards."""
+
+    def __init__(self, limits: httpx.Limits | None = None):
+        self.limits = limits or pool_limits()
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._gemini_configured = False
+
+    def _get(self, key, build):
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = build()
+        return client
+
+    def openai(self) -> OpenAI:
+        return self._get("openai", lambda: OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            http_client=httpx.Client(limits=self.limits),
+        ))
+
+    def anthropic(self) -> anthropic.Anthropic:
+        return self._get("anthropic", lambda: anthropic.Anthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_retries=0,
+            http_client=httpx.Client(limits=self.limits),
+        ))
+
+    def gemini(self, model_name: str) -> genai.GenerativeModel:
+        def build():
+            if not self._gemini_configured:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                self._gemini_configured = True
+            return genai.GenerativeModel(model_name=model_name)
+
+        return self._get(("gemini", model_name), build)
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if close is not None:
+                    close()
+            self._clients.clear()
+
+
+_registry: ClientRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Returns the process-wide ClientRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
@@ -1,6 +1,7 @@
 import os
 import base64
 import re
+from functools import lru_cache
 
 def encode_image(image_path):
     """
@@ -9,6 +10,14 @@ def encode_image(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode("utf-8")
 
+@lru_cache(maxsize=64)
+def encode_example_image(image_path):
+    """
+    encode_image for reference images, which are shared by every screenshot
+    of a milestone and only need to be read and encoded once per process.
+    """
+    return encode_image(image_path)
+
 def log_output(thread_id, log_text, game):
     """
     Logs output to `cache/thread_{thread_id}/output.log`
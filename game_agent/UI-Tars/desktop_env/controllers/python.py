@@ -1,14 +1,16 @@
 import pyautogui
 import time
-from mss import mss
-from PIL import Image
 from datetime import datetime
 import os
 
+from tools import get_capture_session, wait_until_stable
+
 
 class LocalController:
     def __init__(self, screenshot_dir="screenshots", game_name="None"):
         self.screenshot_dir = f"{screenshot_dir}/{game_name}"
+        # UI-TARS grounds on full-screen coordinates, so keep the screen region
+        self.capture_session = get_capture_session("screen")
 
         if not os.path.exists(self.screenshot_dir):
             os.makedirs(self.screenshot_dir)
@@ -16,16 +18,14 @@ class LocalController:
     def get_screenshot(self) -> str:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         path = os.path.join(self.screenshot_dir, f"screenshot_{timestamp}.png")
+        return self.capture_session.grab().save(path)
 
-        with mss() as sct:
-            monitor = sct.monitors[1]  
-            sct_img = sct.grab(monitor)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-            img.save(path)
-
-        return path
+    def wait_until_stable(self, max_wait=2.0, threshold=0.005):
+        """Blocks until the screen stops changing, for at most max_wait seconds."""
+        return wait_until_stable(max_wait=max_wait, threshold=threshold)
 
     def execute_python_command(self, command: str):
+        # Generated code may call wait_until_stable() between actions
         exec(command)
 
     def execute_action(self, action):
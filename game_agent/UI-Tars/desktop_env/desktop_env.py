@@ -42,7 +42,11 @@ class LocalDesktopEnv:
             "instruction": self.instruction,
         }
 
-    def step(self, action: str, pause: float = 1.0):
+    def step(self, action: str, pause: float = 2.0):
+        """
+        Executes an action. `pause` bounds the post-action wait: the
+        observation is taken as soon as the screen stops changing.
+        """
         self.action_history.append(action)
 
         done = False
@@ -59,7 +63,7 @@ class LocalDesktopEnv:
         else:
             self.controller.execute_python_command(action)
 
-        time.sleep(pause)
+        self.controller.wait_until_stable(max_wait=pause)
         obs = self._get_obs()
         return obs, 0.0, done, info
 
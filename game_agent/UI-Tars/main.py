@@ -296,7 +296,7 @@ def parsing_response_to_pyautogui_code(responses, image_height: int, image_width
         if response_id == 0:
             pyautogui_code += f"'''\nObservation:\n{observation}\n\nThought:\n{thought}\n'''\n"
         else:
-            pyautogui_code += f"\ntime.sleep(1)\n"
+            pyautogui_code += f"\nwait_until_stable(max_wait=2.0)\n"
 
         action_dict = response
         action_type = action_dict.get("action_type")
@@ -22,6 +22,8 @@ from groq import Groq
 from requests.exceptions import SSLError
 
 from mm_agents.accessibility_tree_wrap.heuristic_retrieve import filter_nodes, draw_bounding_boxes
+from mm_agents.metering import count_images, get_meter
+from mm_agents.rate_limit import estimate_payload_tokens, get_rate_limiter
 from mm_agents.prompts import SYS_PROMPT_IN_SCREENSHOT_OUT_CODE, SYS_PROMPT_IN_SCREENSHOT_OUT_ACTION, \
     SYS_PROMPT_IN_A11Y_OUT_CODE, SYS_PROMPT_IN_A11Y_OUT_ACTION, \
     SYS_PROMPT_IN_BOTH_OUT_CODE, SYS_PROMPT_IN_BOTH_OUT_ACTION, \
@@ -571,20 +573,33 @@ class PromptAgent:
                 "Authorization": f"Bearer {os.environ['OPENAI_API_KEY']}"
             }
             logger.info("Generating content with GPT model: %s", self.model)
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload
-            )
+            with get_meter().measure("openai", self.model, caller="PromptAgent", images=count_images(payload["messages"])) as call:
+                response = get_rate_limiter().call(
+                    "openai", self.model,
+                    lambda: requests.post(
+                        "https://api.openai.com/v1/chat/completions",
+                        headers=headers,
+                        json=payload
+                    ),
+                    tokens=estimate_payload_tokens(payload["messages"]),
+                )
+                if response.status_code == 200:
+                    call.usage = response.json().get("usage")
+                else:
+                    call.error = f"HTTP {response.status_code}"
 
             if response.status_code != 200:
                 if response.json()['error']['code'] == "context_length_exceeded":
                     logger.error("Context length exceeded. Retrying with a smaller context.")
                     payload["messages"] = [payload["messages"][0]] + payload["messages"][-1:]
-                    retry_response = requests.post(
-                        "https://api.openai.com/v1/chat/completions",
-                        headers=headers,
-                        json=payload
+                    retry_response = get_rate_limiter().call(
+                        "openai", self.model,
+                        lambda: requests.post(
+                            "https://api.openai.com/v1/chat/completions",
+                            headers=headers,
+                            json=payload
+                        ),
+                        tokens=estimate_payload_tokens(payload["messages"]),
                     )
                     if retry_response.status_code != 200:
                         logger.error(
@@ -647,11 +662,20 @@ class PromptAgent:
                 "top_p": top_p
             }
 
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload
-            )
+            with get_meter().measure("anthropic", self.model, caller="PromptAgent", images=count_images(claude_messages)) as call:
+                response = get_rate_limiter().call(
+                    "anthropic", self.model,
+                    lambda: requests.post(
+                        "https://api.anthropic.com/v1/messages",
+                        headers=headers,
+                        json=payload
+                    ),
+                    tokens=estimate_payload_tokens(claude_messages),
+                )
+                if response.status_code == 200:
+                    call.usage = response.json().get("usage")
+                else:
+                    call.error = f"HTTP {response.status_code}"
 
             if response.status_code != 200:
 
@@ -15,9 +15,11 @@ from openai import OpenAI
 
 
 
+from tools import collapse_runs, perceptual_hash, unchanged_marker
 from mm_agents.accessibility_tree_wrap.heuristic_retrieve import (
     filter_nodes,
 )
+from mm_agents.metering import count_images, get_meter
 from mm_agents.prompts import (
     UITARS_ACTION_SPACE,
     UITARS_CALL_USR_ACTION_SPACE,
@@ -282,7 +284,7 @@ def parsing_response_to_pyautogui_code(responses, image_height: int, image_width
         if response_id == 0:
             pyautogui_code += f"'''\nObservation:\n{observation}\n\nThought:\n{thought}\n'''\n"
         else:
-            pyautogui_code += f"\ntime.sleep(1)\n"
+            pyautogui_code += f"\nwait_until_stable(max_wait=2.0)\n"
 
         action_dict = response
         action_type = action_dict.get("action_type")
@@ -676,14 +678,40 @@ class UITARSAgent:
             {"role": "user", "content": [{"type": "text", "text": user_prompt}]}
         ]
 
-        for i, history_response in enumerate(self.history_responses[-self.history_n:]):
-            encoded = pil_to_base64(images[i])
-            messages.append({"role": "user", "content": [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{encoded}"}}]})
-            messages.append({"role": "assistant", "content": [add_box_token(history_response)]})
+        # Pair each history frame with the response it produced; the last image is the current screen
+        history_images = images[:-1]
+        history_responses = self.history_responses[-len(history_images):] if history_images else []
+        history_images = history_images[len(history_images) - len(history_responses):]
+
+        # Collapse consecutive near-identical screens into one image plus a count
+        runs = collapse_runs([perceptual_hash(img) for img in history_images + images[-1:]])
+        *history_runs, (_, current_count) = runs
+        start = 0
+        for end, count in history_runs:
+            encoded = pil_to_base64(history_images[end])
+            content = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{encoded}"}}]
+            if count > 1:
+                content.append({"type": "text", "text": unchanged_marker(count).strip()})
+            messages.append({"role": "user", "content": content})
+            messages.append({"role": "assistant", "content": ["\n\n".join(
+                add_box_token(response) for response in history_responses[start:end + 1]
+            )]})
+            start = end + 1
+
+        # Responses given on frames identical to the current screen precede it without their images
+        if start < len(history_responses):
+            pending = "\n\n".join(add_box_token(response) for response in history_responses[start:])
+            if messages[-1]["role"] == "assistant":
+                messages[-1]["content"][0] += "\n\n" + pending
+            else:
+                messages.append({"role": "assistant", "content": [pending]})
 
         cur_image = images[-1]
         encoded_string = pil_to_base64(cur_image)
-        messages.append({"role": "user", "content": [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{encoded_string}"}}]})
+        current_content = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{encoded_string}"}}]
+        if current_count > 1:
+            current_content.append({"type": "text", "text": unchanged_marker(current_count).strip()})
+        messages.append({"role": "user", "content": current_content})
 
         try_times = 3
         origin_resized_height = cur_image.height
@@ -692,13 +720,15 @@ class UITARSAgent:
         response = None
         while try_times > 0:
             try:
-                response = self.vlm.chat.completions.create(
-                    model="ui-tars",
-                    messages=messages,
-                    frequency_penalty=1,
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature
-                )
+                with get_meter().measure("uitars", "ui-tars", caller="UITARSAgent", images=count_images(messages)) as call:
+                    response = self.vlm.chat.completions.create(
+                        model="ui-tars",
+                        messages=messages,
+                        frequency_penalty=1,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature
+                    )
+                    call.usage = response.usage
                 prediction = response.choices[0].message.content.strip()
                 break
             except Exception as e:
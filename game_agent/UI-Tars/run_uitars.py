@@ -54,7 +54,8 @@ def config() -> argparse.Namespace:
     parser.add_argument("--observation_type", choices=["screenshot", "a11y_tree", "screenshot_a11y_tree", "som"], default="screenshot")
     parser.add_argument("--screen_width", type=int, default=1920)
     parser.add_argument("--screen_height", type=int, default=1080)
-    parser.add_argument("--sleep_after_execution", type=float, default=0.0)
+    parser.add_argument("--sleep_after_execution", type=float, default=2.0,
+                        help="Upper bound on the post-action wait; returns early once the screen is stable")
     parser.add_argument("--max_steps", type=int, default=10000)
     parser.add_argument("--max_trajectory_length", type=int, default=10)
     parser.add_argument("--model_type", type=str, default="qwen25vl")
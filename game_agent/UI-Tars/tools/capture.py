@@ -0,0 +1,193 @@
+import platform
+import subprocess
+import threading
+import time
+
+import mss
+import numpy as np
+
+from .frame import Frame
+
+IS_MAC = platform.system() == "Darwin"
+
+# A sampled pixel counts as changed when a channel moves by more than this
+CHANGE_TOLERANCE = 8
+
+
+def frame_change(before, after, tolerance=CHANGE_TOLERANCE) -> float:
+    """Returns the fraction of pixels that differ between two same-shaped arrays."""
+    diff = np.abs(before.astype(np.int16) - after.astype(np.int16)).max(axis=-1)
+    return np.count_nonzero(diff > tolerance) / diff.size
+
+
+def get_flashpoint_window_position(title="Flashpoint"):
+    """
+    Returns (left, top, width, height) of the Flashpoint window, or None.
+    """
+    if IS_MAC:
+        script = '''
+        tell application "System Events"
+            set window_list to name of every window of every process whose visible is true
+        end tell
+        return window_list
+        '''
+        result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
+        for window in result.stdout.strip().split(", "):
+            if title in window:
+                return 100, 100, 800, 600  # default
+        return None
+
+    window = find_flashpoint_window(title)
+    if window is not None:
+        return window.left, window.top, window.width, window.height
+    return None
+
+
+def find_flashpoint_window(title="Flashpoint"):
+    """Returns the pygetwindow handle of the Flashpoint window, or None."""
+    try:
+        import pygetwindow as gw
+        windows = gw.getWindowsWithTitle(title)
+    except Exception as e:
+        print(f"[WARN] Window lookup unavailable: {e}")
+        return None
+    return windows[0] if windows else None
+
+
+class CaptureSession:
+    """
+    Long-lived screen grabber.
+
+    Keeps one mss instance open per thread instead of opening a new one per
+    capture. With region="game" only the Flashpoint window is grabbed; its
+    rectangle is cached and re-read from the live window handle, so the
+    title search only runs again when the window disappears (or, on macOS,
+    every `refresh_interval` seconds).
+    """
+
+    def __init__(self, region="screen", window_title="Flashpoint", refresh_interval=5.0):
+        if region not in ("screen", "game"):
+            raise ValueError("Invalid value for 'region'. Use 'screen' or 'game'.")
+
+        self.region = region
+        self.window_title = window_title
+        self.refresh_interval = refresh_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._window = None
+        self._rect = None
+        self._rect_time = 0.0
+
+    @property
+    def sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def invalidate(self):
+        """Forgets the cached window so the next capture re-detects it."""
+        with self._lock:
+            self._window = None
+            self._rect = None
+            self._rect_time = 0.0
+
+    def window_rect(self):
+        """Returns the cached (left, top, width, height) of the game window, or None."""
+        with self._lock:
+            if self._window is not None:
+                try:
+                    rect = (self._window.left, self._window.top, self._window.width, self._window.height)
+                    if rect[2] > 0 and rect[3] > 0:
+                        self._rect = rect
+                        return rect
+                except Exception:
+                    pass
+                # The window was closed or minimized; look it up again right away
+                self._window = None
+                self._rect_time = 0.0
+
+            if self._rect_time and time.monotonic() - self._rect_time < self.refresh_interval:
+                return self._rect
+
+            if IS_MAC:
+                rect = get_flashpoint_window_position(self.window_title)
+            else:
+                self._window = find_flashpoint_window(self.window_title)
+                rect = None
+                if self._window is not None:
+                    rect = (self._window.left, self._window.top, self._window.width, self._window.height)
+
+            self._rect = rect if rect and rect[2] > 0 and rect[3] > 0 else None
+            self._rect_time = time.monotonic()
+            return self._rect
+
+    def monitor(self):
+        """Returns the mss monitor dict of the region to capture."""
+        if self.region == "game":
+            rect = self.window_rect()
+            if rect:
+                left, top, width, height = rect
+                return {"top": top, "left": left, "width": width, "height": height}
+        return self.sct.monitors[1]
+
+    def grab(self) -> Frame:
+        monitor = self.monitor()
+        return Frame.from_mss(self.sct.grab(monitor), origin=(monitor["left"], monitor["top"]))
+
+    def grab_thumbnail(self, step=8):
+        """Grabs the region as a strided (h/step, w/step, 3) view of the raw buffer, without encoding."""
+        shot = self.sct.grab(self.monitor())
+        pixels = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return pixels[::step, ::step, :3]
+
+    def wait_until_stable(self, max_wait=2.0, threshold=0.005, interval=0.05, min_wait=0.05, step=8):
+        """
+        Polls downsampled frames until two consecutive ones differ in at most
+        `threshold` of their pixels, or until `max_wait` seconds have passed.
+        `min_wait` gives the game time to start reacting before the first sample.
+        Returns the number of seconds waited.
+        """
+        start = time.monotonic()
+        if max_wait <= 0:
+            return 0.0
+
+        time.sleep(min(min_wait, max_wait))
+        previous = self.grab_thumbnail(step)
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= max_wait:
+                return elapsed
+            time.sleep(min(interval, max_wait - elapsed))
+            current = self.grab_thumbnail(step)
+            if frame_change(previous, current) <= threshold:
+                return time.monotonic() - start
+            previous = current
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_capture_session(region="screen") -> CaptureSession:
+    """Returns the process-wide CaptureSession for a region, creating it once."""
+    with _sessions_lock:
+        if region not in _sessions:
+            _sessions[region] = CaptureSession(region=region)
+        return _sessions[region]
+
+
+def wait_until_stable(max_wait=2.0, threshold=0.005, region="game"):
+    """
+    Blocks until the screen stops changing after an action (see
+    CaptureSession.wait_until_stable). Watches the Flashpoint window by
+    default, falling back to the full screen when it is not found.
+    """
+    return get_capture_session(region).wait_until_stable(max_wait=max_wait, threshold=threshold)
@@ -0,0 +1,59 @@
+import base64
+import os
+from functools import cached_property
+
+import mss.tools
+
+
+class Frame:
+    """
+    In-memory screenshot holding the raw RGB pixels of a capture.
+
+    PNG bytes and the base64 payload are only produced when a consumer asks
+    for them, and are cached so repeated access costs nothing. Nothing is
+    written to disk unless save() is called.
+    """
+
+    def __init__(self, rgb: bytes, size: tuple[int, int], origin: tuple[int, int] = (0, 0)):
+        self.rgb = rgb
+        self.size = size
+        self.origin = origin  # (left, top) of the captured region on screen
+        self.path = None
+
+    @classmethod
+    def from_mss(cls, shot, origin: tuple[int, int] = (0, 0)) -> "Frame":
+        """Wraps an mss ScreenShot without copying its pixels twice."""
+        return cls(shot.rgb, shot.size, origin=origin)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @cached_property
+    def png(self) -> bytes:
+        return mss.tools.to_png(self.rgb, self.size)
+
+    @cached_property
+    def base64(self) -> str:
+        return base64.b64encode(self.png).decode("utf-8")
+
+    def to_pil(self):
+        from PIL import Image
+        return Image.frombytes("RGB", self.size, self.rgb)
+
+    def to_numpy(self):
+        """Returns a read-only (H, W, 3) uint8 view over the raw buffer."""
+        import numpy as np
+        return np.frombuffer(self.rgb, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def save(self, path: str) -> str:
+        """Writes the PNG to disk and remembers the path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.png)
+        self.path = path
+        return path
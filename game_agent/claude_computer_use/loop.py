@@ -6,6 +6,7 @@ import platform
 from collections.abc import Callable
 from datetime import datetime
 from enum import StrEnum
+from functools import lru_cache
 from typing import Any, cast
 
 import httpx
@@ -35,6 +36,9 @@ from tools import (
     ToolResult,
     ToolVersion,
 )
+from tools.image_codec import guess_media_type
+from tools.frame_dedup import FrameDeduplicator
+from metering import count_images, get_meter
 
 PROMPT_CACHING_BETA_FLAG = "prompt-caching-2024-07-31"
 
@@ -45,6 +49,22 @@ class APIProvider(StrEnum):
     VERTEX = "vertex"
 
 
+def make_client(provider: APIProvider, api_key: str) -> Anthropic | AnthropicVertex | AnthropicBedrock:
+    if provider == APIProvider.ANTHROPIC:
+        return Anthropic(api_key=api_key, max_retries=4)
+    elif provider == APIProvider.VERTEX:
+        return AnthropicVertex()
+    elif provider == APIProvider.BEDROCK:
+        return AnthropicBedrock()
+    raise ValueError(f"Unsupported API provider: '{provider}'")
+
+
+@lru_cache(maxsize=None)
+def get_shared_client(provider: APIProvider, api_key: str) -> Anthropic | AnthropicVertex | AnthropicBedrock:
+    """One client, and so one connection pool, per provider and key for the whole process."""
+    return make_client(provider, api_key)
+
+
 # This system prompt is optimized for the Docker environment in this repository and
 # specific tool combinations enabled.
 # We encourage modifying this system prompt to ensure the model has context for the
@@ -86,6 +106,7 @@ async def sampling_loop(
         [httpx.Request, httpx.Response | object | None, Exception | None], None
     ],
     api_key: str,
+    client: Anthropic | AnthropicVertex | AnthropicBedrock | None = None,
     only_n_most_recent_images: int | None = None,
     max_tokens: int = 4096,
     tool_version: ToolVersion,
@@ -97,33 +118,40 @@ async def sampling_loop(
     """
     tool_group = TOOL_GROUPS_BY_VERSION[tool_version]
     tool_collection = ToolCollection(*(ToolCls() for ToolCls in tool_group.tools))
+    # Consecutive identical screenshots are sent once, then as "(unchanged xN)"
+    frame_dedup = FrameDeduplicator()
     system = BetaTextBlockParam(
         type="text",
         text=f"{SYSTEM_PROMPT}{' ' + system_prompt_suffix if system_prompt_suffix else ''}",
     )
 
+    # Fixed for the whole session: built once instead of on every turn
+    tool_params = tool_collection.to_params()
+    betas = [tool_group.beta_flag] if tool_group.beta_flag else []
+    if token_efficient_tools_beta:
+        betas.append("token-efficient-tools-2025-02-19")
+    if client is None:
+        client = make_client(provider, api_key)
+    enable_prompt_caching = provider == APIProvider.ANTHROPIC
+    if enable_prompt_caching:
+        betas.append(PROMPT_CACHING_BETA_FLAG)
+        # Use type ignore to bypass TypedDict check until SDK types are updated
+        system["cache_control"] = {"type": "ephemeral"}  # type: ignore
+    extra_body = {}
+    if thinking_budget:
+        # Ensure we only send the required fields for thinking
+        extra_body = {
+            "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
+        }
+
     while True:
-        enable_prompt_caching = False
-        betas = [tool_group.beta_flag] if tool_group.beta_flag else []
-        if token_efficient_tools_beta:
-            betas.append("token-efficient-tools-2025-02-19")
         image_truncation_threshold = only_n_most_recent_images or 0
-        if provider == APIProvider.ANTHROPIC:
-            client = Anthropic(api_key=api_key, max_retries=4)
-            enable_prompt_caching = True
-        elif provider == APIProvider.VERTEX:
-            client = AnthropicVertex()
-        elif provider == APIProvider.BEDROCK:
-            client = AnthropicBedrock()
 
         if enable_prompt_caching:
-            betas.append(PROMPT_CACHING_BETA_FLAG)
             _inject_prompt_caching(messages)
             # Because cached reads are 10% of the price, we don't think it's
             # ever sensible to break the cache by truncating images
             only_n_most_recent_images = 2
-            # Use type ignore to bypass TypedDict check until SDK types are updated
-            system["cache_control"] = {"type": "ephemeral"}  # type: ignore
 
         if only_n_most_recent_images:
             _maybe_filter_to_n_most_recent_images(
@@ -131,27 +159,23 @@ async def sampling_loop(
                 only_n_most_recent_images,
                 min_removal_threshold=image_truncation_threshold,
             )
-        extra_body = {}
-        if thinking_budget:
-            # Ensure we only send the required fields for thinking
-            extra_body = {
-                "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
-            }
 
         # Call the API
         # we use raw_response to provide debug information to streamlit. Your
         # implementation may be able call the SDK directly with:
         # `response = client.messages.create(...)` instead.
         try:
-            raw_response = client.beta.messages.with_raw_response.create(
-                max_tokens=max_tokens,
-                messages=messages,
-                model=model,
-                system=[system],
-                tools=tool_collection.to_params(),
-                betas=betas,
-                extra_body=extra_body,
-            )
+            with get_meter().measure("anthropic", model, caller="claude_cua", images=count_images(messages)) as call:
+                raw_response = client.beta.messages.with_raw_response.create(
+                    max_tokens=max_tokens,
+                    messages=messages,
+                    model=model,
+                    system=[system],
+                    tools=tool_params,
+                    betas=betas,
+                    extra_body=extra_body,
+                )
+                call.usage = raw_response.parse().usage
         except (APIStatusError, APIResponseValidationError) as e:
             api_response_callback(e.request, e.response, e)
             return messages
@@ -181,9 +205,9 @@ async def sampling_loop(
                     name=content_block["name"],
                     tool_input=cast(dict[str, Any], content_block["input"]),
                 )
-                tool_result_content.append(
-                    _make_api_tool_result(result, content_block["id"])
-                )
+                api_tool_result = _make_api_tool_result(result, content_block["id"])
+                _collapse_unchanged_image(api_tool_result, frame_dedup)
+                tool_result_content.append(api_tool_result)
                 tool_output_callback(result, content_block["id"])
 
         if not tool_result_content:
@@ -312,7 +336,7 @@ def _make_api_tool_result(
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": "image/png",
+                        "media_type": guess_media_type(result.base64_image),
                         "data": result.base64_image,
                     },
                 }
@@ -325,6 +349,30 @@ def _make_api_tool_result(
     }
 
 
+def _collapse_unchanged_image(tool_result: BetaToolResultBlockParam, frame_dedup: FrameDeduplicator):
+    """
+    Replaces the screenshot of a tool result with an "(unchanged xN)" note when it
+    is byte-identical to the previous screenshot, which the model already has.
+    Images sent with a text (delta-mode crops) are never collapsed.
+    """
+    content = tool_result.get("content")
+    if not isinstance(content, list):
+        return
+    if any(isinstance(block, dict) and block.get("type") == "text" for block in content):
+        if any(isinstance(block, dict) and block.get("type") == "image" for block in content):
+            frame_dedup.reset()
+        return
+    for i, block in enumerate(content):
+        if isinstance(block, dict) and block.get("type") == "image":
+            repeats = frame_dedup.observe_exact(block["source"]["data"])
+            if repeats > 1:
+                content[i] = {
+                    "type": "text",
+                    "text": f"Screenshot identical to the previous one (unchanged x{repeats}).",
+                }
+            return
+
+
 def _maybe_prepend_system_tool_result(result: ToolResult, result_text: str):
     if result.system:
         result_text = f"<system>{result.system}</system>\n{result_text}"
@@ -18,7 +18,7 @@ from dotenv import load_dotenv
 from screeninfo import get_monitors
 
 # Internal modules
-from claude_computer_use.loop import APIProvider, sampling_loop
+from claude_computer_use.loop import APIProvider, get_shared_client, sampling_loop
 from claude_computer_use.tools import ToolResult
 
 load_dotenv()
@@ -192,6 +192,7 @@ async def run_agent(initial_prompt: str, custom_system_prompt: str = "", task_na
                 tool_output_callback=partial(tool_output_callback, tool_state=state["tools"]),
                 api_response_callback=api_response_callback,
                 api_key=state["api_key"],
+                client=get_shared_client(state["provider"], state["api_key"]),
                 only_n_most_recent_images=state["only_n_most_recent_images"],
                 tool_version=state["tool_version"],
                 thinking_budget=1024,
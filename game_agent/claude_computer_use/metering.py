@@ -0,0 +1,287 @@
+"""
+Token, latency and cost metering for model calls.
+
+Every call records its provider, model, caller, input/output tokens,
+cache-read/cache-write tokens, image count, latency and estimated cost as
+one line of a per-run JSONL file. An aggregated summary per caller and model
+is written next to it (and printed) when the process exits.
+
+Callers are tagged with caller_scope("MapperBot") or the @metered("Planner")
+decorator; calls outside any scope are tagged with the call site's default.
+
+Configured through the environment:
+- LLM_METER: "on" (default) or "off"
+- LLM_METER_DIR: output directory (default ./metering)
+- LLM_RUN_ID: file name stem for this run (default: start time and pid)
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# USD per million tokens: (input, output), matched by model name prefix, longest first
+PRICES = {
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4.1": (2.0, 8.0),
+    "o4-mini": (1.1, 4.4),
+    "computer-use-preview": (3.0, 12.0),
+    "gemini-1.5-pro": (1.25, 5.0),
+    "gemini-2.0-flash": (0.1, 0.4),
+    "gemini-2.5-pro": (1.25, 10.0),
+}
+
+# Price of cache reads and writes relative to the input price
+CACHE_READ_FACTOR = {"anthropic": 0.1, "openai": 0.5, "gemini": 0.25}
+CACHE_WRITE_FACTOR = {"anthropic": 1.25}
+
+_caller = contextvars.ContextVar("llm_caller", default=None)
+
+
+@contextmanager
+def caller_scope(name: str):
+    """Tags every model call made inside the block (including awaited tasks) with name."""
+    token = _caller.set(name)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def metered(name: str):
+    """Decorator form of caller_scope."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with caller_scope(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@dataclass
+class Usage:
+    """Token counts normalised across providers; input_tokens excludes cache reads and writes."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+def _get(obj, name, default=0):
+    if obj is None:
+        return default
+    value = obj.get(name, default) if isinstance(obj, dict) else getattr(obj, name, default)
+    return default if value is None else value
+
+
+def parse_usage(usage) -> Usage:
+    """
+    Reads the usage block of an Anthropic message, an OpenAI chat completion
+    or Responses API reply, or Gemini usage_metadata.
+    """
+    if usage is None:
+        return Usage()
+    if _get(usage, "cache_read_input_tokens", None) is not None or _get(usage, "cache_creation_input_tokens", None) is not None:
+        return Usage(  # Anthropic
+            input_tokens=_get(usage, "input_tokens"),
+            output_tokens=_get(usage, "output_tokens"),
+            cache_read_tokens=_get(usage, "cache_read_input_tokens"),
+            cache_write_tokens=_get(usage, "cache_creation_input_tokens"),
+        )
+    if _get(usage, "prompt_token_count", None) is not None:
+        cached = _get(usage, "cached_content_token_count")
+        return Usage(  # Gemini
+            input_tokens=_get(usage, "prompt_token_count") - cached,
+            output_tokens=_get(usage, "candidates_token_count"),
+            cache_read_tokens=cached,
+        )
+    if _get(usage, "prompt_tokens", None) is not None:
+        cached = _get(_get(usage, "prompt_tokens_details", None), "cached_tokens")
+        return Usage(  # OpenAI chat completions
+            input_tokens=_get(usage, "prompt_tokens") - cached,
+            output_tokens=_get(usage, "completion_tokens"),
+            cache_read_tokens=cached,
+        )
+    cached = _get(_get(usage, "input_tokens_details", None), "cached_tokens")
+    return Usage(  # Anthropic without cache fields, OpenAI Responses API
+        input_tokens=_get(usage, "input_tokens") - cached,
+        output_tokens=_get(usage, "output_tokens"),
+        cache_read_tokens=cached,
+    )
+
+
+def estimate_cost(provider: str, model: str, usage: Usage) -> float | None:
+    for prefix in sorted(PRICES, key=len, reverse=True):
+        if model and model.startswith(prefix):
+            input_price, output_price = PRICES[prefix]
+            break
+    else:
+        return None
+    return (
+        usage.input_tokens * input_price
+        + usage.cache_read_tokens * input_price * CACHE_READ_FACTOR.get(provider, 1.0)
+        + usage.cache_write_tokens * input_price * CACHE_WRITE_FACTOR.get(provider, 1.0)
+        + usage.output_tokens * output_price
+    ) / 1_000_000
+
+
+def count_images(payload) -> int:
+    """Counts inline images in a request body (Anthropic image blocks and data: URLs)."""
+    images = 0
+    stack = [payload]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if item.get("type") == "image":
+                images += 1
+                continue
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, str) and item.startswith("data:image"):
+            images += 1
+    return images
+
+
+@dataclass
+class CallMeasurement:
+    """Filled in by the code inside Meter.measure(); usage may be any provider's usage block."""
+
+    usage: object = None
+    images: int = 0
+    error: str | None = None
+    extra: dict = field(default_factory=dict)
+
+
+class Meter:
+    def __init__(self, directory: str, run_id: str, enabled: bool = True):
+        self.enabled = enabled
+        self.path = os.path.join(directory, f"{run_id}.jsonl")
+        self.summary_path = os.path.join(directory, f"{run_id}_summary.json")
+        self._lock = threading.Lock()
+        self._file = None
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    @classmethod
+    def from_env(cls) -> "Meter":
+        run_id = os.getenv("LLM_RUN_ID") or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        return cls(
+            directory=os.getenv("LLM_METER_DIR", "./metering"),
+            run_id=run_id,
+            enabled=os.getenv("LLM_METER", "on").lower() != "off",
+        )
+
+    def record(self, provider, model, usage=None, latency: float = 0.0, images: int = 0, caller: str | None = None, error: str | None = None, **extra):
+        if not self.enabled:
+            return
+        tokens = usage if isinstance(usage, Usage) else parse_usage(usage)
+        entry = {
+            "ts": time.time(),
+            "caller": _caller.get() or caller or "unknown",
+            "provider": provider,
+            "model": model,
+            **asdict(tokens),
+            "images": images,
+            "latency": round(latency, 4),
+            "cost_usd": estimate_cost(provider, model, tokens),
+        }
+        if error:
+            entry["error"] = error
+        entry.update(extra)
+
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            totals = self._totals[(entry["caller"], model)]
+            totals["calls"] += 1
+            totals["errors"] += 1 if error else 0
+            for name, value in asdict(tokens).items():
+                totals[name] += value
+            totals["images"] += images
+            totals["latency"] += latency
+            totals["cost_usd"] += entry["cost_usd"] or 0.0
+
+    @contextmanager
+    def measure(self, provider, model, caller: str | None = None, images: int = 0):
+        """Times the block and records it on exit, also when it raises."""
+        measurement = CallMeasurement(images=images)
+        start = time.perf_counter()
+        try:
+            yield measurement
+        except GeneratorExit:
+            # A streaming generator closed early by its consumer
+            measurement.extra["cancelled"] = True
+            raise
+        except BaseException as e:
+            measurement.error = type(e).__name__
+            raise
+        finally:
+            self.record(
+                provider, model, measurement.usage, time.perf_counter() - start,
+                measurement.images, caller, measurement.error, **measurement.extra,
+            )
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = {}
+            for (caller, model), totals in sorted(self._totals.items()):
+                row = {name: round(value, 6) if name == "cost_usd" else round(value, 3) for name, value in totals.items()}
+                row["avg_latency"] = round(totals["latency"] / totals["calls"], 3)
+                prompt_tokens = totals["input_tokens"] + totals["cache_read_tokens"] + totals["cache_write_tokens"]
+                row["cache_hit_rate"] = round(totals["cache_read_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+                summary.setdefault(caller, {})[model] = row
+            return summary
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if not self._totals:
+            return
+        summary = self.summary()
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"[metering] {self.path}")
+        for caller, models in summary.items():
+            for model, row in models.items():
+                print(
+                    f"[metering] {caller:<16} {model:<32} calls={int(row['calls'])} "
+                    f"in={int(row['input_tokens'])} out={int(row['output_tokens'])} "
+                    f"cache_read={int(row['cache_read_tokens'])} cache_hit={row['cache_hit_rate']:.0%} latency={row['latency']:.1f}s "
+                    f"cost=${row['cost_usd']:.4f}"
+                )
+
+
+_meter: Meter | None = None
+_meter_lock = threading.Lock()
+
+
+def get_meter() -> Meter:
+    """Returns the process-wide Meter configured from the environment."""
+    global _meter
+    with _meter_lock:
+        if _meter is None:
+            _meter = Meter.from_env()
+            atexit.register(_meter.close)
+        return _meter
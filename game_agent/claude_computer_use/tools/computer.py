@@ -7,12 +7,15 @@ from pathlib import Path
 from typing import Literal, TypedDict, cast, get_args
 from uuid import uuid4
 from datetime import datetime
-from PIL import Image
 import pyautogui
 
 from anthropic.types.beta import BetaToolComputerUse20241022Param, BetaToolUnionParam
 
 from .base import BaseAnthropicTool, ToolError, ToolResult
+from .frame_writer import get_frame_writer
+from .image_codec import ImageCodec
+from .screen_grabber import ScreenGrabber
+from dataclasses import replace
 
 TYPING_DELAY_MS = 12
 TYPING_GROUP_SIZE = 50
@@ -28,6 +31,8 @@ Action_20250124 = Action_20241022 | Literal[
 
 ScrollDirection = Literal["up", "down", "left", "right"]
 
+WXGA = (1280, 800)
+
 CLICK_BUTTONS = {
     "left_click": "left",
     "right_click": "right",
@@ -63,7 +68,9 @@ class PyAutoGUIComputerTool:
     width: int
     height: int
     display_num: int | None
-    _screenshot_delay = 0.5
+    # Upper bound and change threshold for the post-action settle wait
+    _settle_timeout = 2.0
+    _settle_threshold = 0.005
     _scaling_enabled = True
 
     def __init__(self):
@@ -78,7 +85,12 @@ class PyAutoGUIComputerTool:
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
         self.game_name = self.screenshot_dir.parent.name
         self.screenshot_counter = 1
+        # Payload codec from IMAGE_CODEC / IMAGE_QUALITY; the size is fixed by coordinate scaling
+        self._image_codec = replace(ImageCodec.from_env(), max_edge=None)
         self._is_retina = is_retina_display()
+        # Screenshots are always scaled to WXGA; the factors are fixed for the lifetime of the tool
+        self._scale = (WXGA[0] / self.width, WXGA[1] / self.height)
+        self._grabber = ScreenGrabber(WXGA if self._scaling_enabled else None)
 
     @property
     def options(self) -> ComputerToolOptions:
@@ -111,21 +123,16 @@ class PyAutoGUIComputerTool:
         raise ToolError(f"Invalid action: {action}")
 
     async def screenshot(self) -> ToolResult:
-        await asyncio.sleep(self._screenshot_delay)
+        # Wait for the screen to settle instead of a fixed delay
+        await self._grabber.wait_until_stable(self._settle_timeout, self._settle_threshold)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"screenshot_{self.game_name}_{timestamp}_{self.screenshot_counter:04}.png"
+        filename = f"screenshot_{self.game_name}_{timestamp}_{self.screenshot_counter:04}{self._image_codec.extension}"
         self.screenshot_counter += 1
         path = self.screenshot_dir / filename
-        shot = pyautogui.screenshot()
-        if self._scaling_enabled:
-            if self._is_retina:
-                shot = shot.resize((1280, 800), Image.LANCZOS)
-            else:
-                x, y = self.scale_coordinates(ScalingSource.COMPUTER, self.width, self.height)
-                if x != self.width or y != self.height:
-                    shot = shot.resize((x, y), Image.LANCZOS)
-        shot.save(path)
-        return ToolResult(base64_image=base64.b64encode(path.read_bytes()).decode())
+        shot = self._grabber.grab()
+        data = self._image_codec.encode(shot)
+        get_frame_writer().submit(path, data)
+        return ToolResult(base64_image=base64.b64encode(data).decode())
 
     async def mouse_move(self, x: int, y: int) -> ToolResult:
         pyautogui.moveTo(x, y)
@@ -161,10 +168,7 @@ class PyAutoGUIComputerTool:
         return self.scale_coordinates(ScalingSource.API, coordinate[0], coordinate[1])
 
     def scale_coordinates(self, source: ScalingSource, x: int, y: int) -> tuple[int, int]:
-        targets = {"WXGA": {"width": 1280, "height": 800}}
-        target = targets["WXGA"]
-        x_scale = target["width"] / self.width
-        y_scale = target["height"] / self.height
+        x_scale, y_scale = self._scale
         return (
             round(x / x_scale) if source == ScalingSource.API else round(x * x_scale),
             round(y / y_scale) if source == ScalingSource.API else round(y * y_scale),
@@ -1,9 +1,10 @@
-import json
 import os
+
 from gui_agent import execute_action as action_Agent
+from api import api_caller, caller_scope
 from tools import (
-    load_config, capture_flash_screenshot, encode_image,
-    load_action_prompt, load_game_prompt, load_memory
+    load_config, capture_flash_frame, ImageCodec,
+    load_action_prompt, load_game_prompt, load_memory, get_memory_backend, get_tiered_memory
 )
 
 class Agent:
@@ -16,6 +17,8 @@ class Agent:
         self.action_prompt_path = self.config.get("action_prompt_path")
         self.game_prompt_path = self.config.get("game_prompt_path")
         self.final_prompt = None
+        self.prompt_prefix = None
+        self.prompt_suffix = None
         self.action_prompt = None
         self.system_prompt = None
         self.game_prompt = None
@@ -26,10 +29,16 @@ class Agent:
         self.provider = "anthropic" if self.reasoning_model == "claude-3-7-sonnet-20250219" else "openai"
 
         # image
+        self.frame = None
         self.image = None
+        self.save_screenshots = self.config.get("save_screenshots", True)
+        self.capture_region = self.config.get("capture_region", "screen")
+        self.image_codec = ImageCodec.from_config(self.config)
 
         # memory
         self.memory_path = f"./memory/{self.gui_model}/{self.reasoning_model}/{self.game_name}/"
+        self.memory_backend = self.config.get("memory_backend", "jsonl")
+        self.tier_settings = self.config.get("episodic_tiers", {}) or {}
         self.clue_memory = None
         self.episodic_memory = None
         self.task_memory = None
@@ -38,7 +47,7 @@ class Agent:
         self.success_memory = None
 
     def load_memory(self, type: str = "episodic", n: int = None):
-        memory = load_memory(self.memory_path, type=type, n=n)
+        memory = load_memory(self.memory_path, type=type, n=n, backend=self.memory_backend)
         if type == "episodic":
             self.episodic_memory = memory
         elif type == "clue":
@@ -54,8 +63,6 @@ class Agent:
             raise ValueError(f"Unknown memory type: {type}")
 
     def save_memory(self, type: str = "episodic"):
-        os.makedirs(self.memory_path, exist_ok=True)
-
         if type == "episodic":
             data = self.episodic_memory
         elif type == "clue":
@@ -73,40 +80,41 @@ class Agent:
             print(f"[WARNING] 저장할 {type} memory가 없습니다.")
             return
 
-        file_path = os.path.join(self.memory_path, f"{type}_memory.json")
-
-        # Memory Load
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    existing = json.load(f)
-            except json.JSONDecodeError:
-                existing = []
-        else:
-            existing = []
-
-        # Merge and Eliminate duplicated data
-        if type == "clue":
-            seen = {(c["clue"], c["location"]) for c in existing if isinstance(c, dict)}
-            merged = existing + [c for c in data if (c["clue"], c["location"]) not in seen]
-
-        elif isinstance(data, list):
-            if all(isinstance(d, dict) for d in data):
-                serialized = {json.dumps(d, sort_keys=True): d for d in existing if isinstance(d, dict)}
-                for d in data:
-                    key = json.dumps(d, sort_keys=True)
-                    if key not in serialized:
-                        serialized[key] = d
-                merged = list(serialized.values())
-            else:
-                merged = list(dict.fromkeys(existing + data))
-        else:
-            merged = data 
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(merged, f, indent=2, ensure_ascii=False)
+        # Lists are merged into the stored memory without duplicates; anything else replaces it
+        file_path = get_memory_backend(self.memory_backend).save(self.memory_path, type, data)
+
+        print(f"[✅] Success to save {type} memory: {file_path}")
+        tiers = self.episodic_tiers() if type == "episodic" else None
+        if tiers is not None:
+            tiers.maybe_rollup()
+
+    def query_memory(self, type: str, location: str = None, n: int = None):
+        """Stored items of a memory type, optionally only those at location and/or the last n."""
+        return get_memory_backend(self.memory_backend).query(self.memory_path, type, location=location, n=n)
+
+    def compact_memory(self, type: str = None):
+        """Drops duplicate entries from the stored memory (every type when type is None)."""
+        get_memory_backend(self.memory_backend).compact(self.memory_path, type)
+
+    def episodic_tiers(self):
+        """The tiered view of this game's episodic memory, or None when disabled in config."""
+        if not self.tier_settings.get("enabled", True):
+            return None
+        return get_tiered_memory(
+            os.path.join(self.memory_path, "episodic_tiers.json"),
+            load_entries=lambda n: load_memory(self.memory_path, type="episodic", n=n, backend=self.memory_backend),
+            summarize=self.summarize_memory,
+            recent_budget=self.tier_settings.get("recent_budget", 1500),
+            location_budget=self.tier_settings.get("location_budget", 1500),
+            game_budget=self.tier_settings.get("game_budget", 600),
+        )
 
-        print(f"[✅] Success to save {type}_memory.json: {file_path}")
+    def summarize_memory(self, prompt: str) -> str:
+        # Runs on the rollup thread, which does not inherit the caller scope
+        with caller_scope("MemoryRollup"):
+            return api_caller(
+                self.provider, "You summarize the memory of a game-playing agent.", self.reasoning_model, prompt
+            )
 
     def load_prompt(self, option="action", type: str = None):
         if option == "action":
@@ -119,25 +127,59 @@ class Agent:
         else:
             raise ValueError("The prompt type does not exist.")
 
+    def compose_prompt(self, variable: str, instructions: str = "", separate_system: bool = False):
+        """
+        Lays the prompt out as a stable prefix (system, game and action prompts
+        plus the bot's fixed instructions) followed by the variable part
+        (memory dumps), so providers can serve the prefix from their prompt
+        cache on every call for the same bot and game.
+
+        With separate_system the prefix becomes the system prompt and the
+        variable part the user prompt; otherwise final_prompt is both, prefix first.
+        """
+        stable = [self.system_prompt, self.game_prompt, self.action_prompt, instructions]
+        self.prompt_prefix = "".join(f"{part.strip()}\n\n" for part in stable if part and part.strip())
+        self.prompt_suffix = variable
+        if separate_system:
+            self.system_prompt = self.prompt_prefix
+            self.final_prompt = self.prompt_suffix
+        else:
+            self.final_prompt = self.prompt_prefix + self.prompt_suffix
+
+    def capture_frame(self, time=None):
+        self.frame = capture_flash_frame(
+            self.game_name, self.gui_model, self.reasoning_model,
+            time=time, save=self.save_screenshots, region=self.capture_region
+        )
+        return self.frame
+
     def capture_and_encode_image(self):
-        self.image = encode_image(capture_flash_screenshot(self.game_name, self.gui_model, self.reasoning_model))
+        self.image = self.capture_frame().encode(self.image_codec)
         return self.image
 
     def needs_image(self):
         return self.gui_model not in ["gpt_operator", "claude_cua"]
 
     def execute_action(self):
+        image_box = None
         if self.needs_image():
             self.capture_and_encode_image()
-
-        result = action_Agent(
-            action_prompt=self.final_prompt,
-            system_prompt=self.system_prompt if self.gui_model == "claude_cua" else None,
-            encoded_image=self.image,
-            gui_model=self.gui_model,
-            reasoning_model=self.reasoning_model,
-            type=self.moduler
-        )
+            # Grounded coordinates must be mapped back to the screen when the
+            # payload is a window crop or was downscaled by the codec
+            if self.capture_region == "game" or self.frame.payload_size(self.image_codec) != self.frame.size:
+                image_box = (*self.frame.origin, *self.frame.size)
+
+        # Model calls are metered under the bot's class name
+        with caller_scope(type(self).__name__):
+            result = action_Agent(
+                action_prompt=self.final_prompt,
+                system_prompt=self.system_prompt if self.gui_model == "claude_cua" else None,
+                encoded_image=self.image,
+                image_box=image_box,
+                gui_model=self.gui_model,
+                reasoning_model=self.reasoning_model,
+                type=self.moduler
+            )
 
         if self.moduler == "clue_seeker" and isinstance(result, dict):
             return result
@@ -2,8 +2,10 @@ from agent import Agent
 from tools import  extract_clues_from_text, extract_episodic_memory_from_text, extract_json_block_from_response
 from gui_agent import execute_action as action_Agent
 import json, os
-from api import api_caller
+from api import caller_scope, stream_tagged
 import re
+from tools.memory_store import key_digest, memory_key
+from tools.retrieval import approx_tokens, entry_text, select_relevant
 
 """
 Our Agents:
@@ -28,23 +30,11 @@ class SeekerBot(Agent):
         super().__init__(config_path=config_path, moduler="clue_seeker", game_name=game_name)
 
     def make_prompt(self):
-
-        if self.gui_model == "claude_cua":
-            self.system_prompt = f"{self.system_prompt.strip()}\n\n{self.game_prompt.strip()}\n\n"
-            self.final_prompt = (
-                f"{self.action_prompt.strip()}\n\n"
-                "Do not store the same clue more than once in memory.\n\n"
-                f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n"
-
-            )
-        else:
-            self.final_prompt = (
-                f"{self.system_prompt.strip()}\n\n"
-                f"{self.game_prompt.strip()}\n\n"
-                f"{self.action_prompt.strip()}\n\n"
-                "Do not store the same clue more than once in memory.\n\n"
-                f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n"
-            )
+        self.compose_prompt(
+            f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n",
+            instructions="Do not store the same clue more than once in memory.",
+            separate_system=self.gui_model == "claude_cua",
+        )
             
         print("🥔SeekerBot:", self.final_prompt)
             
@@ -219,19 +209,10 @@ class SolverBot(Agent):
         self.mapping = "\n".join(lines) if lines else "[Mapping]\n(No valid mapping entries found)"
 
     def make_prompt(self):
-        if self.gui_model == "claude_cua":
-            self.system_prompt = f"{self.system_prompt.strip()}\n\n{self.game_prompt.strip()}\n\n"
-            self.final_prompt = (
-                f"{self.action_prompt.strip()}\n\n"
-                f"{self.mapping if self.mapping else ''}"
-            )
-        else:
-            self.final_prompt = (
-                f"{self.system_prompt.strip()}\n\n"
-                f"{self.game_prompt.strip()}\n\n"
-                f"{self.action_prompt.strip()}\n\n"
-                f"{self.mapping if self.mapping else ''}"
-            )
+        self.compose_prompt(
+            self.mapping if self.mapping else "",
+            separate_system=self.gui_model == "claude_cua",
+        )
 
     def execute_action(self):
         result = super().execute_action()
@@ -288,6 +269,27 @@ class SolverBot(Agent):
     
     
 ## Mapping between clues and episodic memory
+def mapping_key(mapping):
+    """Clue name of a mapping (case-insensitive), used to match regenerated and succeeded mappings."""
+    clue = mapping.get("clue")
+    name = (clue.get("name") or clue.get("clue")) if isinstance(clue, dict) else clue
+    if not name:
+        return json.dumps(mapping, sort_keys=True, ensure_ascii=False)
+    return str(name).strip().lower()
+
+
+def summarize_mappings(mappings):
+    """One line per mapping: clue name, location and expected action."""
+    lines = []
+    for mapping in mappings:
+        clue = mapping.get("clue")
+        name = (clue.get("name") or clue.get("clue")) if isinstance(clue, dict) else clue
+        location = clue.get("location") if isinstance(clue, dict) else None
+        where = f" @ {location}" if location else ""
+        lines.append(f"- {name}{where} -> {mapping.get('expected_action', '')}")
+    return "\n".join(lines) if lines else "(none)"
+
+
 class MapperBot(Agent):
     """
     Information used:
@@ -296,89 +298,249 @@ class MapperBot(Agent):
     
     Information to save:
     - Mapping results: {Clue, Episodic Memory, Expected Action}
+
+    Mapping is incremental: the clues and episodic entries already sent to the
+    model are recorded in mapping_watermark.json, and a run sends only the new
+    ones (plus earlier entries relevant to them) with a one-line summary of the
+    existing mappings. Mappings the model does not return again are carried
+    forward, succeeded ones are dropped, and nothing is sent when there is no
+    new material.
     """
     def __init__(self, config_path: str = "config.yaml", game_name: str = None):
         super().__init__(config_path=config_path, moduler="clue_mapper", game_name=game_name)
+        retrieval = self.config.get("mapper_retrieval", {}) or {}
+        self.retrieval_enabled = retrieval.get("enabled", True)
+        self.top_k_clues = retrieval.get("top_k_clues", 15)
+        self.top_k_episodic = retrieval.get("top_k_episodic", 10)
+        self.memory_token_budget = retrieval.get("token_budget", 2000)
+        self.episodic_window = retrieval.get("episodic_window", 200)
+        self.prompt_stats = None
+
+        self.incremental = self.config.get("mapper_incremental", True)
+        self.mapping_path = os.path.join(self.memory_path, "mapping_memory.json")
+        self.watermark_path = os.path.join(self.memory_path, "mapping_watermark.json")
+        self.watermark = {"clue": set(), "episodic": set()}
+        self.stored_mappings = []
+        self.existing_mappings = []
+        self.succeeded = set()
+        self.sent = {"clue": [], "episodic": []}
+
+    def load_mappings(self):
+        try:
+            with open(self.mapping_path, "r", encoding="utf-8") as f:
+                mappings = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        if not isinstance(mappings, list):
+            return []
+        return [m for m in mappings if isinstance(m, dict) and "error" not in m]
+
+    def load_watermark(self):
+        empty = {"clue": set(), "episodic": set()}
+        # Without the mappings it describes, everything has to be mapped again
+        if not self.incremental or not os.path.exists(self.mapping_path):
+            return empty
+        try:
+            with open(self.watermark_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return empty
+        return {type: set(data.get(type, [])) for type in empty}
+
+    def save_watermark(self):
+        for type, items in self.sent.items():
+            self.watermark[type].update(key_digest(memory_key(type, item)) for item in items)
+        try:
+            with open(self.watermark_path, "w", encoding="utf-8") as f:
+                json.dump({type: sorted(digests) for type, digests in self.watermark.items()}, f, indent=2)
+        except OSError as e:
+            print(f"[⚠️] MapperBot: Failed to save the mapping watermark - {e}")
+
+    def split_new(self, type, items):
+        """(entries not yet sent to the model, entries already sent), each in stored order."""
+        new, old = [], []
+        for item in items or []:
+            (old if key_digest(memory_key(type, item)) in self.watermark[type] else new).append(item)
+        return new, old
+
+    def select_memory(self):
+        """
+        New clues and episodic entries most relevant to the current scene (the
+        latest episodic entries) and the open mappings, then earlier entries
+        most relevant to the new material, all within the token budget.
+        Returns (clues, earlier clues, episodic entries, earlier episodic entries).
+        """
+        new_clues, old_clues = self.split_new("clue", self.clue_memory)
+        new_episodic, old_episodic = self.split_new("episodic", self.episodic_memory)
+        if not self.retrieval_enabled:
+            return new_clues, [], new_episodic[-10:], []
+
+        scene = " ".join(
+            [entry_text(entry) for entry in (self.episodic_memory or [])[-3:]]
+            + [entry_text({k: m.get(k) for k in ("clue", "expected_action")}) for m in self.existing_mappings]
+        )
+        new_material = " ".join(entry_text(entry) for entry in new_clues + new_episodic)
+        budget = self.memory_token_budget
+
+        clues, used = select_relevant(new_clues, scene, self.top_k_clues, budget // 2)
+        earlier_clues = []
+        if new_episodic:  # a new situation may be where an earlier clue applies
+            earlier_clues, more = select_relevant(old_clues, new_material, self.top_k_clues - len(clues), budget // 2 - used)
+            used += more
+        episodic, more = select_relevant(new_episodic, scene, self.top_k_episodic, budget - used, keep_recent=2)
+        used += more
+        earlier_episodic = []
+        if new_clues:  # a new clue may explain an earlier situation
+            earlier_episodic, _ = select_relevant(old_episodic, new_material, self.top_k_episodic - len(episodic), budget - used)
+        return clues, earlier_clues, episodic, earlier_episodic
+
+    def full_dump_tokens(self):
+        """Size of the prompt with every clue, the last 10 episodic entries and the whole success memory."""
+        stable = [self.system_prompt, self.game_prompt, self.action_prompt]
+        return approx_tokens(
+            "".join(f"{part.strip()}\n\n" for part in stable if part and part.strip())
+            + f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n"
+            + f"[Episodic Memory]\n{json.dumps((self.episodic_memory or [])[-10:], indent=2)}\n\n"
+            + f"[Success Memory]\n{json.dumps(self.success_memory or [], indent=2)}\n\n"
+        )
 
     def make_prompt(self):
-        success_data = self.success_memory if self.success_memory else []
-        if self.reasoning_model == "claude-3-7-sonnet-20250219":
-            self.system_prompt = (f"{self.system_prompt.strip()}\n\n"
-                                  f"{self.game_prompt.strip()}\n\n")
-            self.final_prompt = (
-                f"{self.action_prompt.strip()}\n\n"
-                f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n"
-                f"[Episodic Memory]\n{json.dumps(self.episodic_memory, indent=2)}\n\n"
-                "Do not generate mapping memory that has already succeeded.\n\n"
-                f"[Success Memory]\n{json.dumps(success_data, indent=2)}\n\n"
-            )
-        else:
-            self.final_prompt = (
-                f"{self.system_prompt.strip()}\n\n"
-                f"{self.game_prompt.strip()}\n\n"
-                f"{self.action_prompt.strip()}\n\n"
-                f"[Clues]\n{json.dumps(self.clue_memory, indent=2)}\n\n"
-                f"[Episodic Memory]\n{json.dumps(self.episodic_memory, indent=2)}\n\n"
-                "Do not generate mapping memory that has already succeeded.\n\n"
-                f"[Success Memory]\n{json.dumps(success_data, indent=2)}\n\n"    
-            )
+        full = self.full_dump_tokens()
+        clues, earlier_clues, episodic, earlier_episodic = self.select_memory()
+        self.sent = {"clue": clues, "episodic": episodic}
+        # Older episodic memory, rolled up into location and game summaries
+        tiers = self.episodic_tiers()
+        summaries = tiers.render() if tiers is not None else ""
+
+        sections = [
+            ("Clues", clues, True),
+            ("Earlier Clues (already mapped)", earlier_clues, False),
+            ("Episodic Memory", episodic, True),
+            ("Earlier Episodic Memory (already mapped)", earlier_episodic, False),
+        ]
+        self.compose_prompt(
+            "".join(f"[{title}]\n{json.dumps(items, indent=2)}\n\n" for title, items, always in sections if items or always)
+            + (f"{summaries}\n\n" if summaries else "")
+            + f"[Existing Mappings]\n{summarize_mappings(self.existing_mappings)}\n\n"
+            + f"[Success Memory]\n{summarize_mappings([m for m in self.success_memory or [] if isinstance(m, dict)])}\n\n",
+            instructions=(
+                "Do not generate mapping memory that has already succeeded. "
+                "Existing mappings are kept as they are: return only new mappings, "
+                "or an existing one (same clue name) whose expected action should change."
+            ),
+            separate_system=self.provider == "anthropic",
+        )
         print(self.final_prompt)
 
+        sent = approx_tokens(self.prompt_prefix + self.prompt_suffix)
+        self.prompt_stats = {
+            "clues": f"{len(clues) + len(earlier_clues)}/{len(self.clue_memory or [])}",
+            "episodic": f"{len(episodic) + len(earlier_episodic)}/{len(self.episodic_memory or [])}",
+            "prompt_tokens": sent,
+            "full_dump_tokens": full,
+        }
+        print(
+            f"[MapperBot] prompt ~{sent} tokens vs ~{full} with the full dump "
+            f"({1 - sent / full:.0%} smaller); clues {self.prompt_stats['clues']}, episodic {self.prompt_stats['episodic']}"
+        )
+
     def execute_action(self):
+        """The mappings in the reply ([] for [Nobody]), or None when the reply is unusable."""
         try:
-            response = api_caller(
+            # Stops the generation as soon as </RESPO> arrives
+            stream = stream_tagged(
                 api_provider=self.provider,
                 system_prompt=self.system_prompt,
                 model_name=self.reasoning_model,
                 move_prompts=self.final_prompt,
-                base64_images=[]
+                base64_images=[],
+                on_text=lambda chunk: print(chunk, end="", flush=True),
             )
-            print(response)
+            with caller_scope("MapperBot"):
+                payload = next(stream, None)
+                stream.close()
+            print()
 
             # Parsing based on <RESPO> tags
-            if "<RESPO>" in response and "</RESPO>" in response:
-                content = response.split("<RESPO>")[1].split("</RESPO>")[0].strip()
-                content = content.replace("\\n", "\n").replace('\\"', '"').replace("\\'", "'")
-
-                try:
-                    parsed = json.loads(content)
-                    if isinstance(parsed, list):  # MapperBot returns a list
-                        return parsed
-                    elif isinstance(parsed, str) and parsed.strip() == "[Nobody]":
-                        return []
-                    else:
-                        print("[⚠️] Unexpected structure: not a list")
-                except json.JSONDecodeError as e:
-                    print(f"[❌] MapperBot: JSON parsing failed - {e}")
-                    print("▶️ Original content snippet:", content)
+            if payload is not None:
+                parsed = payload.data
+                # The prompt asks for an unquoted [Nobody], which is not JSON
+                if payload.text.strip() == "[Nobody]" or (isinstance(parsed, str) and parsed.strip() == "[Nobody]"):
+                    return []
+                elif payload.error:
+                    print(f"[❌] MapperBot: JSON parsing failed - {payload.error}")
+                    print("▶️ Original content snippet:", payload.text)
+                elif isinstance(parsed, list):  # MapperBot returns a list
+                    return parsed
+                else:
+                    print("[⚠️] Unexpected structure: not a list")
             else:
                 print("[❌] <RESPO> tag not included in response.")
 
-            return []  # fallback
+            return None  # unusable reply, unlike an explicit [Nobody]
 
         except Exception as e:
             print(f"[❌] Exception during execute_action: {e}")
             return [{"error": str(e)}]
 
+    def merge_mappings(self, new_mappings):
+        """Existing mappings carried forward, each replaced by a new mapping for the same clue."""
+        merged = {mapping_key(m): m for m in self.existing_mappings}
+        for mapping in new_mappings:
+            if isinstance(mapping, dict):
+                merged[mapping_key(mapping)] = mapping
+        return [m for key, m in merged.items() if key not in self.succeeded]
+
+    def save_mappings(self):
+        if self.mapping == self.stored_mappings and os.path.exists(self.mapping_path):
+            print("[✅] MapperBot: Mappings unchanged.")
+            return
+        try:
+            os.makedirs(self.memory_path, exist_ok=True)
+            with open(self.mapping_path, "w", encoding="utf-8") as f:
+                json.dump(self.mapping, f, indent=2, ensure_ascii=False)
+            print(f"[✅] MapperBot: Saved {len(self.mapping)} mappings.")
+        except Exception as e:
+            print(f"[❌] MapperBot: Failed to save mapping - {e}")
+
     def run(self):
         self.load_prompt(option="game", type="system_prompt")
         self.load_prompt(option="game", type="game_prompt")
         self.load_prompt(option="action")
         
         self.load_memory("clue")
-        self.load_memory("episodic", n=10)
+        self.load_memory("episodic", n=self.episodic_window if self.retrieval_enabled else 10)
         self.load_memory("success")
 
-        self.make_prompt()
-        self.mapping = self.execute_action()
+        self.succeeded = {mapping_key(m) for m in self.success_memory or [] if isinstance(m, dict)}
+        self.stored_mappings = self.load_mappings()
+        if self.incremental:
+            self.existing_mappings = [m for m in self.stored_mappings if mapping_key(m) not in self.succeeded]
+        self.watermark = self.load_watermark()
+
+        nothing_new = not self.split_new("clue", self.clue_memory)[0] and not self.split_new("episodic", self.episodic_memory)[0]
+        if self.incremental and nothing_new and os.path.exists(self.mapping_path):
+            print("[MapperBot] No new clues or episodic memory since the last mapping; carrying the mappings forward.")
+            self.prompt_stats = {
+                "clues": f"0/{len(self.clue_memory or [])}",
+                "episodic": f"0/{len(self.episodic_memory or [])}",
+                "prompt_tokens": 0,
+                "full_dump_tokens": self.full_dump_tokens(),
+            }
+            self.mapping = self.existing_mappings
+            self.save_mappings()
+            return self.mapping
 
-        # ✅ Save mapping memory in overwrite mode
-        mapping_path = os.path.join(self.memory_path, "mapping_memory.json")
-        try:
-            with open(mapping_path, "w", encoding="utf-8") as f:
-                json.dump(self.mapping, f, indent=2, ensure_ascii=False)
-            print("[✅] MapperBot: Saved mapping information anew.")
-        except Exception as e:
-            print(f"[❌] MapperBot: Failed to save mapping - {e}")
-
-        return self.mapping
\ No newline at end of file
+        self.make_prompt()
+        result = self.execute_action()
+        if result is None or any(isinstance(m, dict) and "error" in m for m in result):
+            # The watermark is not advanced, so the same material is sent next run
+            print("[❌] MapperBot: Keeping the existing mappings.")
+            self.mapping = self.existing_mappings
+            return self.mapping
+
+        self.mapping = self.merge_mappings(result)
+        self.save_mappings()
+        if self.incremental:
+            self.save_watermark()
+        return self.mapping
@@ -1,7 +1,23 @@
 from .api_caller import (
-    api_caller
+    api_caller,
+    async_api_caller
+)
+from .metering import (
+    caller_scope,
+    get_meter,
+    metered
+)
+from .streaming import (
+    TaggedPayload,
+    stream_tagged
 )
 
 __all__ = [
-    "api_caller"
+    "api_caller",
+    "async_api_caller",
+    "TaggedPayload",
+    "stream_tagged",
+    "caller_scope",
+    "get_meter",
+    "metered"
 ]
\ No newline at end of file
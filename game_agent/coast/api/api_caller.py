@@ -1,8 +1,73 @@
-from api.serving import anthropic_completion, openai_completion, gemini_completion
+from api.serving import (
+    anthropic_completion, openai_completion, gemini_completion,
+    async_anthropic_completion, async_openai_completion, async_gemini_completion,
+)
+from api.rate_limit import estimate_tokens, get_rate_limiter
+from api.response_cache import cache_key, get_response_cache
+
+COMPLETIONS = {
+    "anthropic": anthropic_completion,
+    "openai": openai_completion,
+    "gemini": gemini_completion,
+}
+
+ASYNC_COMPLETIONS = {
+    "anthropic": async_anthropic_completion,
+    "openai": async_openai_completion,
+    "gemini": async_gemini_completion,
+}
+
+def _normalize_images(base64_images):
+    if isinstance(base64_images, str):
+        base64_images = [base64_images]
+    elif base64_images is None:
+        base64_images = []
+    elif not isinstance(base64_images, list):
+        raise TypeError("base64_images must be a base64 string, a list of strings, or None.")
+
+    if not all(isinstance(img, str) for img in base64_images):
+        raise ValueError("Each item in base64_images must be a string.")
+    return base64_images
+
+def _completion(completions, api_provider):
+    if api_provider not in completions:
+        raise NotImplementedError(f"Unsupported API provider: '{api_provider}'")
+    return completions[api_provider]
+
+# Providers whose failures are returned as None (once retries run out) instead of raised
+NONE_ON_ERROR = {"gemini"}
+
+def _give_up(api_provider, error):
+    if api_provider not in NONE_ON_ERROR:
+        raise error
+    print(f"Error: {error}")
+    return None
+
+def _limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts):
+    try:
+        return get_rate_limiter().call(
+            api_provider, model_name,
+            lambda: completion(system_prompt, model_name, base64_images, move_prompts),
+            tokens=estimate_tokens(system_prompt + move_prompts, len(base64_images)),
+        )
+    except Exception as e:
+        return _give_up(api_provider, e)
+
+async def _async_limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts):
+    try:
+        return await get_rate_limiter().acall(
+            api_provider, model_name,
+            lambda: completion(system_prompt, model_name, base64_images, move_prompts),
+            tokens=estimate_tokens(system_prompt + move_prompts, len(base64_images)),
+        )
+    except Exception as e:
+        return _give_up(api_provider, e)
 
 def api_caller(api_provider, system_prompt, model_name, move_prompts, base64_images=None):
     """
     Unified API caller for multiple model providers.
+    Calls go through the shared rate limiter, and responses are served from
+    the on-disk response cache when LLM_CACHE is enabled.
     
     Parameters:
         - api_provider (str): "anthropic", "openai", or "gemini"
@@ -16,25 +81,36 @@ def api_caller(api_provider, system_prompt, model_name, move_prompts, base64_ima
     """
 
     # --- Normalize image input ---
-    if isinstance(base64_images, str):
-        base64_images = [base64_images]
-    elif base64_images is None:
-        base64_images = []
-    elif not isinstance(base64_images, list):
-        raise TypeError("base64_images must be a base64 string, a list of strings, or None.")
-
-    if not all(isinstance(img, str) for img in base64_images):
-        raise ValueError("Each item in base64_images must be a string.")
+    base64_images = _normalize_images(base64_images)
 
     # --- Dispatch based on provider ---
-    if api_provider == "anthropic":
-        return anthropic_completion(system_prompt, model_name, base64_images, move_prompts)
+    completion = _completion(COMPLETIONS, api_provider)
+    cache = get_response_cache()
+    if not cache.cacheable(model_name):
+        return _limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts)
 
-    elif api_provider == "openai":
-        return openai_completion(system_prompt, model_name, base64_images, move_prompts)
+    key = cache_key(api_provider, model_name, system_prompt, move_prompts, base64_images)
+    response = cache.get(key)
+    if response is None:
+        response = _limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts)
+        cache.put(key, response, api_provider, model_name)
+    return response
+
+async def async_api_caller(api_provider, system_prompt, model_name, move_prompts, base64_images=None):
+    """
+    Awaitable api_caller for use inside async agent code, so a model call
+    does not block the event loop. Same parameters, return value and cache.
+    """
+    base64_images = _normalize_images(base64_images)
 
-    elif api_provider == "gemini":
-        return gemini_completion(system_prompt, model_name, base64_images, move_prompts)
+    completion = _completion(ASYNC_COMPLETIONS, api_provider)
+    cache = get_response_cache()
+    if not cache.cacheable(model_name):
+        return await _async_limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts)
 
-    else:
-        raise NotImplementedError(f"Unsupported API provider: '{api_provider}'")
\ No newline at end of file
+    key = cache_key(api_provider, model_name, system_prompt, move_prompts, base64_images)
+    response = cache.get(key)
+    if response is None:
+        response = await _async_limited_call(completion, api_provider, system_prompt, model_name, base64_images, move_prompts)
+        cache.put(key, response, api_provider, model_name)
+    return response
@@ -1,16 +1,17 @@
 import os
 import dotenv
-from openai import OpenAI
-import anthropic
-import google.generativeai as genai
+from tools import guess_media_type
+from .clients import get_client_registry
+from api.metering import get_meter
 
 # .env load
 dotenv.load_dotenv()
 
+# Mark Anthropic system prompts cacheable (LLM_PROMPT_CACHE=off to disable)
+PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "on").lower() != "off"
+
 ## Use Image
-def openai_completion(system_prompt, model_name, base64_images, prompt):
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
+def _openai_request(system_prompt, model_name, base64_images, prompt):
     # Message
     messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": []}]
 
@@ -19,31 +20,49 @@ def openai_completion(system_prompt, model_name, base64_images, prompt):
         for base64_image in base64_images:
             messages[1]["content"].append({
                 "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{base64_image}"},
+                "image_url": {"url": f"data:{guess_media_type(base64_image)};base64,{base64_image}"},
             })
     
     # adding text prompt
     messages[1]["content"].append({"type": "text", "text": prompt})
     
     if model_name == "o4-mini-2025-04-16":
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            max_completion_tokens=3000,
-        )
-    else:
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            temperature=0,
-            max_tokens=1024,
+        return dict(model=model_name, messages=messages, max_completion_tokens=3000)
+    return dict(model=model_name, messages=messages, temperature=0, max_tokens=1024)
+
+def openai_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().openai()
+    with get_meter().measure("openai", model_name, caller="api_caller", images=len(base64_images)) as call:
+        response = client.chat.completions.create(**_openai_request(system_prompt, model_name, base64_images, prompt))
+        call.usage = response.usage
+    return response.choices[0].message.content
+
+def openai_stream(system_prompt, model_name, base64_images, prompt):
+    """Yields the response text as it is generated. Closing the generator closes the connection."""
+    client = get_client_registry().openai()
+    with get_meter().measure("openai", model_name, caller="api_caller", images=len(base64_images)) as call:
+        stream = client.chat.completions.create(
+            **_openai_request(system_prompt, model_name, base64_images, prompt),
+            stream=True,
+            stream_options={"include_usage": True},
         )
-        
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    call.usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+async def async_openai_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().async_openai()
+    with get_meter().measure("openai", model_name, caller="api_caller", images=len(base64_images)) as call:
+        response = await client.chat.completions.create(**_openai_request(system_prompt, model_name, base64_images, prompt))
+        call.usage = response.usage
     return response.choices[0].message.content
 
-def anthropic_completion(system_prompt, model_name, base64_images, prompt):
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    
+def _anthropic_request(system_prompt, model_name, base64_images, prompt):
     user_content = []
     
     # adding aditional image
@@ -53,7 +72,7 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
+                    "media_type": guess_media_type(base64_image),
                     "data": base64_image,
                 }
             })
@@ -64,7 +83,12 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
         "text": prompt
     })
 
-    with client.messages.stream(
+    if system_prompt and PROMPT_CACHE:
+        # The system prompt is the stable part across calls; later calls with
+        # the same prefix read it from Anthropic's prompt cache
+        system_prompt = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+    return dict(
         max_tokens=2048,
         system=system_prompt, 
         messages=[
@@ -75,17 +99,51 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
         ],
         temperature=0,
         model=model_name,
-    ) as stream:
+    )
+
+def anthropic_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().anthropic()
+
+    with get_meter().measure("anthropic", model_name, caller="api_caller", images=len(base64_images)) as call, \
+            client.messages.stream(**_anthropic_request(system_prompt, model_name, base64_images, prompt)) as stream:
         partial_chunks = []
         for chunk in stream.text_stream:
             partial_chunks.append(chunk)
+        call.usage = stream.get_final_message().usage
     
     return "".join(partial_chunks)
 
-def gemini_completion(system_prompt, model_name, base64_images, prompt):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel(model_name=model_name)
+def _snapshot_usage(stream):
+    try:
+        return stream.current_message_snapshot.usage
+    except Exception:  # no message_start received yet
+        return None
+
+def anthropic_stream(system_prompt, model_name, base64_images, prompt):
+    """Yields the response text as it is generated. Closing the generator closes the connection."""
+    client = get_client_registry().anthropic()
+
+    with get_meter().measure("anthropic", model_name, caller="api_caller", images=len(base64_images)) as call, \
+            client.messages.stream(**_anthropic_request(system_prompt, model_name, base64_images, prompt)) as stream:
+        try:
+            yield from stream.text_stream
+        finally:
+            # Usage so far, also when the caller cancelled the stream
+            call.usage = _snapshot_usage(stream)
+
+async def async_anthropic_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().async_anthropic()
+
+    with get_meter().measure("anthropic", model_name, caller="api_caller", images=len(base64_images)) as call:
+        async with client.messages.stream(**_anthropic_request(system_prompt, model_name, base64_images, prompt)) as stream:
+            partial_chunks = []
+            async for chunk in stream.text_stream:
+                partial_chunks.append(chunk)
+            call.usage = (await stream.get_final_message()).usage
+
+    return "".join(partial_chunks)
 
+def _gemini_messages(system_prompt, base64_images, prompt):
     # message
     messages = [
         {"role": "system", "text": system_prompt}
@@ -95,16 +153,38 @@ def gemini_completion(system_prompt, model_name, base64_images, prompt):
     if base64_images:
         for base64_image in base64_images:
             messages.append({
-                "mime_type": "image/png",
+                "mime_type": guess_media_type(base64_image),
                 "data": base64_image,
             })
     
     # adding text prompt
     messages.append(prompt)
+    return messages
+
+def gemini_completion(system_prompt, model_name, base64_images, prompt):
+    model = get_client_registry().gemini(model_name)
     
-    try:
-        response = model.generate_content(messages)
+    with get_meter().measure("gemini", model_name, caller="api_caller", images=len(base64_images)) as call:
+        # Errors propagate so the rate limiter can retry them; api_caller turns them into None
+        response = model.generate_content(_gemini_messages(system_prompt, base64_images, prompt))
+        call.usage = response.usage_metadata
+        return response.text
+
+def gemini_stream(system_prompt, model_name, base64_images, prompt):
+    """Yields the response text as it is generated."""
+    model = get_client_registry().gemini(model_name)
+    with get_meter().measure("gemini", model_name, caller="api_caller", images=len(base64_images)) as call:
+        response = model.generate_content(_gemini_messages(system_prompt, base64_images, prompt), stream=True)
+        for chunk in response:
+            call.usage = chunk.usage_metadata
+            if chunk.text:
+                yield chunk.text
+
+async def async_gemini_completion(system_prompt, model_name, base64_images, prompt):
+    model = get_client_registry().gemini(model_name)
+
+    with get_meter().measure("gemini", model_name, caller="api_caller", images=len(base64_images)) as call:
+        # Errors propagate so the rate limiter can retry them; api_caller turns them into None
+        response = await model.generate_content_async(_gemini_messages(system_prompt, base64_images, prompt))
+        call.usage = response.usage_metadata
         return response.text
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
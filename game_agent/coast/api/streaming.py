@@ -0,0 +1,153 @@
+"""
+Streaming completions parsed on the fly for <RESPO>...</RESPO> style answers.
+
+A payload is handed to the caller as soon as its closing tag arrives, and
+the rest of the generation (often reasoning written after the answer) is
+cancelled by closing the stream, which saves both the wait and the output
+tokens.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from api.api_caller import _normalize_images
+from api.rate_limit import estimate_tokens, get_rate_limiter
+from api.response_cache import cache_key, get_response_cache
+from api.serving import anthropic_stream, gemini_stream, openai_stream
+
+STREAMS = {
+    "anthropic": anthropic_stream,
+    "openai": openai_stream,
+    "gemini": gemini_stream,
+}
+
+
+@dataclass
+class TaggedPayload:
+    """
+    - text: content between the tags, stripped
+    - data: text parsed as JSON, or None if it did not parse
+    - error: the JSON error message when data is None
+    """
+
+    text: str
+    data: Any = None
+    error: str | None = None
+
+
+def parse_tagged_json(text: str) -> TaggedPayload:
+    # Models often escape the JSON inside the tags
+    content = text.replace("\\n", "\n").replace('\\"', '"').replace("\\'", "'")
+    try:
+        return TaggedPayload(text=text, data=json.loads(content))
+    except json.JSONDecodeError as e:
+        return TaggedPayload(text=text, error=str(e))
+
+
+class TagStreamParser:
+    """Finds complete <tag>...</tag> blocks in text that arrives in arbitrary chunks."""
+
+    def __init__(self, tag: str = "RESPO"):
+        self.open_tag, self.close_tag = f"<{tag}>", f"</{tag}>"
+        self.buffer = ""
+        self._scanned = 0  # buffer offset already searched for the closing tag
+
+    def feed(self, chunk: str) -> list[str]:
+        """Adds a chunk and returns the contents of the blocks it completed."""
+        self.buffer += chunk
+        payloads = []
+        while True:
+            start = self.buffer.find(self.open_tag)
+            if start < 0:
+                # Keep only what could be the beginning of a split opening tag
+                self.buffer = self.buffer[-(len(self.open_tag) - 1):]
+                self._scanned = 0
+                return payloads
+
+            body = start + len(self.open_tag)
+            end = self.buffer.find(self.close_tag, max(body, self._scanned - len(self.close_tag) + 1))
+            if end < 0:
+                self.buffer = self.buffer[start:]
+                self._scanned = len(self.buffer)
+                return payloads
+
+            payloads.append(self.buffer[body:end].strip())
+            self.buffer = self.buffer[end + len(self.close_tag):]
+            self._scanned = 0
+
+
+def stream_tagged(
+    api_provider,
+    system_prompt,
+    model_name,
+    move_prompts,
+    base64_images=None,
+    tag: str = "RESPO",
+    max_payloads: int | None = 1,
+    on_text: Callable[[str], None] | None = None,
+) -> Iterator[TaggedPayload]:
+    """
+    Streams a completion and yields a TaggedPayload for every <tag> block as
+    soon as it closes. After max_payloads blocks the generation is cancelled;
+    None reads the stream to the end. on_text receives every chunk as it
+    arrives, e.g. for live printing. Closing the generator early also
+    cancels the generation.
+
+    Goes through the same rate limiter and response cache as api_caller. The
+    cache entry holds the text up to the cancellation point, so it is kept
+    apart from api_caller's entries for the same request.
+    """
+    base64_images = _normalize_images(base64_images)
+    if api_provider not in STREAMS:
+        raise NotImplementedError(f"Unsupported API provider: '{api_provider}'")
+    parser = TagStreamParser(tag)
+    emitted = 0
+
+    cache = get_response_cache()
+    key = None
+    if cache.cacheable(model_name):
+        key = cache_key(api_provider, model_name, system_prompt, f"{move_prompts}\0stream:{tag}", base64_images)
+        cached = cache.get(key)
+        if cached is not None:
+            if on_text:
+                on_text(cached)
+            for text in parser.feed(cached)[:max_payloads]:
+                yield parse_tagged_json(text)
+            return
+
+    def open_stream():
+        # Pull the first chunk so connection and rate-limit errors are retried here
+        chunks = STREAMS[api_provider](system_prompt, model_name, base64_images, move_prompts)
+        return next(chunks, ""), chunks
+
+    first, chunks = get_rate_limiter().call(
+        api_provider, model_name, open_stream,
+        tokens=estimate_tokens(system_prompt + move_prompts, len(base64_images)),
+    )
+
+    received = []
+    finished = False
+    try:
+        for chunk in _prepend(first, chunks):
+            received.append(chunk)
+            if on_text:
+                on_text(chunk)
+            for text in parser.feed(chunk):
+                emitted += 1
+                done = max_payloads is not None and emitted >= max_payloads
+                finished = finished or done
+                yield parse_tagged_json(text)
+                if done:
+                    return
+        finished = True
+    finally:
+        chunks.close()  # cancels the remaining generation
+        if finished and key is not None:
+            cache.put(key, "".join(received), api_provider, model_name)
+
+
+def _prepend(first, rest):
+    if first:
+        yield first
+    yield from rest
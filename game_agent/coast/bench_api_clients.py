@@ -0,0 +1,100 @@
+"""
+Benchmarks per-call latency of the provider clients.
+
+Compares the previous path (a new OpenAI client, and so a new connection
+pool, for every call) with the shared client from ClientRegistry, against a
+local HTTP server that answers every request with a canned chat completion.
+Loopback has no DNS or TLS, so real endpoints gain more than shown here.
+
+Usage (from game_agent/coast):
+    python bench_api_clients.py --calls 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import OpenAI
+
+from api.serving.clients import ClientRegistry
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "bench",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "<RESPO>ok</RESPO>"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def call(client):
+    client.chat.completions.create(
+        model="bench",
+        messages=[{"role": "user", "content": "ping"}],
+        max_tokens=1,
+    )
+
+
+def time_calls(get_client, calls):
+    call(get_client())  # warm-up
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call(get_client())
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, statistics.quantiles(times, n=20)[-1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    def fresh_client():
+        return OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=base_url)
+
+    registry = ClientRegistry()
+
+    print(f"{'client':<18} {'p50 ms':>8} {'p95 ms':>8}")
+    fresh = time_calls(fresh_client, args.calls)
+    print(f"{'new per call':<18} {fresh[0]:>8.2f} {fresh[1]:>8.2f}")
+    pooled = time_calls(registry.openai, args.calls)
+    print(f"{'shared registry':<18} {pooled[0]:>8.2f} {pooled[1]:>8.2f}")
+    print(f"p50 speedup: {fresh[0] / pooled[0]:.1f}x")
+
+    registry.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
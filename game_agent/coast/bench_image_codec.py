@@ -0,0 +1,76 @@
+"""
+Benchmarks image payload settings on recorded game screenshots.
+
+Reports encode time and payload size per (codec, quality, max_edge) so the
+image_codec / image_quality / image_max_edge values in config.yaml can be
+picked per run.
+
+Usage (from game_agent/coast):
+    python bench_image_codec.py --images "../../evaluator/screenshots/*/*.png"
+"""
+
+import argparse
+import base64
+import glob
+import statistics
+import time
+
+from PIL import Image
+
+from tools.image_codec import ImageCodec
+
+DEFAULT_SETTINGS = [
+    ("png", 85, None),
+    ("png", 85, 1366),
+    ("jpeg", 90, None),
+    ("jpeg", 75, None),
+    ("jpeg", 75, 1366),
+    ("webp", 80, None),
+    ("webp", 80, 1366),
+]
+
+
+def parse_setting(value):
+    """Parses "codec:quality[:max_edge]", e.g. "jpeg:75:1366"."""
+    parts = value.split(":")
+    codec, quality = parts[0], int(parts[1]) if len(parts) > 1 else 85
+    max_edge = int(parts[2]) if len(parts) > 2 and parts[2] else None
+    return codec, quality, max_edge
+
+
+def bench(images, codec, repeat):
+    times, sizes = [], []
+    for image in images:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            payload = base64.b64encode(codec.encode(image))
+            times.append(time.perf_counter() - start)
+        sizes.append(len(payload))
+    return statistics.median(times) * 1000, statistics.mean(sizes) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", default="../../evaluator/screenshots/*/*.png")
+    parser.add_argument("--setting", action="append", type=parse_setting,
+                        help="codec:quality[:max_edge]; repeatable. Defaults to a built-in grid.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        raise SystemExit(f"No images match {args.images}")
+    images = [Image.open(path).convert("RGB") for path in paths]
+    print(f"{len(images)} screenshots, e.g. {images[0].size[0]}x{images[0].size[1]}\n")
+
+    print(f"{'codec':<6} {'quality':>7} {'max_edge':>8} {'encode ms':>10} {'payload KiB':>12} {'vs png':>7}")
+    baseline = None
+    for codec_name, quality, max_edge in args.setting or DEFAULT_SETTINGS:
+        codec = ImageCodec(codec_name, quality, max_edge)
+        ms, kib = bench(images, codec, args.repeat)
+        baseline = baseline or kib
+        print(f"{codec_name:<6} {quality:>7} {str(max_edge or '-'):>8} {ms:>10.1f} {kib:>12.1f} {kib / baseline:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmarks the computer-use screenshot downscale.
+
+Compares the previous path (PIL LANCZOS resize of the captured image) with
+ScreenGrabber's path (cv2 INTER_AREA on a numpy view of the raw BGRA buffer,
+then RGB conversion) in wall time per frame, for 1920x1080 and 2560x1440
+screens scaled to the API resolution the tool picks for them.
+
+Usage (from game_agent/coast):
+    python bench_screenshot_resize.py --images "../../evaluator/screenshots/*/*.png"
+"""
+
+import argparse
+import glob
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from gui_agent.claude_cua.tools.screen_grabber import resize_bgra
+
+# screen size -> API resolution picked by the computer tool
+CASES = [
+    ((1920, 1080), (1366, 768)),
+    ((2560, 1440), (1366, 768)),
+]
+
+
+def load_sources(pattern, size, limit):
+    """Recorded screenshots scaled up to the screen size, as (PIL RGB, raw BGRA bytes)."""
+    paths = sorted(glob.glob(pattern))[:limit]
+    if paths:
+        images = [Image.open(path).convert("RGB").resize(size, Image.BICUBIC) for path in paths]
+    else:
+        rng = np.random.default_rng(0)
+        images = [Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))]
+
+    sources = []
+    for image in images:
+        rgba = np.asarray(image.convert("RGBA"))
+        bgra = rgba[..., [2, 1, 0, 3]].tobytes()
+        sources.append((image, bgra))
+    return sources
+
+
+def time_per_frame(fn, sources, repeat):
+    times = []
+    for source in sources:
+        fn(source)  # warm-up
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(source)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", default="../../evaluator/screenshots/*/*.png")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    def pil_lanczos(source, target):
+        return source[0].resize(target, Image.LANCZOS)
+
+    def cv2_area(source, target, size):
+        pixels = np.frombuffer(source[1], dtype=np.uint8).reshape(size[1], size[0], 4)
+        return Image.fromarray(resize_bgra(pixels, target))
+
+    print(f"{'screen':<10} {'target':<9} {'PIL LANCZOS ms':>15} {'cv2 INTER_AREA ms':>18} {'speedup':>8}")
+    for size, target in CASES:
+        sources = load_sources(args.images, size, args.limit)
+        old = time_per_frame(lambda s: pil_lanczos(s, target), sources, args.repeat)
+        new = time_per_frame(lambda s: cv2_area(s, target, size), sources, args.repeat)
+        print(f"{size[0]}x{size[1]:<5} {target[0]}x{target[1]:<4} {old:>15.2f} {new:>18.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -45,7 +45,7 @@ def run_mapper(config_path, game_name):
     mapper = MapperBot(config_path=config_path, game_name=game_name)
     result = mapper.run()
     print("✅ Mapper completed.\n")
-    return mapper.memory_path
+    return mapper.memory_path, mapper.prompt_stats
 
 
 def load_mapping_data(mapping_path):
@@ -110,6 +110,7 @@ def main(config_path="config.yaml", games_path="./json/game_prompt.json"):
     total_seeker = 0
     total_solver = 0
     iteration = 0
+    mapper_prompt_stats = []
 
     while iteration < MAX_ITER:
         print(f"\n🔁 [Iteration {iteration + 1}] Starting")
@@ -127,7 +128,9 @@ def main(config_path="config.yaml", games_path="./json/game_prompt.json"):
             break
 
         # 2. Mapping
-        memory_path = run_mapper(config_path, game_name)
+        memory_path, prompt_stats = run_mapper(config_path, game_name)
+        if prompt_stats:
+            mapper_prompt_stats.append((iteration, prompt_stats))
 
         # 3. Load Mapping Results
         mapping_file = os.path.join(memory_path, "mapping_memory.json")
@@ -169,6 +172,14 @@ def main(config_path="config.yaml", games_path="./json/game_prompt.json"):
     print(f"🔍 ClueSeeker total actions: {total_seeker}")
     print(f"🛠️ SolverBot total actions: {total_solver}")
     print(f"📦 Total cumulative actions: {total_actions}/{max_actions}")
+    if mapper_prompt_stats:
+        print("🔗 MapperBot prompt size per iteration (selected vs full memory dump, ~tokens)")
+        for it, stats in mapper_prompt_stats:
+            full, sent = stats["full_dump_tokens"], stats["prompt_tokens"]
+            print(
+                f"   [{it}] {sent} vs {full} ({1 - sent / full:.0%} smaller), "
+                f"clues {stats['clues']}, episodic {stats['episodic']}"
+            )
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ import platform
 from collections.abc import Callable
 from datetime import datetime
 from enum import StrEnum
+from functools import lru_cache
 from typing import Any, cast
 
 import httpx
@@ -34,6 +35,9 @@ from .tools import (
     ToolResult,
     ToolVersion,
 )
+from .tools.image_codec import guess_media_type
+from .tools.frame_dedup import FrameDeduplicator
+from api.metering import count_images, get_meter
 
 PROMPT_CACHING_BETA_FLAG = "prompt-caching-2024-07-31"
 
@@ -42,6 +46,22 @@ class APIProvider(StrEnum):
     BEDROCK = "bedrock"
     VERTEX = "vertex"
 
+
+def make_client(provider: APIProvider, api_key: str) -> Anthropic | AnthropicVertex | AnthropicBedrock:
+    if provider == APIProvider.ANTHROPIC:
+        return Anthropic(api_key=api_key, max_retries=4)
+    elif provider == APIProvider.VERTEX:
+        return AnthropicVertex()
+    elif provider == APIProvider.BEDROCK:
+        return AnthropicBedrock()
+    raise ValueError(f"Unsupported API provider: '{provider}'")
+
+
+@lru_cache(maxsize=None)
+def get_shared_client(provider: APIProvider, api_key: str) -> Anthropic | AnthropicVertex | AnthropicBedrock:
+    """One client, and so one connection pool, per provider and key for the whole process."""
+    return make_client(provider, api_key)
+
 SYSTEM_PROMPT = f"""<SYSTEM_CAPABILITY>
 * You are an autonomous GUI Agent operating in interactive software environments, including games, applications, and dynamic interfaces.
 * You perceive and interpret on-screen elements, formulate short-term objectives, and execute precise actions to progress toward broader goals.
@@ -78,6 +98,7 @@ async def sampling_loop(
     tool_output_callback: Callable[[ToolResult, str], None],
     api_response_callback: Callable[[httpx.Request, httpx.Response | object | None, Exception | None], None],
     api_key: str,
+    client: Anthropic | AnthropicVertex | AnthropicBedrock | None = None,
     only_n_most_recent_images: int | None = None,
     max_tokens: int = 4096,
     tool_version: ToolVersion,
@@ -87,11 +108,31 @@ async def sampling_loop(
 ):
     tool_group = TOOL_GROUPS_BY_VERSION[tool_version]
     tool_collection = ToolCollection(*(ToolCls() for ToolCls in tool_group.tools))
+    # Consecutive identical screenshots are sent once, then as "(unchanged xN)"
+    frame_dedup = FrameDeduplicator()
     system = BetaTextBlockParam(
         type="text",
         text=f"{SYSTEM_PROMPT}{' ' + system_prompt_suffix if system_prompt_suffix else ''}",
     )
 
+    # Fixed for the whole session: built once instead of on every turn
+    tool_params = tool_collection.to_params()
+    betas = [tool_group.beta_flag] if tool_group.beta_flag else []
+    if token_efficient_tools_beta:
+        betas.append("token-efficient-tools-2025-02-19")
+    if client is None:
+        client = make_client(provider, api_key)
+    enable_prompt_caching = provider == APIProvider.ANTHROPIC
+    if enable_prompt_caching:
+        betas.append(PROMPT_CACHING_BETA_FLAG)
+        # Use type ignore to bypass TypedDict check until SDK types are updated
+        system["cache_control"] = {"type": "ephemeral"}  # type: ignore
+    extra_body = {}
+    if thinking_budget:
+        extra_body = {
+            "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
+        }
+
     while True:
         if tool_state.get("action_limit_reached", False):
             print("[LOOP EXIT] Action limit reached. Stopping sampling loop.")
@@ -102,24 +143,11 @@ async def sampling_loop(
         # 마지막 턴인지 확인하는 플래그 추가
         is_final_turn = current_count + 1 == max_actions
         
-        enable_prompt_caching = False
-        betas = [tool_group.beta_flag] if tool_group.beta_flag else []
-        if token_efficient_tools_beta:
-            betas.append("token-efficient-tools-2025-02-19")
         image_truncation_threshold = only_n_most_recent_images or 0
-        if provider == APIProvider.ANTHROPIC:
-            client = Anthropic(api_key=api_key, max_retries=4)
-            enable_prompt_caching = True
-        elif provider == APIProvider.VERTEX:
-            client = AnthropicVertex()
-        elif provider == APIProvider.BEDROCK:
-            client = AnthropicBedrock()
 
         if enable_prompt_caching:
-            betas.append(PROMPT_CACHING_BETA_FLAG)
             _inject_prompt_caching(messages)
             only_n_most_recent_images = 0
-            system["cache_control"] = {"type": "ephemeral"}  # type: ignore
 
         if only_n_most_recent_images:
             _maybe_filter_to_n_most_recent_images(
@@ -127,11 +155,6 @@ async def sampling_loop(
                 only_n_most_recent_images,
                 min_removal_threshold=image_truncation_threshold,
             )
-        extra_body = {}
-        if thinking_budget:
-            extra_body = {
-                "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
-            }
 
         # 메시지 복사본 생성 (마지막 턴인 경우 추가 요약 요청 메시지 추가)
         api_messages = messages.copy()
@@ -149,15 +172,17 @@ async def sampling_loop(
             print("[DEBUG] Added final summary request message for last turn")
 
         try:
-            raw_response = client.beta.messages.with_raw_response.create(
-                max_tokens=max_tokens,
-                messages=api_messages,  # 수정된 메시지 리스트 사용
-                model=model,
-                system=[system],
-                tools=tool_collection.to_params(),
-                betas=betas,
-                extra_body=extra_body,
-            )
+            with get_meter().measure("anthropic", model, caller="claude_cua", images=count_images(api_messages)) as call:
+                raw_response = client.beta.messages.with_raw_response.create(
+                    max_tokens=max_tokens,
+                    messages=api_messages,  # 수정된 메시지 리스트 사용
+                    model=model,
+                    system=[system],
+                    tools=tool_params,
+                    betas=betas,
+                    extra_body=extra_body,
+                )
+                call.usage = raw_response.parse().usage
         except (APIStatusError, APIResponseValidationError) as e:
             api_response_callback(e.request, e.response, e)
             return messages
@@ -181,9 +206,9 @@ async def sampling_loop(
                     name=content_block["name"],
                     tool_input=cast(dict[str, Any], content_block["input"]),
                 )
-                tool_result_content.append(
-                    _make_api_tool_result(result, content_block["id"])
-                )
+                api_tool_result = _make_api_tool_result(result, content_block["id"])
+                _collapse_unchanged_image(api_tool_result, frame_dedup)
+                tool_result_content.append(api_tool_result)
                 tool_output_callback(result, content_block["id"])
 
         if not tool_result_content:
@@ -313,7 +338,7 @@ def _make_api_tool_result(
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": "image/png",
+                        "media_type": guess_media_type(result.base64_image),
                         "data": result.base64_image,
                     },
                 }
@@ -326,6 +351,30 @@ def _make_api_tool_result(
     }
 
 
+def _collapse_unchanged_image(tool_result: BetaToolResultBlockParam, frame_dedup: FrameDeduplicator):
+    """
+    Replaces the screenshot of a tool result with an "(unchanged xN)" note when it
+    is byte-identical to the previous screenshot, which the model already has.
+    Images sent with a text (delta-mode crops) are never collapsed.
+    """
+    content = tool_result.get("content")
+    if not isinstance(content, list):
+        return
+    if any(isinstance(block, dict) and block.get("type") == "text" for block in content):
+        if any(isinstance(block, dict) and block.get("type") == "image" for block in content):
+            frame_dedup.reset()
+        return
+    for i, block in enumerate(content):
+        if isinstance(block, dict) and block.get("type") == "image":
+            repeats = frame_dedup.observe_exact(block["source"]["data"])
+            if repeats > 1:
+                content[i] = {
+                    "type": "text",
+                    "text": f"Screenshot identical to the previous one (unchanged x{repeats}).",
+                }
+            return
+
+
 def _maybe_prepend_system_tool_result(result: ToolResult, result_text: str):
     if result.system:
         result_text = f"<system>{result.system}</system>\n{result_text}"
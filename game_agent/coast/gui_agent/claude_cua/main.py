@@ -16,7 +16,7 @@ from anthropic.types.tool_use_block import ToolUseBlock
 from dotenv import load_dotenv
 from screeninfo import get_monitors
 
-from .loop import APIProvider, sampling_loop
+from .loop import APIProvider, get_shared_client, sampling_loop
 from .tools import ToolResult
 
 load_dotenv()
@@ -163,6 +163,7 @@ async def run_agent(initial_prompt: str, base_system_prompt: str = "", config_pa
                 tool_state=state["tools"],
                 api_response_callback=lambda *_: None,
                 api_key=state["api_key"],
+                client=get_shared_client(state["provider"], state["api_key"]),
                 only_n_most_recent_images=state["only_n_most_recent_images"],
                 tool_version=state["tool_version"],
                 thinking_budget=1024,
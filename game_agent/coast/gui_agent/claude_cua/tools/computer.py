@@ -13,7 +13,6 @@ from pathlib import Path
 from typing import Literal, TypedDict, cast, get_args
 from uuid import uuid4
 import io
-from PIL import Image
 
 # Import PyAutoGUI
 import pyautogui
@@ -25,6 +24,12 @@ from anthropic.types.beta import BetaToolComputerUse20241022Param, BetaToolUnion
 
 from .base import BaseAnthropicTool, ToolError, ToolResult
 from .run import run, get_temp_dir
+from .frame_writer import get_frame_writer
+from .image_codec import ImageCodec
+from .screen_grabber import ScreenGrabber
+from .change_detector import detect_change, crop
+from dataclasses import replace
+from PIL import Image
 
 # Create screenshots folder in current directory and set output path
 CURRENT_DIR = os.path.abspath(os.path.curdir)
@@ -125,7 +130,9 @@ class PyAutoGUIComputerTool:
     height: int
     display_num: int | None
 
-    _screenshot_delay = 0.5
+    # Upper bound and change threshold for the post-action settle wait
+    _settle_timeout = 2.0
+    _settle_threshold = 0.005
     _scaling_enabled = True
 
     @property
@@ -153,6 +160,9 @@ class PyAutoGUIComputerTool:
             self.height = int(os.getenv("HEIGHT"))
         
         assert self.width and self.height, "Could not determine screen resolution"
+
+        # Payload codec from IMAGE_CODEC / IMAGE_QUALITY; the size is fixed by coordinate scaling
+        self._image_codec = replace(ImageCodec.from_env(), max_edge=None)
         
         # Set display number (if available)
         if (display_num := os.getenv("DISPLAY_NUM")) is not None:
@@ -168,6 +178,17 @@ class PyAutoGUIComputerTool:
         print(f"Retina display: {self._is_retina}")
         print(f"Screen resolution: {self.width} x {self.height}")
 
+        # The scaling target and screenshot size are fixed for the lifetime of the tool
+        self._scaling_target = self._find_scaling_target()
+        self._grabber = ScreenGrabber(self._screenshot_size())
+
+        # Observation mode after actions: "full" screenshots, or "delta" (see observe())
+        self._observation_mode = os.getenv("OBSERVATION_MODE", "full")
+        self._full_frame_every = int(os.getenv("DELTA_FULL_EVERY", "5"))
+        self._large_change = float(os.getenv("DELTA_LARGE_CHANGE", "0.2"))
+        self._last_frame = None
+        self._deltas_since_full = 0
+
     async def __call__(
         self,
         *,
@@ -227,7 +248,7 @@ class PyAutoGUIComputerTool:
                 # Handle clicks with optional coordinates
                 if coordinate is not None:
                     x, y = self.validate_and_get_coordinates(coordinate)
-                    await self.mouse_move(x, y)
+                    pyautogui.moveTo(x, y)  # not observed: the click's observation covers it
                 return await self.mouse_click(action)
 
         raise ToolError(f"Invalid action: {action}")
@@ -245,7 +266,7 @@ class PyAutoGUIComputerTool:
     async def mouse_move(self, x: int, y: int) -> ToolResult:
         """Move mouse to the specified coordinates."""
         pyautogui.moveTo(x, y)
-        return await self.screenshot()
+        return await self.observe()
 
     async def mouse_drag(self, x: int, y: int) -> ToolResult:
         """Perform a drag operation from current position to specified coordinates."""
@@ -255,12 +276,12 @@ class PyAutoGUIComputerTool:
         # Perform drag
         pyautogui.dragTo(x, y, button='left')
         
-        return await self.screenshot()
+        return await self.observe()
 
     async def key_press(self, key: str) -> ToolResult:
         """Simulate key press."""
         pyautogui.press(key)
-        return await self.screenshot()
+        return await self.observe()
 
     async def type_text(self, text: str) -> ToolResult:
         """Simulate typing text."""
@@ -268,7 +289,7 @@ class PyAutoGUIComputerTool:
         for chunk in chunks(text, TYPING_GROUP_SIZE):
             pyautogui.write(chunk, interval=TYPING_DELAY_MS/1000)
             
-        return await self.screenshot()
+        return await self.observe()
 
     async def mouse_click(self, action: str) -> ToolResult:
         """Perform mouse click action."""
@@ -281,7 +302,7 @@ class PyAutoGUIComputerTool:
         else:
             pyautogui.click(button=button)
             
-        return await self.screenshot()
+        return await self.observe()
 
     async def get_cursor_position(self) -> ToolResult:
         """Get current cursor position."""
@@ -292,42 +313,64 @@ class PyAutoGUIComputerTool:
 
     async def screenshot(self) -> ToolResult:
         """Take a screenshot of the current screen."""
-        # Add a slight delay before taking the screenshot
-        await asyncio.sleep(self._screenshot_delay)
-        
+        # Wait for the screen to settle instead of a fixed delay
+        await self._grabber.wait_until_stable(self._settle_timeout, self._settle_threshold)
+
+        # Capture and downscale on the raw buffer to the size fixed at tool start
+        return self._full_frame_result(self._grabber.grab_array())
+
+    async def observe(self) -> ToolResult:
+        """
+        Observation returned after an action. In "delta" mode, compared with the
+        last frame the model received:
+        - nothing changed: a text result, no image
+        - a small region changed: the crop of that region and its coordinates
+        - a large change, or every DELTA_FULL_EVERY observations: a full frame
+        """
+        if self._observation_mode != "delta":
+            return await self.screenshot()
+
+        await self._grabber.wait_until_stable(self._settle_timeout, self._settle_threshold)
+        pixels = self._grabber.grab_array()
+        if self._last_frame is None or self._deltas_since_full >= self._full_frame_every:
+            return self._full_frame_result(pixels)
+
+        change = detect_change(self._last_frame, pixels, max_boxes=1)
+        if not change.changed:
+            self._deltas_since_full += 1
+            return ToolResult(output="No visible change on screen since the previous screenshot.")
+
+        left, top, width, height = change.boxes[0]
+        frame_height, frame_width = pixels.shape[:2]
+        if change.ratio >= self._large_change or width * height >= 0.5 * frame_width * frame_height:
+            return self._full_frame_result(pixels)
+
+        self._last_frame = pixels
+        self._deltas_since_full += 1
+        return self._encode_result(
+            crop(pixels, (left, top, width, height)),
+            output=(
+                f"Only part of the screen changed. The image shows the region at x={left}, y={top}, "
+                f"width={width}, height={height} in screenshot coordinates; the rest is unchanged."
+            ),
+        )
+
+    def _full_frame_result(self, pixels) -> ToolResult:
+        self._last_frame = pixels
+        self._deltas_since_full = 0
+        return self._encode_result(pixels)
+
+    def _encode_result(self, pixels, output: str | None = None) -> ToolResult:
         # Use screenshots directory in current folder
         output_dir = Path(OUTPUT_DIR)
         output_dir.mkdir(parents=True, exist_ok=True)
-        path = output_dir / f"screenshot_{uuid4().hex}.png"
-        
-        # Take screenshot with PyAutoGUI
-        screenshot = pyautogui.screenshot()
-        
-        # Handle Retina display
-        if self._scaling_enabled:
-            if self._is_retina:
-                # Scale Retina display to WXGA (maintain 16:10 ratio)
-                target_width, target_height = 1280, 800  # WXGA
-                screenshot = screenshot.resize((target_width, target_height), Image.LANCZOS)
-                print(f"Retina display detected: Scaling screenshot to {target_width}x{target_height}")
-            else:
-                # Maintain existing scaling logic
-                x, y = self.scale_coordinates(
-                    ScalingSource.COMPUTER, self.width, self.height
-                )
-                if x != self.width or y != self.height:
-                    screenshot = screenshot.resize((x, y), Image.LANCZOS)
-                    print(f"Standard display: Scaling screenshot to {x}x{y}")
-        
-        # Save screenshot
-        screenshot.save(path)
-        
-        if path.exists():
-            print(f"Screenshot saved to: {path}")
-            return ToolResult(
-                base64_image=base64.b64encode(path.read_bytes()).decode()
-            )
-        raise ToolError(f"Failed to take screenshot")
+        path = output_dir / f"screenshot_{uuid4().hex}{self._image_codec.extension}"
+
+        # Encode once in memory; the background writer persists the same bytes
+        data = self._image_codec.encode(Image.fromarray(pixels))
+        get_frame_writer().submit(path, data)
+
+        return ToolResult(output=output, base64_image=base64.b64encode(data).decode())
 
     def validate_and_get_coordinates(self, coordinate: tuple[int, int] | None = None):
         """Validate coordinates and scale them appropriately."""
@@ -338,47 +381,47 @@ class PyAutoGUIComputerTool:
 
         return self.scale_coordinates(ScalingSource.API, coordinate[0], coordinate[1])
 
-    def scale_coordinates(self, source: ScalingSource, x: int, y: int):
-        """Scale coordinates to target resolution if scaling is enabled."""
+    def _find_scaling_target(self) -> Resolution | None:
+        """Picks the API resolution the screen is scaled to, or None to keep it as is."""
         if not self._scaling_enabled:
-            return x, y
-        
-        # Handle Retina display
+            return None
+
+        # Scale Retina display to WXGA
         if self._is_retina:
-            # Scale Retina display to WXGA
-            target_dimension = MAX_SCALING_TARGETS["WXGA"]  # Fixed at 1280x800
-        else:
-            # Existing logic - find best matching target based on aspect ratio
-            ratio = self.width / self.height
-            target_dimension = None
-            for dimension in MAX_SCALING_TARGETS.values():
-                if abs(dimension["width"] / dimension["height"] - ratio) < 0.02:
-                    if dimension["width"] < self.width:
-                        target_dimension = dimension
-                        break
-        
+            return MAX_SCALING_TARGETS["WXGA"]
+
+        # Find best matching target based on aspect ratio
+        ratio = self.width / self.height
+        for dimension in MAX_SCALING_TARGETS.values():
+            if abs(dimension["width"] / dimension["height"] - ratio) < 0.02:
+                if dimension["width"] < self.width:
+                    return dimension
+        return None
+
+    def _screenshot_size(self) -> tuple[int, int] | None:
+        """Size screenshots are resized to, or None to send them at capture size."""
+        if self._scaling_target is None:
+            return None
+        return self._scaling_target["width"], self._scaling_target["height"]
+
+    def scale_coordinates(self, source: ScalingSource, x: int, y: int):
+        """Scale coordinates to target resolution if scaling is enabled."""
+        target_dimension = self._scaling_target
         if target_dimension is None:
             return x, y
-        
+
         # Calculate scaling factors
         x_scaling_factor = target_dimension["width"] / self.width
         y_scaling_factor = target_dimension["height"] / self.height
-        
+
         if source == ScalingSource.API:
             # Make sure coordinates are within bounds
             if x > target_dimension["width"] or y > target_dimension["height"]:
                 raise ToolError(f"Coordinates {x}, {y} are out of bounds")
             # Scale up to actual screen coordinates
-            scaled_x = round(x / x_scaling_factor)
-            scaled_y = round(y / y_scaling_factor)
-            print(f"Converting API coordinates {x},{y} to actual coordinates {scaled_x},{scaled_y}")
-            return scaled_x, scaled_y
-        else:
-            # Scale down to target resolution
-            scaled_x = round(x * x_scaling_factor)
-            scaled_y = round(y * y_scaling_factor)
-            print(f"Converting actual coordinates {x},{y} to API coordinates {scaled_x},{scaled_y}")
-            return scaled_x, scaled_y
+            return round(x / x_scaling_factor), round(y / y_scaling_factor)
+        # Scale down to target resolution
+        return round(x * x_scaling_factor), round(y * y_scaling_factor)
 
 
 class ComputerTool20241022(PyAutoGUIComputerTool, BaseAnthropicTool):
@@ -423,7 +466,7 @@ class ComputerTool20250124(PyAutoGUIComputerTool, BaseAnthropicTool):
             else:
                 pyautogui.mouseUp(button='left')
             
-            return await self.screenshot()
+            return await self.observe()
             
         if action == "scroll":
             if scroll_direction is None or scroll_direction not in get_args(ScrollDirection):
@@ -447,7 +490,7 @@ class ComputerTool20250124(PyAutoGUIComputerTool, BaseAnthropicTool):
             else:  # left or right
                 pyautogui.hscroll(clicks)
             
-            return await self.screenshot()
+            return await self.observe()
             
         if action in ("hold_key", "wait"):
             if duration is None or not isinstance(duration, (int, float)):
@@ -468,11 +511,11 @@ class ComputerTool20250124(PyAutoGUIComputerTool, BaseAnthropicTool):
                 # Release key
                 pyautogui.keyUp(text)
                 
-                return await self.screenshot()
+                return await self.observe()
 
             if action == "wait":
                 await asyncio.sleep(duration)
-                return await self.screenshot()
+                return await self.observe()
 
         if action in ("left_click", "right_click", "double_click", "triple_click", "middle_click"):
             # Move mouse first if coordinates provided
@@ -499,7 +542,7 @@ class ComputerTool20250124(PyAutoGUIComputerTool, BaseAnthropicTool):
             if key:
                 pyautogui.keyUp(key)
                 
-            return await self.screenshot()
+            return await self.observe()
 
         # Call parent method for actions not covered by extended functionality
         return await super().__call__(
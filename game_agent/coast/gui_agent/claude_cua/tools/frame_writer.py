@@ -0,0 +1,167 @@
+"""
+Bounded background writer that persists screenshots off the action critical path.
+"""
+
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+
+WritePolicy = Literal["block", "drop_newest", "drop_oldest"]
+
+
+def _write_file(path: str, data: bytes) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class FrameWriter:
+    """
+    Takes (path, bytes) jobs off a bounded queue and writes them on worker threads.
+
+    When the queue is full the policy decides what happens:
+    - "block": the caller waits for a free slot (backpressure)
+    - "drop_newest": the incoming frame is discarded
+    - "drop_oldest": the oldest queued frame is discarded to make room
+
+    With executor="process" the worker threads hand the file writes to a
+    process pool instead of writing them in-process.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        workers: int = 1,
+        policy: WritePolicy = "block",
+        executor: Literal["thread", "process"] = "thread",
+    ):
+        if policy not in ("block", "drop_newest", "drop_oldest"):
+            raise ValueError(f"Unknown write policy: {policy}")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+
+        self.policy = policy
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pool = ProcessPoolExecutor(max_workers=workers) if executor == "process" else None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"frame-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, path: str, data: bytes) -> bool:
+        """Queues a frame for writing. Returns False if it was dropped."""
+        if self._closed:
+            raise RuntimeError("FrameWriter is closed")
+
+        job = (str(path), data)
+        if self.policy == "block":
+            self._queue.put(job)
+            return True
+
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "drop_newest":
+            self._count("dropped")
+            return False
+
+        # drop_oldest: evict until the new frame fits
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(job)
+                return True
+            except queue.Full:
+                continue
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            path, data = job
+            try:
+                if self._pool is not None:
+                    self._pool.submit(_write_file, path, data).result()
+                else:
+                    _write_file(path, data)
+                self._count("written")
+            except Exception as e:
+                self._count("failed")
+                print(f"[FrameWriter] Failed to write {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued frame has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Writes the remaining frames and stops the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+
+_writer: FrameWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_frame_writer() -> FrameWriter:
+    """
+    Returns the process-wide FrameWriter, configured from the environment:
+    FRAME_WRITER_QUEUE, FRAME_WRITER_WORKERS, FRAME_WRITER_POLICY, FRAME_WRITER_EXECUTOR.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = FrameWriter(
+                max_queue=int(os.getenv("FRAME_WRITER_QUEUE", "64")),
+                workers=int(os.getenv("FRAME_WRITER_WORKERS", "1")),
+                policy=os.getenv("FRAME_WRITER_POLICY", "block"),
+                executor=os.getenv("FRAME_WRITER_EXECUTOR", "thread"),
+            )
+            atexit.register(_writer.close)
+        return _writer
@@ -4,7 +4,11 @@ from gui_agent.claude_cua import main as main_claude_cua
 from gui_agent.gui_grounding import agent_step as main_uground
 from gui_agent.gui_grounding import run_claude_gui_agent as main_claude_sonnet
 
-def execute_action(action_prompt, system_prompt=None, encoded_image=None, gui_model="gpt_operator", reasoning_model="gpt-4o", type=None):
+def execute_action(action_prompt, system_prompt=None, encoded_image=None, image_box=None, gui_model="gpt_operator", reasoning_model="gpt-4o", type=None):
+    """
+    image_box: (left, top, width, height) of encoded_image on screen, used to map
+    grounded coordinates back to screen coordinates. None means the full screen.
+    """
     if gui_model == "gpt_operator":
         return main_gpt_operator(
             user_prompt=action_prompt
@@ -23,13 +27,15 @@ def execute_action(action_prompt, system_prompt=None, encoded_image=None, gui_mo
             user_prompt=action_prompt,
             encoded_image=encoded_image,
             provider=api_provider,
-            model=reasoning_model
+            model=reasoning_model,
+            image_box=image_box
         ))
         
     elif gui_model == "claude_sonnet":
         return asyncio.run(main_claude_sonnet(
             user_prompt=action_prompt,
-            encoded_image=encoded_image
+            encoded_image=encoded_image,
+            image_box=image_box
         ))
     else:
         print(f"[ERROR] Unknown gui_model: {gui_model}")
@@ -11,6 +11,7 @@ from typing import Callable
 import os
 import time
 import base64
+from tools import get_frame_store
 from io import BytesIO
 from PIL import Image
 
@@ -41,9 +42,7 @@ class Agent:
         self.save_screenshots = save_screenshots
         self.screenshots_folder = screenshots_folder
         
-        # generate folder
-        if self.save_screenshots and not os.path.exists(self.screenshots_folder):
-            os.makedirs(self.screenshots_folder)
+        self.frame_store = get_frame_store(self.screenshots_folder) if self.save_screenshots else None
 
         if computer:
             self.tools += [
@@ -62,13 +61,9 @@ class Agent:
     def save_screenshot(self, screenshot_base64):
         """save screenshot"""
         try:
-            timestamp = int(time.time())
-            filename = f"{self.screenshots_folder}/screenshot_{timestamp}.png"
-            
-            # base64 디코딩 후 이미지 저장
+            # Content-addressed, so two captures in the same second never overwrite each other
             img_data = base64.b64decode(screenshot_base64)
-            with open(filename, "wb") as f:
-                f.write(img_data)
+            filename = self.frame_store.put(img_data)
                 
             print(f"📸 Save Screenshot: {filename}")
             return filename
@@ -8,6 +8,9 @@ from io import BytesIO
 import io
 from urllib.parse import urlparse
 
+from api.metering import count_images, get_meter
+from api.rate_limit import estimate_payload_tokens, get_rate_limiter
+
 load_dotenv(override=True)
 
 BLOCKED_DOMAINS = [
@@ -47,6 +50,10 @@ def sanitize_message(msg: dict) -> dict:
     return msg
 
 
+class ResponseError(Exception):
+    """A Responses API request that failed for good: not retryable, or out of rate-limiter retries."""
+
+
 def create_response(**kwargs):
     url = "https://api.openai.com/v1/responses"
     headers = {
@@ -58,15 +65,25 @@ def create_response(**kwargs):
     if openai_org:
         headers["Openai-Organization"] = openai_org
 
-    try:
-        response = requests.post(url, headers=headers, json=kwargs, timeout=30)
-        response.raise_for_status()  # 4xx/5xx 오류 시 예외 발생
-
-        return response.json()  # 정상 시 항상 JSON이므로 예외 거의 없음
-
-    except requests.exceptions.RequestException as e:
-        print("[ERROR] OpenAI API 요청 실패:", str(e))
-        return {}
+    with get_meter().measure("openai", kwargs.get("model"), caller="gpt_cua", images=count_images(kwargs.get("input"))) as call:
+        try:
+            # Retries 429/5xx with backoff that honours Retry-After
+            response = get_rate_limiter().call(
+                "openai", kwargs.get("model"),
+                lambda: requests.post(url, headers=headers, json=kwargs, timeout=30),
+                tokens=estimate_payload_tokens(kwargs.get("input")),
+            )
+            response.raise_for_status()  # 4xx/5xx 오류 시 예외 발생
+
+            result = response.json()  # 정상 시 항상 JSON이므로 예외 거의 없음
+            call.usage = result.get("usage")
+            return result
+
+        except requests.exceptions.RequestException as e:
+            call.error = type(e).__name__
+            print("[ERROR] OpenAI API 요청 실패:", str(e))
+            # Raised, not returned as {}: the callers' retry loops are for empty replies only
+            raise ResponseError(str(e)) from e
 
 
 def check_blocklisted_url(url: str) -> None:
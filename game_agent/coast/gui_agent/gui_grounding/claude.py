@@ -1,4 +1,4 @@
-from api import api_caller
+from api import async_api_caller
 from . import LocalDesktopComputer
 import base64
 import asyncio
@@ -10,17 +10,25 @@ import re
 GROUNDING_WIDTH = 1366
 GROUNDING_HEIGHT = 768
 
-def resize_coordinates(coords):
-    """Improved coordinate conversion logic"""
+def resize_coordinates(coords, image_box=None):
+    """
+    Improved coordinate conversion logic.
+    image_box: (left, top, width, height) of the screenshot on screen; None means the full screen.
+    """
     screen_width, screen_height = pyautogui.size()
+    left, top = 0, 0
+    if image_box:
+        left, top, region_width, region_height = image_box
+    else:
+        region_width, region_height = screen_width, screen_height
     
     # Calculate ratio
-    x_ratio = screen_width / GROUNDING_WIDTH
-    y_ratio = screen_height / GROUNDING_HEIGHT
+    x_ratio = region_width / GROUNDING_WIDTH
+    y_ratio = region_height / GROUNDING_HEIGHT
     
     # Coordinate conversion - maintain decimal precision then round
-    new_x = round(coords[0] * x_ratio)
-    new_y = round(coords[1] * y_ratio)
+    new_x = left + round(coords[0] * x_ratio)
+    new_y = top + round(coords[1] * y_ratio)
     
     # Detailed log output
     print(f"Original coordinates: ({coords[0]}, {coords[1]})")
@@ -93,7 +101,7 @@ def execute_gui_action(action: dict, computer: LocalDesktopComputer):
     except Exception as e:
         print(f"⚠️ An error occurred while executing the action: {e} (Ignoring and continuing)")
 
-async def run_claude_gui_agent(user_prompt: str, encoded_image: str, max_retries: int = 3) -> int:
+async def run_claude_gui_agent(user_prompt: str, encoded_image: str, max_retries: int = 3, image_box=None) -> int:
     computer = LocalDesktopComputer()
 
     # Provide clearer instructions to Claude
@@ -127,7 +135,7 @@ Example of correct response:
 
     for attempt in range(1, max_retries + 1):
         try:
-            response = api_caller(
+            response = await async_api_caller(
                 api_provider="anthropic",
                 system_prompt=system_prompt,
                 model_name="claude-3-7-sonnet-20250219",
@@ -153,7 +161,7 @@ Example of correct response:
                 original_x, original_y = action["x"], action["y"]
                 
                 # Apply coordinate resizing
-                action["x"], action["y"] = resize_coordinates([original_x, original_y])
+                action["x"], action["y"] = resize_coordinates([original_x, original_y], image_box)
                 
                 # Display coordinate conversion result
                 print(f"🎯 Final coordinates: ({action['x']}, {action['y']})")
@@ -9,7 +9,8 @@ from PIL import Image
 import io
 from dotenv import load_dotenv
 
-from api import api_caller
+from api import async_api_caller
+from tools import guess_media_type
 from . import LocalDesktopComputer
 
 
@@ -88,7 +89,7 @@ You must return exactly one GUI action in JSON format using one of the following
 
     for attempt in range(1, max_retries + 1):
         try:
-            result = api_caller(
+            result = await async_api_caller(
                 api_provider=api_provider,
                 system_prompt=system_prompt,
                 model_name=model_name,
@@ -123,12 +124,17 @@ You must return exactly one GUI action in JSON format using one of the following
 
 
 # --- Grounding Coordinate Calculation ---
-async def ground_with_uground(target_description: str, encoded_image: str, client: AsyncOpenAI) -> Tuple[int, int]:
+async def ground_with_uground(
+    target_description: str,
+    encoded_image: str,
+    client: AsyncOpenAI,
+    image_box: Tuple[int, int, int, int] | None = None
+) -> Tuple[int, int]:
     messages = [
         {
             "role": "user",
             "content": [
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{encoded_image}"}},
+                {"type": "image_url", "image_url": {"url": f"data:{guess_media_type(encoded_image)};base64,{encoded_image}"}},
                 {"type": "text", "text": f"""
 Your task is to help find the pixel coordinates (x, y) of the element described as:
 "{target_description}"
@@ -147,9 +153,13 @@ Answer with a string in the form: (x, y)
 
     x_ratio, y_ratio = eval(response.choices[0].message.content.strip())
 
-    img_data = base64.b64decode(encoded_image)
-    img = Image.open(io.BytesIO(img_data))
-    w, h = img.size
+    # Ratios map onto the captured region, which may be larger than a downscaled payload
+    if image_box:
+        w, h = image_box[2:]
+    else:
+        img_data = base64.b64decode(encoded_image)
+        img = Image.open(io.BytesIO(img_data))
+        w, h = img.size
     return int(x_ratio / 1000 * w), int(y_ratio / 1000 * h)
 
 
@@ -158,7 +168,8 @@ async def agent_step(
     user_prompt: str,
     encoded_image: str,
     provider: str = "openai",
-    model: str = "gpt-4o"
+    model: str = "gpt-4o",
+    image_box: Tuple[int, int, int, int] | None = None
 ) -> int:
     load_dotenv()
     computer = LocalDesktopComputer()
@@ -176,9 +187,11 @@ async def agent_step(
     # 2. If grounding is needed
     if plan["type"] in ["click", "double_click", "drag", "scroll"]:
         client_uground = AsyncOpenAI(api_key="empty", base_url="...")
-        x, y = await ground_with_uground(plan["description"], encoded_image, client_uground)
-        plan["x"] = x
-        plan["y"] = y
+        x, y = await ground_with_uground(plan["description"], encoded_image, client_uground, image_box)
+        # Grounded coordinates are relative to the captured region
+        left, top = image_box[:2] if image_box else (0, 0)
+        plan["x"] = x + left
+        plan["y"] = y + top
 
     # 3. Execution (ignore errors)
     try:
@@ -0,0 +1,57 @@
+"""
+Imports COAST memory directories into the SQLite memory backend.
+
+Every directory under --root holding {type}_memory.json or
+{type}_memory.jsonl files (./memory/{gui_model}/{reasoning_model}/{game}/)
+for the types in MEMORY_TYPES is loaded with the file backends and saved
+into the database. Items already in the database are skipped, so the import
+can be re-run safely. The source files are left untouched.
+mapping_memory.json is not imported: MapperBot keeps writing it directly.
+
+Usage (from game_agent/coast):
+    python migrate_memory.py --root ./memory --db ./memory/memory.db
+Then set memory_backend: "sqlite" in config.yaml.
+"""
+
+import argparse
+import os
+import re
+
+from tools.memory_store import JsonlMemoryBackend, SqliteMemoryBackend
+
+# Memory types saved through the memory backend
+MEMORY_TYPES = ("clue", "episodic", "success", "reflection", "task")
+MEMORY_FILE = re.compile(rf"^(?P<type>{'|'.join(MEMORY_TYPES)})_memory\.jsonl?$")
+
+
+def memory_dirs(root):
+    """Yields (directory, sorted memory types) for every directory under root with memory files."""
+    for directory, _, files in os.walk(root):
+        types = {match["type"] for match in map(MEMORY_FILE.match, files) if match}
+        if types:
+            yield directory, sorted(types)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default="./memory")
+    parser.add_argument("--db", default="./memory/memory.db")
+    args = parser.parse_args()
+
+    source = JsonlMemoryBackend()  # reads .jsonl, or the legacy .json when there is none
+    target = SqliteMemoryBackend(args.db)
+    total = 0
+    for directory, types in memory_dirs(args.root):
+        for memory_type in types:
+            data = source.load(directory, memory_type)
+            before = target.count(directory, memory_type)
+            target.save(directory, memory_type, data)
+            added = target.count(directory, memory_type) - before
+            total += added
+            size = len(data) if isinstance(data, (list, dict)) else 1
+            print(f"{directory}  {memory_type:<10} {size:>6} items, {added:>6} new")
+    print(f"\nImported {total} items into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from agent.info_gathering import summary_env, find_clue
 from agent.self_reflection import check_action_success, self_reflect
 from agent.game_end import game_end
 from agent.memory import add_task_memory, add_reflection_memory, add_clue_memory
-from tools import load_game_prompt, load_system_prompt, capture_flash_screenshot, encode_image
+from tools import load_game_prompt, load_system_prompt, capture_flash_frame
 from gui_agent.gpt_cua import main_gpt_operator
 from gui_agent.claude_cua import run_agent as main_claude_cua
 from gui_agent.gui_grounding import agent_step as main_uground
@@ -16,7 +16,7 @@ import re
 
 class Planner:
     
-    def __init__(self, reasoning_model, gui_model, game_name, task_prompt, width, mode="action", current_subtask=None):
+    def __init__(self, reasoning_model, gui_model, game_name, task_prompt, width, mode="action", current_subtask=None, save_screenshots=True):
         self.reasoning_model = reasoning_model  # "openai" or "anthropic"
         self.gui_model = gui_model              # e.g., "gpt_cua", "claude", etc.
         self.game_name = game_name
@@ -27,6 +27,7 @@ class Planner:
         self.env_summary = None
         self.clue_result = None
         self.current_subtask = current_subtask
+        self.save_screenshots = save_screenshots  # save_screenshots in config.yaml
 
     ##### Step 1: Info Gathering #####
 
@@ -101,13 +102,10 @@ class Planner:
         print(f"🎮 Execution started: Game = {self.game_name}, Mode = {self.mode}, Reasoning = {self.reasoning_model}")
 
         # 1. Capture screen
-        screenshot_path = capture_flash_screenshot(
-            game_name=self.game_name,
-            cua=self.gui_model,
-            model_name=self.reasoning_model
-        )
-        print(f"📸 Screenshot path: {screenshot_path}")
-        self.before_image = encode_image(screenshot_path)
+        frame = capture_flash_frame(self.game_name, self.gui_model, self.reasoning_model, save=self.save_screenshots)
+        if frame.path:
+            print(f"📸 Screenshot path: {frame.path}")
+        self.before_image = frame.base64
 
         # 2. Summarize environment
         self.environment_summary(self.before_image)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The COAST modules import each other as top-level packages (agent, api, tools, ...)
+COAST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if COAST_DIR not in sys.path:
+    sys.path.insert(0, COAST_DIR)
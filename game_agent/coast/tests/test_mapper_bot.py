@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+import yaml
+
+from conftest import COAST_DIR
+
+for module in ("PIL", "numpy", "openai", "anthropic"):
+    pytest.importorskip(module)
+
+import agent.moduler as moduler
+from api.streaming import parse_tagged_json
+
+GAME = "sherlock holmes the tea shop murder mystery"
+
+
+@pytest.fixture
+def mapper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # memory_path is relative to the working directory
+    config = {
+        "action_prompt_path": os.path.join(COAST_DIR, "json", "action_prompt.json"),
+        "game_prompt_path": os.path.join(COAST_DIR, "json", "game_prompt.json"),
+        "reasoning_model": "claude-3-7-sonnet-20250219",
+        "gui_model": "claude_cua",
+        "memory_backend": "json",
+        "episodic_tiers": {"enabled": False},
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+    def make():
+        return moduler.MapperBot(config_path=str(config_path), game_name=GAME)
+
+    seed = make()
+    seed.clue_memory = [{"name": "torn receipt", "description": "Tea shop receipt", "location": "counter"}]
+    seed.save_memory("clue")
+    seed.episodic_memory = [{"location": "tea shop", "observation": "The cash register is locked"}]
+    seed.save_memory("episodic")
+    return make
+
+
+def reply(text, calls):
+    def stream_tagged(**kwargs):
+        calls.append(kwargs)
+        yield parse_tagged_json(text)
+    return stream_tagged
+
+
+def test_unquoted_nobody_advances_the_watermark(mapper, monkeypatch):
+    calls = []
+    monkeypatch.setattr(moduler, "stream_tagged", reply("[Nobody]", calls))
+
+    bot = mapper()
+    assert bot.run() == []
+    assert len(calls) == 1
+    with open(bot.watermark_path, "r", encoding="utf-8") as f:
+        watermark = json.load(f)
+    assert len(watermark["clue"]) == 1 and len(watermark["episodic"]) == 1
+
+    # Nothing new since the [Nobody] reply, so the model is not asked again
+    assert mapper().run() == []
+    assert len(calls) == 1
+
+
+def test_unparsable_reply_keeps_the_watermark(mapper, monkeypatch):
+    calls = []
+    monkeypatch.setattr(moduler, "stream_tagged", reply("[{not json", calls))
+
+    bot = mapper()
+    assert bot.run() == []
+    assert not os.path.exists(bot.watermark_path)
+
+    mapper().run()
+    assert len(calls) == 2
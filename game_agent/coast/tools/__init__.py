@@ -7,7 +7,40 @@ from .load_data import (
 )
 
 from .screenshot import (
-    capture_flash_screenshot
+    capture_flash_screenshot,
+    capture_flash_frame
+)
+
+from .frame import Frame
+
+from .image_codec import (
+    ImageCodec,
+    guess_media_type
+)
+
+from .capture import (
+    CaptureSession,
+    get_capture_session,
+    get_flashpoint_window_position,
+    wait_until_stable
+)
+
+from .frame_store import (
+    FrameStore,
+    get_frame_store
+)
+
+from .memory_store import (
+    MemoryBackend,
+    JsonMemoryBackend,
+    JsonlMemoryBackend,
+    SqliteMemoryBackend,
+    get_memory_backend
+)
+
+from .memory_tiers import (
+    TieredMemory,
+    get_tiered_memory
 )
 
 from .utils import (
@@ -27,6 +60,23 @@ __all__ = [
     "load_game_prompt",
     "load_game_prompt_eval",
     "capture_flash_screenshot",
+    "capture_flash_frame",
+    "Frame",
+    "ImageCodec",
+    "guess_media_type",
+    "CaptureSession",
+    "get_capture_session",
+    "get_flashpoint_window_position",
+    "wait_until_stable",
+    "FrameStore",
+    "get_frame_store",
+    "MemoryBackend",
+    "JsonMemoryBackend",
+    "JsonlMemoryBackend",
+    "SqliteMemoryBackend",
+    "get_memory_backend",
+    "TieredMemory",
+    "get_tiered_memory",
     "encode_image",
     "extract_python_code",
     "extract_action_change",
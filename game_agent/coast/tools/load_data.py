@@ -2,6 +2,8 @@ import json
 import os
 import yaml
 
+from .memory_store import get_memory_backend
+
 
 
 def save_chat_log(entry, game_name, api_model, cua):
@@ -63,24 +65,13 @@ def load_game_prompt(json_path, game_name, type):
         raise ValueError(f"No prompt exists for game '{game_name}'.")
 
 
-def load_memory(json_dir, type="episodic", n=None):
+def load_memory(json_dir, type="episodic", n=None, backend=None):
     """
     type: one of 'episodic', 'clue', 'task', 'reflection'
     n: (Optional) If it's a list, only the last n items are returned
+    backend: memory backend name ("jsonl" by default, or "json")
     Returns:
         - List (optionally sliced) for episodic/reflection memory
         - Dict for clue/task memory
     """
-    filename = f"{type}_memory.json"
-    path = os.path.join(json_dir, filename)
-
-    if not os.path.exists(path):
-        return {} if type in ("task") else []
-
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # Slice the last n items (for list types only)
-    if isinstance(data, list) and n is not None:
-        return data[-n:]
-    return data
\ No newline at end of file
+    return get_memory_backend(backend).load(json_dir, type, n=n)
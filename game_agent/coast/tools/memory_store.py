@@ -0,0 +1,446 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .frame_store import tail_lines
+
+# Memory kinds that read as an empty dict, not an empty list, before anything is saved
+EMPTY_AS_DICT = ("task",)
+
+
+def memory_key(type, item):
+    """Identity used to drop duplicates: (clue, location) for clues, the content otherwise."""
+    if type == "clue" and isinstance(item, dict):
+        return json.dumps([item.get("clue"), item.get("location")], ensure_ascii=False)
+    if isinstance(item, str):
+        return item
+    return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+def dedupe(type, items):
+    """Keeps the first occurrence of every item, in order."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = memory_key(type, item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def key_digest(key: str) -> str:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class DedupIndex:
+    """
+    Persistent set of memory_key digests, kept in a sidecar file next to a
+    memory file with one digest per line. It is read once per session and
+    then extended with appends, so checking a new item is a set lookup
+    instead of re-serialising the whole history.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.digests = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.digests = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, digest):
+        return digest in self.digests
+
+    def add(self, digests):
+        digests = [digest for digest in digests if digest not in self.digests]
+        if digests:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{digest}\n" for digest in digests))
+            self.digests.update(digests)
+
+    def rebuild(self, digests):
+        self.digests = set(digests)
+        _write_atomic(self.path, "".join(f"{digest}\n" for digest in self.digests))
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class MemoryBackend:
+    """
+    Storage for the memory kinds of one agent (clue, episodic, success, ...),
+    each kept under memory_dir. load() returns a list, or the stored value
+    for kinds that are not lists; save() merges a list into what is stored,
+    dropping duplicates, and replaces anything that is not a list.
+    """
+
+    name = None
+
+    def load(self, memory_dir, type, n=None):
+        raise NotImplementedError
+
+    def save(self, memory_dir, type, data) -> str:
+        """Stores data and returns the path (or location) written."""
+        raise NotImplementedError
+
+    def compact(self, memory_dir, type=None):
+        """Removes duplicates of one memory kind, or of every kind when type is None."""
+
+    def query(self, memory_dir, type, location=None, n=None):
+        """Items of a list memory, only those at location if given, the last n if given."""
+        items = self.load(memory_dir, type)
+        if not isinstance(items, list):
+            return []
+        if location is not None:
+            items = [item for item in items if isinstance(item, dict) and item.get("location") == location]
+        return items[-n:] if n is not None else items
+
+
+class JsonMemoryBackend(MemoryBackend):
+    """
+    The original layout: one {type}_memory.json array per kind, read in full
+    and rewritten on every save (now through a temp file and rename).
+    """
+
+    name = "json"
+
+    def path(self, memory_dir, type):
+        return os.path.join(memory_dir, f"{type}_memory.json")
+
+    def load(self, memory_dir, type, n=None):
+        path = self.path(memory_dir, type)
+        if not os.path.exists(path):
+            return {} if type in EMPTY_AS_DICT else []
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        # Slice the last n items (for list types only)
+        if isinstance(data, list) and n is not None:
+            return data[-n:]
+        return data
+
+    def save(self, memory_dir, type, data):
+        os.makedirs(memory_dir, exist_ok=True)
+        path = self.path(memory_dir, type)
+        if isinstance(data, list):
+            try:
+                existing = self.load(memory_dir, type)
+            except json.JSONDecodeError:
+                existing = []
+            data = dedupe(type, (existing if isinstance(existing, list) else []) + data)
+        _write_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
+        return path
+
+
+class JsonlMemoryBackend(MemoryBackend):
+    """
+    Append-only {type}_memory.jsonl, one item per line.
+
+    A save appends only the new items, in a single O_APPEND write, so its cost
+    does not grow with the memory and a crash can at worst leave one partial
+    last line, which readers skip. Items already stored are recognised by the
+    DedupIndex in {type}_memory.index and skipped; it is rebuilt from the
+    JSONL when missing or older than it. Duplicates that still get in (e.g. from a crash
+    between the two appends) are dropped by loads and by compaction, which
+    rewrites the file (atomically) on demand or in the background every
+    compact_every appended items. load(n=...) reads only the end of the file.
+
+    An existing {type}_memory.json is imported on the first save and kept as
+    {type}_memory.json.migrated; until then loads read it as before.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, compact_every: int = 200):
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._appended = {}
+        self._indexes = {}
+
+    def path(self, memory_dir, type):
+        return os.path.join(memory_dir, f"{type}_memory.jsonl")
+
+    def _index(self, path, type) -> DedupIndex:
+        """The dedup index of path, loaded once per session; call with the path lock held."""
+        if path not in self._indexes:
+            index_path = path[:-len(".jsonl")] + ".index"
+            stale = os.path.exists(index_path) and (
+                not os.path.exists(path) or os.path.getmtime(index_path) < os.path.getmtime(path) - 1
+            )
+            if stale:
+                os.remove(index_path)  # the memory file was deleted or rewritten without it
+            rebuild = os.path.exists(path) and not os.path.exists(index_path)
+            index = DedupIndex(index_path)
+            if rebuild:
+                index.rebuild(key_digest(memory_key(type, item)) for item in self._read_all(path))
+            self._indexes[path] = index
+        return self._indexes[path]
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _parse(lines):
+        items = []
+        for line in lines:
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # partial last line of an interrupted write
+        return items
+
+    def _read_all(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return self._parse(line for line in f if line.strip())
+
+    def load(self, memory_dir, type, n=None):
+        path = self.path(memory_dir, type)
+        if not os.path.exists(path):
+            return JsonMemoryBackend().load(memory_dir, type, n)
+
+        if n is not None:
+            # Read a little past n so duplicates in the tail still leave n items
+            return dedupe(type, self._parse(tail_lines(path, 2 * n)))[-n:] if n > 0 else []
+        return dedupe(type, self._read_all(path))
+
+    def _migrate(self, memory_dir, type, path):
+        legacy = JsonMemoryBackend().path(memory_dir, type)
+        if os.path.exists(path) or not os.path.exists(legacy):
+            return
+        try:
+            data = JsonMemoryBackend().load(memory_dir, type)
+        except json.JSONDecodeError:
+            data = []
+        if isinstance(data, list):
+            _write_atomic(path, "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in dedupe(type, data)))
+            os.replace(legacy, f"{legacy}.migrated")
+            self._indexes.pop(path, None)  # rebuilt from the imported items
+
+    def _append(self, path, items):
+        payload = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    payload = b"\n" + payload  # close a line cut off by a crash
+
+        # Unbuffered append: the batch goes out in one write at the end of the file
+        with open(path, "ab", buffering=0) as f:
+            view = memoryview(payload)
+            while view:
+                view = view[f.write(view):]
+            os.fsync(f.fileno())
+
+    def save(self, memory_dir, type, data):
+        if not isinstance(data, list):
+            # Not a collection of items: stored whole, like the json backend
+            return JsonMemoryBackend().save(memory_dir, type, data)
+
+        os.makedirs(memory_dir, exist_ok=True)
+        path = self.path(memory_dir, type)
+        with self._path_lock(path):
+            self._migrate(memory_dir, type, path)
+            index = self._index(path, type)
+            items, digests = [], []
+            for item in dedupe(type, data):
+                digest = key_digest(memory_key(type, item))
+                if digest not in index:
+                    items.append(item)
+                    digests.append(digest)
+            if items:
+                # Items first: a crash in between costs a duplicate, never a lost item
+                self._append(path, items)
+                index.add(digests)
+            appended = self._appended.get(path, 0) + len(items)
+            compact = bool(self.compact_every) and appended >= self.compact_every
+            self._appended[path] = 0 if compact else appended
+
+        if compact:
+            threading.Thread(target=self._compact_path, args=(path, type), daemon=True).start()
+        return path
+
+    def _compact_path(self, path, type):
+        with self._path_lock(path):
+            if not os.path.exists(path):
+                return
+            items = self._read_all(path)
+            unique = dedupe(type, items)
+            if len(unique) < len(items):
+                _write_atomic(path, "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in unique))
+                print(f"[memory] Compacted {os.path.basename(path)}: {len(items)} -> {len(unique)} items")
+            self._index(path, type).rebuild(key_digest(memory_key(type, item)) for item in unique)
+
+    def compact(self, memory_dir, type=None):
+        suffix = "_memory.jsonl"
+        if type:
+            types = [type]
+        elif os.path.isdir(memory_dir):
+            types = [name[:-len(suffix)] for name in os.listdir(memory_dir) if name.endswith(suffix)]
+        else:
+            types = []
+        for memory_type in types:
+            self._compact_path(self.path(memory_dir, memory_type), memory_type)
+
+
+class SqliteMemoryBackend(MemoryBackend):
+    """
+    Every memory kind of every game in one SQLite database (WAL mode), one
+    row per item, so "the last n episodic entries" or "clues at a location"
+    are indexed queries instead of whole-file loads. Rows are keyed by the
+    memory_dir they belong to; a save is one transaction, and duplicates are
+    rejected by a unique index on the item's dedup key. Values that are not
+    lists (e.g. task memory) are stored whole in a separate table.
+
+    Existing JSON / JSONL memory directories are imported with
+    `python migrate_memory.py`.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS memory_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scope TEXT NOT NULL,
+        game TEXT NOT NULL,
+        type TEXT NOT NULL,
+        item_key TEXT NOT NULL,
+        location TEXT,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS memory_items_key ON memory_items (scope, type, item_key);
+    CREATE INDEX IF NOT EXISTS memory_items_game ON memory_items (game, type);
+    CREATE INDEX IF NOT EXISTS memory_items_location ON memory_items (scope, type, location);
+    CREATE INDEX IF NOT EXISTS memory_items_created ON memory_items (scope, type, created_at);
+    CREATE TABLE IF NOT EXISTS memory_values (
+        scope TEXT NOT NULL,
+        game TEXT NOT NULL,
+        type TEXT NOT NULL,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (scope, type)
+    );
+    """
+
+    def __init__(self, db_path: str = "./memory/memory.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def scope(memory_dir):
+        # Absolute, so rows imported with an absolute --root match the agent's ./memory/... paths
+        return os.path.abspath(memory_dir)
+
+    @staticmethod
+    def location(location):
+        """Location as stored in the location column; lists and dicts are stored as JSON."""
+        if location is None or isinstance(location, (str, int, float)):
+            return location
+        return json.dumps(location, ensure_ascii=False)
+
+    @staticmethod
+    def game(memory_dir):
+        # ./memory/{gui_model}/{reasoning_model}/{game}/
+        return os.path.basename(os.path.normpath(memory_dir))
+
+    def load(self, memory_dir, type, n=None):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT data FROM memory_values WHERE scope = ? AND type = ?", (self.scope(memory_dir), type)
+        ).fetchone()
+        if row:
+            return json.loads(row[0])
+        items = self.query(memory_dir, type, n=n)
+        if not items and type in EMPTY_AS_DICT:
+            return {}
+        return items
+
+    def query(self, memory_dir, type, location=None, n=None):
+        sql = "SELECT data FROM memory_items WHERE scope = ? AND type = ?"
+        params = [self.scope(memory_dir), type]
+        if location is not None:
+            sql += " AND location = ?"
+            params.append(self.location(location))
+        if n is None:
+            rows = self._connection().execute(sql + " ORDER BY id", params).fetchall()
+        else:
+            rows = self._connection().execute(sql + " ORDER BY id DESC LIMIT ?", params + [n]).fetchall()[::-1]
+        return [json.loads(data) for data, in rows]
+
+    def count(self, memory_dir, type):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM memory_items WHERE scope = ? AND type = ?", (self.scope(memory_dir), type)
+        ).fetchone()[0]
+
+    def save(self, memory_dir, type, data):
+        scope, game, now = self.scope(memory_dir), self.game(memory_dir), time.time()
+        conn = self._connection()
+        with conn:
+            if not isinstance(data, list):
+                conn.execute(
+                    "INSERT OR REPLACE INTO memory_values (scope, game, type, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (scope, game, type, json.dumps(data, ensure_ascii=False), now),
+                )
+                return self.db_path
+            conn.executemany(
+                "INSERT OR IGNORE INTO memory_items (scope, game, type, item_key, location, data, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        scope, game, type, key_digest(memory_key(type, item)),
+                        self.location(item.get("location")) if isinstance(item, dict) else None,
+                        json.dumps(item, ensure_ascii=False), now,
+                    )
+                    for item in data
+                ],
+            )
+        return self.db_path
+
+    def compact(self, memory_dir, type=None):
+        # Duplicates never reach the table; this only folds the WAL back into the database
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+MEMORY_BACKENDS = {
+    JsonlMemoryBackend.name: JsonlMemoryBackend,
+    JsonMemoryBackend.name: JsonMemoryBackend,
+    SqliteMemoryBackend.name: SqliteMemoryBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_memory_backend(name: str = None) -> MemoryBackend:
+    """Returns the shared backend registered under name ("jsonl" by default)."""
+    name = name or "jsonl"
+    with _backends_lock:
+        if name not in _backends:
+            if name not in MEMORY_BACKENDS:
+                raise ValueError(f"Unknown memory backend: {name}")
+            _backends[name] = MEMORY_BACKENDS[name]()
+        return _backends[name]
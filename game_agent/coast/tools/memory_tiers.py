@@ -0,0 +1,256 @@
+"""
+Tiered episodic memory: recent raw entries, per-location summaries and a
+long-term game summary, each kept within a token budget.
+
+The raw entries stay where they are (the memory backend); the two summary
+tiers live in a small JSON file next to them. When the raw entries after the
+last rollup exceed the recent budget, a background thread asks the model to
+fold the oldest of them into per-location summaries; when those exceed their
+budget, the least recently updated locations are folded into the game
+summary, which is itself rewritten shorter when it outgrows its budget.
+render() always applies the budgets, so a prompt built from it stays the same
+size however long the game runs, also while a rollup is still pending.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from .memory_store import _write_atomic
+
+LOCATION_PROMPT = """You maintain per-location summaries of the episodic memory of a player in a point-and-click game.
+
+[Current Location Summaries]
+{summaries}
+
+[New Entries]
+{entries}
+
+Group the new entries by the in-game location (room, screen or area) they happened in, and update the summary of every location they touch, merging it with what is already known there. Keep what may matter later: items found or used, codes and patterns, what is locked or open, what was tried and failed. At most {words} words per location.
+Respond with a JSON object mapping each touched location to its updated summary, inside <RESPO></RESPO> tags."""
+
+GAME_PROMPT = """You maintain the long-term summary of the episodic memory of a player in a point-and-click game.
+
+[Game Summary]
+{game}
+
+[Location Summaries To Fold In]
+{summaries}
+
+Write the updated game summary: overall progress, key items and where they came from, solved and unsolved puzzles, and what was tried and failed. At most {words} words.
+Respond with the summary only."""
+
+
+def approx_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def entry_digest(entry) -> str:
+    text = entry if isinstance(entry, str) else json.dumps(entry, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def render_entry(entry) -> str:
+    return entry if isinstance(entry, str) else json.dumps(entry, ensure_ascii=False)
+
+
+def _parse_locations(text):
+    """{location: summary} from a <RESPO>{...}</RESPO> reply, or {} when there is none."""
+    tagged = re.search(r"<RESPO>(.*?)</RESPO>", text or "", re.DOTALL)
+    match = re.search(r"\{.*\}", tagged.group(1) if tagged else text or "", re.DOTALL)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(location): str(summary) for location, summary in data.items() if summary}
+
+
+class TieredMemory:
+    """
+    Tiers over one list of memory entries. path is the JSON file of the
+    summary tiers, load_entries(n) returns the last n raw entries in order,
+    and summarize(prompt) returns the model's reply as text.
+
+    The rollup boundary is the digest of the last rolled-up entry. That is
+    only unambiguous because the memory backends store every episodic entry
+    once (memory_key is its whole content), so a repeated entry never shows
+    up again later in load_entries(); an entry list that can repeat needs a
+    positional boundary instead (see Cradle's TieredMemory).
+    """
+
+    def __init__(self, path, load_entries, summarize, recent_budget=1500, location_budget=1500, game_budget=600):
+        self.path = path
+        self.load_entries = load_entries
+        self.summarize = summarize
+        self.recent_budget = recent_budget
+        self.location_budget = location_budget
+        self.game_budget = game_budget
+        self._lock = threading.Lock()
+        self._thread = None
+        self._state = None
+
+    def state(self) -> dict:
+        """{"last_rolled": digest of the last raw entry rolled up, "locations": {...}, "game": "..."}"""
+        with self._lock:
+            if self._state is None:
+                self._state = {"last_rolled": None, "locations": {}, "game": ""}
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._state.update(json.load(f))
+                except (FileNotFoundError, json.JSONDecodeError):
+                    pass
+            return {**self._state, "locations": dict(self._state["locations"])}
+
+    def _save_state(self, state):
+        with self._lock:
+            self._state = state
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            _write_atomic(self.path, json.dumps(state, indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def _pending(entries, last_rolled):
+        """Entries after the last rolled-up one; all of them when it is not among entries."""
+        if last_rolled:
+            for i in range(len(entries) - 1, -1, -1):
+                if entry_digest(entries[i]) == last_rolled:
+                    return entries[i + 1:]
+        return entries
+
+    def _load_pending(self, last_rolled, window=256):
+        """
+        Raw entries after the last rolled-up one, read from the end of the
+        memory in growing windows, so a rollup check costs about as much as
+        the entries since the last rollup rather than the whole memory.
+        """
+        while True:
+            entries = self.load_entries(window)
+            pending = self._pending(entries, last_rolled)
+            if len(pending) < len(entries) or len(entries) < window:
+                return pending  # found it, or read everything there is
+            window *= 4
+
+    @staticmethod
+    def _newest_within(items, budget, cost):
+        """How many of the newest items fit in budget."""
+        used = count = 0
+        for item in reversed(items):
+            used += cost(item)
+            if used > budget:
+                break
+            count += 1
+        return count
+
+    def render(self, recent_entries=None) -> str:
+        """
+        Prompt text of the tiers, oldest first. recent_entries is the tail of
+        the raw entries (e.g. the last few hundred); only those not yet rolled
+        up and fitting the recent budget are shown. Without it, only the two
+        summary tiers are rendered ("" when there are none yet).
+        """
+        state = self.state()
+        locations = list(state["locations"].items())
+        locations = locations[len(locations) - self._newest_within(
+            locations, self.location_budget, lambda item: approx_tokens(f"{item[0]}: {item[1]}"))
+        :]
+        game = state["game"][:self.game_budget * 4]
+
+        parts = []
+        if game:
+            parts.append(f"[Game Summary]\n{game}")
+        if locations:
+            parts.append("[Location Summaries]\n" + "\n".join(f"- {name}: {summary}" for name, summary in locations))
+        if recent_entries is not None:
+            recent = self._pending(list(recent_entries), state["last_rolled"])
+            recent = recent[len(recent) - self._newest_within(recent, self.recent_budget, lambda e: approx_tokens(render_entry(e))):]
+            parts.append("[Recent Memory]\n" + ("\n".join(f"- {render_entry(entry)}" for entry in recent) or "(none)"))
+        return "\n\n".join(parts)
+
+    def maybe_rollup(self):
+        """Starts a background rollup unless one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._rollup, daemon=True)
+            self._thread.start()
+
+    def _rollup(self):
+        try:
+            self._rollup_recent()
+            self._rollup_locations()
+            self._rollup_game()
+        except Exception as e:
+            # The tiers stay over budget (render() still bounds them) and the next save retries
+            print(f"[memory] Rollup of {os.path.basename(self.path)} failed: {e}")
+
+    def _rollup_recent(self):
+        state = self.state()
+        pending = self._load_pending(state["last_rolled"])
+        if sum(approx_tokens(render_entry(entry)) for entry in pending) <= self.recent_budget:
+            return
+        keep = self._newest_within(pending, self.recent_budget // 2, lambda e: approx_tokens(render_entry(e)))
+        rolled = pending[:len(pending) - keep]
+        summaries = "\n".join(f"- {name}: {summary}" for name, summary in state["locations"].items()) or "(none)"
+        words = max(20, self.location_budget // 8)
+        reply = self.summarize(LOCATION_PROMPT.format(
+            summaries=summaries, entries="\n".join(f"- {render_entry(entry)}" for entry in rolled), words=words
+        ))
+        updated = _parse_locations(reply)
+        if not updated:
+            raise ValueError("no location summaries in the reply")
+        for name, summary in updated.items():
+            state["locations"].pop(name, None)  # re-inserted last: most recently updated
+            state["locations"][name] = summary
+        state["last_rolled"] = entry_digest(rolled[-1])
+        self._save_state(state)
+        print(f"[memory] Rolled {len(rolled)} entries into {len(updated)} location summaries")
+
+    def _rollup_locations(self):
+        state = self.state()
+        locations = list(state["locations"].items())
+        cost = lambda item: approx_tokens(f"{item[0]}: {item[1]}")
+        if sum(map(cost, locations)) <= self.location_budget:
+            return
+        keep = self._newest_within(locations, self.location_budget // 2, cost)
+        folded = locations[:len(locations) - keep]
+        state["game"] = self._game_summary(GAME_PROMPT.format(
+            game=state["game"] or "(none)",
+            summaries="\n".join(f"- {name}: {summary}" for name, summary in folded),
+            words=max(50, self.game_budget * 3 // 4),
+        ))
+        state["locations"] = dict(locations[len(locations) - keep:])
+        self._save_state(state)
+        print(f"[memory] Folded {len(folded)} location summaries into the game summary")
+
+    def _rollup_game(self):
+        state = self.state()
+        if approx_tokens(state["game"]) <= self.game_budget:
+            return
+        state["game"] = self._game_summary(GAME_PROMPT.format(
+            game=state["game"], summaries="(none)", words=max(50, self.game_budget // 2)
+        ))
+        self._save_state(state)
+
+    def _game_summary(self, prompt) -> str:
+        # An empty reply would replace the game summary (and the folded locations) with nothing
+        summary = (self.summarize(prompt) or "").strip()
+        if not summary:
+            raise ValueError("empty game summary in the reply")
+        return summary
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def get_tiered_memory(path, load_entries, summarize, **budgets) -> TieredMemory:
+    """Returns the shared TieredMemory of path, creating it on first use."""
+    with _tiers_lock:
+        if path not in _tiers:
+            _tiers[path] = TieredMemory(path, load_entries, summarize, **budgets)
+        return _tiers[path]
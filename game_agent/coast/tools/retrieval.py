@@ -0,0 +1,65 @@
+"""
+Relevance ranking of memory entries for prompt building.
+
+Entries (clues, episodic memories) are ranked by TF-IDF cosine similarity to
+a query describing what the agent is working on, and the best ones are kept
+until a token budget is spent.
+"""
+
+import json
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def approx_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def entry_text(entry) -> str:
+    """Searchable text of a memory entry: its values for dicts, the string itself otherwise."""
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict):
+        return " ".join(entry_text(value) for value in entry.values())
+    if isinstance(entry, list):
+        return " ".join(entry_text(value) for value in entry)
+    return json.dumps(entry, ensure_ascii=False)
+
+
+def rank(entries, query: str) -> list[int]:
+    """Indices of entries, most relevant to query first; ties go to the most recent."""
+    if not entries:
+        return []
+    recency = list(range(len(entries) - 1, -1, -1))
+    if not query.strip():
+        return recency
+    try:
+        matrix = TfidfVectorizer(sublinear_tf=True).fit_transform([entry_text(e) for e in entries] + [query])
+    except ValueError:  # no usable terms at all
+        return recency
+    # Rows are L2-normalised, so the dot product is the cosine similarity
+    scores = (matrix[:-1] @ matrix[-1].T).toarray().ravel()
+    return sorted(range(len(entries)), key=lambda i: (-scores[i], -i))
+
+
+def select_relevant(entries, query: str, top_k: int, token_budget: int, keep_recent: int = 0, render=None):
+    """
+    Picks up to top_k entries by relevance to query, whose rendered sizes
+    together fit in token_budget, and returns them in their original order.
+    The keep_recent most recent entries are taken first regardless of score.
+    Returns (selected entries, tokens used).
+    """
+    render = render or (lambda entry: json.dumps(entry, indent=2, ensure_ascii=False))
+    recent = list(range(len(entries) - 1, -1, -1))[:keep_recent]
+    order = recent + [i for i in rank(entries, query) if i not in recent]
+
+    chosen, used = [], 0
+    for i in order:
+        if len(chosen) >= top_k:
+            break
+        cost = approx_tokens(render(entries[i]))
+        if used + cost > token_budget:
+            continue  # a smaller, less relevant entry may still fit
+        chosen.append(i)
+        used += cost
+    return [entries[i] for i in sorted(chosen)], used
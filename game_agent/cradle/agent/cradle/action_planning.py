@@ -1,22 +1,37 @@
-from api import api_caller
-from agent.cradle.memory import load_memory, get_recent_tasks, get_recent_image_paths
-from tools import encode_images_to_base64
+from api import api_caller, metered
+from agent.cradle.memory import load_memory, get_memory_context, get_recent_image_paths
+from tools import encode_images_to_base64, collapse_runs, hash_base64, hash_file, unchanged_marker
 
-def plan_actions(system_prompt, env_summary, screen, api_provider, model_name, game_name, cua):
+HISTORY_LIMIT = 10
+
+
+@metered("Planner")
+def plan_actions(system_prompt, env_summary, screen, api_provider, model_name, game_name, cua, image_codec=None, screen_path=None):
     # 1. Load memory with cua-based paths
     verified_skills = load_memory("skill", game_name, api_model=model_name, cua=cua)
-    history, _ = get_recent_tasks(n=10, game_name=game_name, api_model=model_name, cua=cua)
-    _, reflection = get_recent_tasks(n=10, game_name=game_name, api_model=model_name, cua=cua)
+    # Recent entries plus location and game summaries of older ones, within fixed token budgets
+    history = get_memory_context("task", game_name, api_provider, model_name, cua)
+    reflection = get_memory_context("reflection", game_name, api_provider, model_name, cua)
 
-    # 2. Load recent screenshots from cua/model-specific directory
-    image_history_path = get_recent_image_paths(
+    # 2. Load recent screenshots from cua/model-specific directory (newest first).
+    # The current screen is already stored as the newest frame, so skip it.
+    recent_paths = get_recent_image_paths(
         base_dir=f'screenshots/{cua}/{model_name}',
         game_name=game_name,
-        limit=10,
-        extensions=['.png']
+        limit=HISTORY_LIMIT + 1
     )
-    image_history_base64 = encode_images_to_base64(image_history_path)
+    if screen_path and recent_paths and recent_paths[0] == screen_path:
+        recent_paths = recent_paths[1:]
+    image_history_path = list(reversed(recent_paths[:HISTORY_LIMIT]))
+
+    # Collapse consecutive near-identical screens into one image plus a count
+    runs = collapse_runs([hash_file(path) for path in image_history_path] + [hash_base64(screen)])
+    *history_runs, (_, current_count) = runs
+    image_history_base64 = encode_images_to_base64([image_history_path[i] for i, _ in history_runs], image_codec)
     all_images = image_history_base64 + [screen]
+    history_screens = "\n".join(
+        f"[Attached image: {n}{unchanged_marker(count)}]" for n, (_, count) in enumerate(history_runs, start=1)
+    ) or "(none)"
 
     # 3. Compose prompt
     prompt = f"""
@@ -29,11 +44,11 @@ def plan_actions(system_prompt, env_summary, screen, api_provider, model_name, g
     Task Reflection History:\n
     {reflection}\n\n
 
-    History Screens:\n
-    [Attached images: 1~10]\n\n
+    History Screens (oldest first):\n
+    {history_screens}\n\n
 
     Current Screen:\n
-    [Attached image: 11 (latest)]\n\n
+    [Attached image: {len(all_images)} (latest){unchanged_marker(current_count)}]\n\n
 
     Screen Analysis Summary:\n
     {env_summary}\n\n
@@ -8,8 +8,8 @@ from agent.cradle.action_planning import plan_actions
 from agent.cradle.info_gathering import info_gather
 from agent.cradle.self_reflection import check_action_success, self_reflect
 from agent.cradle.game_end import game_end
-from agent.cradle.memory import add_task_memory, add_reflection_memory
-from tools import load_game_prompt, load_system_prompt, capture_flash_screenshot, encode_image
+from agent.cradle.memory import add_task_memory, add_reflection_memory, schedule_rollup
+from tools import load_game_prompt, load_system_prompt, capture_flash_frame
 from gpt_cua import main_gpt_cua
 from claude_cua import run_agent as main_claude_cua
 from gui_grounding import agent_step as main_uground
@@ -43,7 +43,7 @@ def save_chat_log(log, game_name, api_model, cua):
         json.dump(logs, f, ensure_ascii=False, indent=2)
 
 
-def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100):
+def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100, image_codec=None):
     print(f"🎮 Game execution requested: {game_name}")
     total_actions = 0
     success_count = 0
@@ -61,16 +61,16 @@ def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100):
 
             # 1. Gather current screen information
             print("\n📸 Capturing screen before action...")
-            screenshot_path = capture_flash_screenshot(game_name=game_name, cua=cua, model_name=model_name)
-            print(screenshot_path)
-            before_encoded = encode_image(screenshot_path)
+            frame = capture_flash_frame(game_name=game_name, cua=cua, model_name=model_name)
+            print(frame.path)
+            before_encoded = frame.encode(image_codec)
 
             # 2. Task Inference
             env_summary = info_gather(system_prompt, api_provider, model_name, before_encoded)
             print(env_summary)
 
             # 3. Plan actions
-            planned = plan_actions(system_prompt, env_summary, before_encoded, api_provider, model_name, game_name, cua)
+            planned = plan_actions(system_prompt, env_summary, before_encoded, api_provider, model_name, game_name, cua, image_codec, frame.path)
             print("\n📝 Best Action:\n", planned)
 
             # 4. Execute action
@@ -124,7 +124,9 @@ def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100):
                 model_name=model_name,
                 action=planned,
                 base64_before=before_encoded,
-                cua=cua
+                cua=cua,
+                before_frame=frame,
+                image_codec=image_codec
             )
             success_flag = success_result["success"]
             if success_flag:
@@ -139,6 +141,7 @@ def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100):
                 api_model=model_name,
                 cua=cua
             )
+            schedule_rollup("task", game_name, api_provider, model_name, cua)
 
             # 7. Save skill if successful
             if success_flag:
@@ -173,12 +176,13 @@ def run_game_agent(api_provider, model_name, game_name, cua, max_actions=100):
                 api_model=model_name,
                 cua=cua
             )
+            schedule_rollup("reflection", game_name, api_provider, model_name, cua)
 
             print("\n✅ Task complete and logs saved.")
 
             # 9. Judge game end
-            final_path = capture_flash_screenshot(game_name=game_name, cua=cua, model_name=model_name, time="final")
-            game_done_response = game_end(system_prompt, encode_image(final_path), api_provider, model_name)
+            final_frame = capture_flash_frame(game_name=game_name, cua=cua, model_name=model_name, time="final")
+            game_done_response = game_end(system_prompt, final_frame.encode(image_codec), api_provider, model_name)
 
             # 10. Save log
             log_entry = {
@@ -1,5 +1,6 @@
-from api import api_caller
+from api import api_caller, metered
 
+@metered("GameEnd")
 def game_end(system_prompt, screen, api_provider, model_name):
     prompt = f"""
     Current Screen:\n
@@ -1,5 +1,6 @@
-from api import api_caller
+from api import api_caller, metered
  
+@metered("InfoGathering")
 def info_gather(system_prompt, api_provider, model_name, before_encoded):
     """
     현재 화면을 캡처하고 AI로 분석하여 화면 정보를 수집합니다.
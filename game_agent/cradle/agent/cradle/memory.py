@@ -1,13 +1,27 @@
 import json
 import os
+import threading
+from collections import defaultdict
 from datetime import datetime
 
+from api import api_caller, caller_scope
+from tools import get_frame_store, get_tiered_memory
+
 DEFAULT_MEMORY_FILENAMES = {
     "task": "episodic_memory.json",
     "skill": "procedural_memory.json",
     "reflection": "reflection.json"
 }
 
+# Token budgets of the recent / per-location / game tiers of task and reflection memory
+TIER_BUDGETS = {"recent_budget": 1500, "location_budget": 1500, "game_budget": 600}
+
+# Recent entries read when rendering the tiers into a prompt
+TIER_WINDOW = 50
+
+# Serialises read-modify-write of one memory file between the agent and rollup threads
+_file_locks = defaultdict(threading.Lock)
+
 def resolve_path(memory_type, game_name=None, api_model=None, cua=None):
     """
     Returns the file path based on game name, model name, and cua.
@@ -61,46 +75,95 @@ def save_memory(data, memory_type="task", game_name=None, api_model=None, cua=No
     if isinstance(data, dict) and memory_type in ["task", "reflection"]:
         data = list(data.values())
 
-    with open(memory_path, "w", encoding="utf-8") as f:
+    # Written through a temp file so the rollup thread never reads a half-written file
+    tmp_path = f"{memory_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, memory_path)
 
 
 def add_task_memory(task, result, game_name=None, api_model=None, cua=None):
     """
     Adds a new task and its result to the task memory.
     """
-    memory = load_memory("task", game_name, api_model, cua)
-    memory.append({
-        "task": task,
-        "result": result,
-    })
-    save_memory(memory, "task", game_name, api_model, cua)
+    with _file_locks[resolve_path("task", game_name, api_model, cua)]:
+        memory = load_memory("task", game_name, api_model, cua)
+        memory.append({
+            "task": task,
+            "result": result,
+        })
+        save_memory(memory, "task", game_name, api_model, cua)
 
 
 def add_reflection_memory(task, result, game_name=None, api_model=None, cua=None):
     """
     Adds a new reflection entry to reflection memory.
     """
-    memory = load_memory("reflection", game_name, api_model, cua)
-    memory.append({
-        "task": f"[Reflection] {task}",
-        "result": result,
-    })
-    save_memory(memory, "reflection", game_name, api_model, cua)
+    with _file_locks[resolve_path("reflection", game_name, api_model, cua)]:
+        memory = load_memory("reflection", game_name, api_model, cua)
+        memory.append({
+            "task": f"[Reflection] {task}",
+            "result": result,
+        })
+        save_memory(memory, "reflection", game_name, api_model, cua)
+
+
+def archive_rolled(rolled, memory_type="task", game_name=None, api_model=None, cua=None):
+    """
+    Moves entries that were rolled up into the summary tiers from the start
+    of the memory file to {name}.archive.jsonl next to it, so the file the
+    agent rewrites every step stays small and holds only pending entries.
+    """
+    memory_path = resolve_path(memory_type, game_name, api_model, cua)
+    with _file_locks[memory_path]:
+        memory = load_memory(memory_type, game_name, api_model, cua)
+        # New entries are only ever appended, so the rolled ones are still the oldest
+        if memory[:len(rolled)] != rolled:
+            return  # the file changed underneath; keep everything (it is summarized again)
 
+        archive_path = os.path.splitext(memory_path)[0] + ".archive.jsonl"
+        with open(archive_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in rolled))
+        save_memory(memory[len(rolled):], memory_type, game_name, api_model, cua)
 
-def get_recent_tasks(n=10, game_name=None, api_model=None, cua=None):
+
+def get_memory_tiers(memory_type="task", game_name=None, api_provider=None, api_model=None, cua=None):
+    """The tiered view (recent / per-location / game summary) of task or reflection memory."""
+    memory_path = resolve_path(memory_type, game_name, api_model, cua)
+
+    def summarize(prompt):
+        # Runs on the rollup thread, which does not inherit the caller scope
+        with caller_scope("MemoryRollup"):
+            return api_caller(api_provider, "You summarize the memory of a game-playing agent.", api_model, prompt)
+
+    return get_tiered_memory(
+        os.path.splitext(memory_path)[0] + "_tiers.json",
+        load_entries=lambda: load_memory(memory_type, game_name, api_model, cua),
+        summarize=summarize,
+        on_rolled=lambda rolled: archive_rolled(rolled, memory_type, game_name, api_model, cua),
+        **TIER_BUDGETS,
+    )
+
+
+def get_memory_context(memory_type="task", game_name=None, api_provider=None, api_model=None, cua=None):
     """
-    Returns the most recent n task and reflection records.
+    Prompt text of task or reflection memory: the game summary, the
+    per-location summaries and the recent raw entries, each within its budget.
     """
-    memory = load_memory("task", game_name, api_model, cua)
-    reflection = load_memory("reflection", game_name, api_model, cua)
-    return memory[-n:], reflection[-n:]
+    tiers = get_memory_tiers(memory_type, game_name, api_provider, api_model, cua)
+    recent = load_memory(memory_type, game_name, api_model, cua)[-TIER_WINDOW:]
+    return tiers.render(recent)
+
 
+def schedule_rollup(memory_type="task", game_name=None, api_provider=None, api_model=None, cua=None):
+    """Summarizes task or reflection memory in the background once a tier is over its budget."""
+    get_memory_tiers(memory_type, game_name, api_provider, api_model, cua).maybe_rollup()
 
-def get_recent_image_paths(base_dir="./screenshots/", game_name=None, limit=10, extensions={'.png', '.jpg', '.jpeg'}):
+
+def get_recent_image_paths(base_dir="./screenshots/", game_name=None, limit=10):
     """
-    Returns the most recently modified image files for the given game.
+    Returns the most recently captured image files for the given game,
+    read from the tail of the screenshot store manifest.
     """
     if not game_name:
         raise ValueError("game_name must be provided.")
@@ -111,11 +174,4 @@ def get_recent_image_paths(base_dir="./screenshots/", game_name=None, limit=10,
         print(f"[INFO] No screenshot directory found for game: {game_name}")
         return []
 
-    image_files = [
-        os.path.join(directory, f)
-        for f in os.listdir(directory)
-        if os.path.splitext(f)[1].lower() in extensions
-    ]
-
-    image_files.sort(key=os.path.getmtime, reverse=True)
-    return image_files[:limit]
\ No newline at end of file
+    return get_frame_store(directory).recent(limit)
@@ -1,9 +1,14 @@
-import time
-from api import api_caller
-from tools import capture_flash_screenshot, encode_image, extract_action_change
-from agent.cradle.memory import get_recent_tasks
+from PIL import Image
 
+from api import api_caller, metered
+from tools import (
+    capture_flash_screenshot, capture_flash_frame, encode_image, extract_action_change,
+    wait_until_stable, detect_change, crop, ImageCodec
+)
+from agent.cradle.memory import get_memory_context
 
+
+@metered("SelfReflection")
 def self_reflect(previous_action, system_prompt, api_provider, model_name, game_name, cua, action_success=None):
     """
     Evaluates whether the previous action was appropriate based on the current screen and past behavior history.
@@ -12,11 +17,8 @@ def self_reflect(previous_action, system_prompt, api_provider, model_name, game_
     screenshot_path = capture_flash_screenshot(game_name=game_name, cua=cua, model_name=model_name, time="after")
     current_screen = encode_image(screenshot_path)
 
-    # Load recent task history
-    recent_memory, _ = get_recent_tasks(n=10, game_name=game_name, api_model=model_name, cua=cua)
-    memory_text = "\n".join(
-        [f"- {m['task']} → {m['result']}" for m in recent_memory]
-    )
+    # Load task history: recent entries plus summaries of older ones
+    memory_text = get_memory_context("task", game_name, api_provider, model_name, cua)
 
     # Add success info
     success_text = f"\n[Previous Action Success] {'Succeeded ✅' if action_success else 'Failed ❌'}" if action_success is not None else ""
@@ -56,25 +58,59 @@ def self_reflect(previous_action, system_prompt, api_provider, model_name, game_
     return response
 
 
-def check_action_success(api_provider, game_name, model_name, action, base64_before, cua):
+def _encode_crop(pixels, image_codec):
+    return (image_codec or ImageCodec()).encode_base64(Image.fromarray(pixels))
+
+
+@metered("SelfReflection")
+def check_action_success(api_provider, game_name, model_name, action, base64_before, cua, before_frame=None, image_codec=None):
     """
     행동 전후의 화면을 비교하여 행동이 성공적으로 수행되었는지 판단합니다.
     변화가 없다면 실패로 간주합니다.
+
+    With before_frame, the frames are first compared locally: when nothing
+    changed no model is called, and otherwise only the changed regions are sent.
     """
-    time.sleep(1)  
-    after_screenshot = capture_flash_screenshot(game_name=game_name, cua=cua, model_name=model_name, time="after")
-    base64_after = encode_image(after_screenshot)
+    wait_until_stable(max_wait=2.0)
+    after_frame = capture_flash_frame(game_name=game_name, cua=cua, model_name=model_name, time="after")
+
+    if before_frame is not None:
+        before_pixels, after_pixels = before_frame.to_numpy(), after_frame.to_numpy()
+        change = detect_change(before_pixels, after_pixels)
+        print(f"[INFO] Local screen diff: changed={change.changed}, pixels={change.pixels}, boxes={change.boxes}")
+        if not change.changed:
+            # Only an identical screen is judged locally; any difference goes to the model
+            return {
+                "success": False,
+                "explanation": "Not Changed. The screen stayed the same after the action.",
+            }
+        images = []
+        for box in change.boxes:
+            images.append(_encode_crop(crop(before_pixels, box), image_codec))
+            images.append(_encode_crop(crop(after_pixels, box), image_codec))
+    else:
+        images = [base64_before, after_frame.encode(image_codec)]
 
     comparison_system_prompt = f""" 
     You will compare two images caused by an action.
     Last action: {action}
     """
 
-    comparison_prompt1 = """
-    Compare the following two images and describe the differences caused by the action:\n
+    if before_frame is not None:
+        image_list = "".join(
+            f"    - Image {2 * i + 1}: Before action, region {box}\n"
+            f"    - Image {2 * i + 2}: After action, same region\n"
+            for i, box in enumerate(change.boxes)
+        )
+        intro = "The screen changed only in the regions below (left, top, width, height). Each region is attached as a before/after pair."
+    else:
+        image_list = "    - Image 1: Before action\n    - Image 2: After action\n"
+        intro = "Compare the following two images."
+
+    comparison_prompt1 = f"""
+    {intro} Describe the differences caused by the action:\n
 
-    - Image 1: Before action\n
-    - Image 2: After action\n\n
+{image_list}\n
 
     ### Output Format ###\n
 
@@ -91,7 +127,7 @@ def check_action_success(api_provider, game_name, model_name, action, base64_bef
         comparison_system_prompt,
         model_name,
         comparison_prompt1,
-        [base64_before, base64_after]
+        images
     )
 
     # 2. evaluate change
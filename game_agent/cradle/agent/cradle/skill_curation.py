@@ -1,7 +1,7 @@
 import json
 import re
 from datetime import datetime
-from api import api_caller
+from api import api_caller, metered
 from agent.cradle.memory import load_memory, save_memory
 
 
@@ -26,6 +26,7 @@ def parse_gpt_skill_match_response(response_text: str, fallback_result: str) ->
     }
 
 
+@metered("SkillCuration")
 def ask_gpt_for_skill_matching(trigger, new_result, existing_skills, api_provider, system_prompt, model_name):
     """
     Requests GPT to determine if a new skill is similar to any existing ones
@@ -1,7 +1,17 @@
 from .api_caller import (
-    api_caller
+    api_caller,
+    async_api_caller
+)
+from .metering import (
+    caller_scope,
+    get_meter,
+    metered
 )
 
 __all__ = [
-    "api_caller"
+    "api_caller",
+    "async_api_caller",
+    "caller_scope",
+    "get_meter",
+    "metered"
 ]
\ No newline at end of file
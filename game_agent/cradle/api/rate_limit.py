@@ -0,0 +1,269 @@
+"""
+Shared rate limiting and retry for model API traffic.
+
+Every call reserves one request and its estimated tokens from per
+(provider, model) token buckets before it is sent. Rate-limit and transient
+server errors are retried with jittered exponential backoff, waiting at
+least as long as the provider's Retry-After, and a Retry-After pauses every
+caller of that provider and model, not just the one that got it.
+
+Limits come from the environment, 0 meaning unlimited:
+- LLM_RPM / LLM_TPM: requests and tokens per minute for every provider
+- LLM_RPM_<PROVIDER> / LLM_TPM_<PROVIDER>: per-provider override, e.g. LLM_TPM_OPENAI
+- LLM_MAX_RETRIES (default 6), LLM_BACKOFF_BASE (default 1s), LLM_BACKOFF_CAP (default 60s)
+"""
+
+import asyncio
+import atexit
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import dotenv
+
+dotenv.load_dotenv()
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError",
+    "ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout",
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "InternalServerError",
+}
+
+# Rough input cost of one screenshot, for token budgeting before the call
+IMAGE_TOKENS = 1600
+
+
+def estimate_tokens(text: str = "", images: int = 0) -> int:
+    return len(text) // 4 + images * IMAGE_TOKENS
+
+
+def estimate_payload_tokens(payload) -> int:
+    """Estimates the input tokens of a JSON request body, counting inline images separately."""
+    text_chars, images = 0, 0
+    stack = [payload]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if item.get("type") == "base64" and "data" in item:
+                images += 1
+                continue
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, str):
+            if item.startswith("data:image"):
+                images += 1
+            else:
+                text_chars += len(item)
+    return text_chars // 4 + images * IMAGE_TOKENS
+
+
+def _status_and_headers(outcome):
+    """(HTTP status, headers) of an exception or response object, where available."""
+    response = getattr(outcome, "response", None)
+    status = getattr(outcome, "status_code", None) or getattr(response, "status_code", None)
+    if status is None:
+        code = getattr(outcome, "code", None)
+        status = code if isinstance(code, int) else None
+    headers = getattr(outcome, "headers", None) or getattr(response, "headers", None) or {}
+    return status, headers
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Parses retry-after-ms, or retry-after as seconds or an HTTP date."""
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+    except AttributeError:
+        return None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(outcome) -> bool:
+    status, _ = _status_and_headers(outcome)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(outcome, BaseException):
+        return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(outcome).__mro__)
+    return False
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for the given 0-based attempt, never shorter than retry_after."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """
+    Refills at per_minute / 60 per second up to per_minute. Reservations may
+    drive the level negative; the caller then waits until it is paid back.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Takes amount from the bucket and returns the seconds to wait before using it."""
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+
+def _limit(kind, provider):
+    value = os.getenv(f"LLM_{kind}_{provider.upper()}", os.getenv(f"LLM_{kind}", "0"))
+    return float(value or 0)
+
+
+class RateLimiter:
+    def __init__(self):
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "6"))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+        self.backoff_cap = float(os.getenv("LLM_BACKOFF_CAP", "60"))
+        self.metrics = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._paused_until = {}
+
+    def _reserve(self, key, tokens) -> float:
+        provider = key[0]
+        with self._lock:
+            if key not in self._buckets:
+                rpm, tpm = _limit("RPM", provider), _limit("TPM", provider)
+                self._buckets[key] = (TokenBucket(rpm) if rpm else None, TokenBucket(tpm) if tpm else None)
+            requests, token_bucket = self._buckets[key]
+            wait = self._paused_until.get(key, 0.0) - time.monotonic()
+            if requests:
+                wait = max(wait, requests.reserve(1))
+            if token_bucket and tokens:
+                wait = max(wait, token_bucket.reserve(tokens))
+            wait = max(0.0, wait)
+
+            metrics = self.metrics[key]
+            metrics["requests"] += 1
+            if wait > 0:
+                metrics["throttled"] += 1
+                metrics["throttle_seconds"] += wait
+            return wait
+
+    def _failed(self, key, attempt, outcome) -> float | None:
+        """Records a failed attempt and returns the delay before the next one, or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(outcome):
+            with self._lock:
+                self.metrics[key]["failures"] += 1
+            return None
+
+        status, headers = _status_and_headers(outcome)
+        retry_after = retry_after_seconds(headers)
+        delay = backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_cap)
+        with self._lock:
+            if retry_after is not None:
+                # Everyone on this provider and model waits out the server's request
+                self._paused_until[key] = max(self._paused_until.get(key, 0.0), time.monotonic() + retry_after)
+            metrics = self.metrics[key]
+            metrics["retries"] += 1
+            metrics["retry_seconds"] += delay
+        print(
+            f"[rate-limit] {key[0]}/{key[1]}: {status or type(outcome).__name__}, "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+            + (f" (Retry-After {retry_after:.1f}s)" if retry_after is not None else "")
+        )
+        return delay
+
+    def call(self, provider, model, fn, tokens: int = 0):
+        """
+        Calls fn() under the limits for (provider, model), retrying rate-limit
+        and transient failures. fn may raise, or return a response object with
+        a status_code; a retryable status is retried and, once retries run
+        out, the last response is returned for the caller to handle.
+        """
+        key = (provider, model)
+        attempt = 0
+        while True:
+            wait = self._reserve(key, tokens)
+            if wait:
+                time.sleep(wait)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._failed(key, attempt, e)
+                if delay is None:
+                    raise
+            else:
+                status, _ = _status_and_headers(result)
+                if status is None or status < 400:
+                    return result
+                delay = self._failed(key, attempt, result)
+                if delay is None:
+                    return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, provider, model, fn, tokens: int = 0):
+        """call() for a coroutine function, waiting with asyncio.sleep."""
+        key = (provider, model)
+        attempt = 0
+        while True:
+            wait = self._reserve(key, tokens)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._failed(key, attempt, e)
+                if delay is None:
+                    raise
+            else:
+                status, _ = _status_and_headers(result)
+                if status is None or status < 400:
+                    return result
+                delay = self._failed(key, attempt, result)
+                if delay is None:
+                    return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def summary(self) -> str:
+        with self._lock:
+            return json.dumps({f"{p}/{m}": dict(v) for (p, m), v in self.metrics.items()}, indent=2)
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide RateLimiter."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+            atexit.register(_report)
+        return _limiter
+
+
+def _report():
+    if any(m.get("throttled") or m.get("retries") or m.get("failures") for m in _limiter.metrics.values()):
+        print(f"[rate-limit] summary:\n{_limiter.summary()}")
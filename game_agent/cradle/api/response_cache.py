@@ -0,0 +1,166 @@
+"""
+On-disk cache of model responses for deterministic (temperature 0) calls,
+so re-running an evaluation or replaying a crashed run does not pay again
+for identical requests.
+
+Opt-in through the environment:
+- LLM_CACHE: "off" (default), "on", or "readonly" (serve hits, never store)
+- LLM_CACHE_DIR: cache directory (default ./.llm_cache)
+- LLM_CACHE_MAX_MB: total size before the least recently used entries are evicted (default 512)
+- LLM_CACHE_MAX_AGE_DAYS: entries older than this are treated as misses (default 30)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Sent without temperature=0 by the adapters, so their answers are not reproducible
+UNCACHED_MODELS = {"o4-mini-2025-04-16"}
+
+MODES = ("off", "on", "readonly")
+
+
+def cache_key(api_provider, model_name, system_prompt, prompt, base64_images) -> str:
+    digest = hashlib.sha256()
+    for part in (api_provider, model_name, system_prompt, prompt):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    for image in base64_images:
+        digest.update(hashlib.sha256(image.encode("ascii")).digest())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory: str, mode: str = "on", max_bytes: int = 512 << 20, max_age: float = 30 * 86400):
+        if mode not in MODES:
+            raise ValueError(f"LLM cache mode must be one of {MODES}, got '{mode}'")
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._size = None
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            directory=os.getenv("LLM_CACHE_DIR", "./.llm_cache"),
+            mode=os.getenv("LLM_CACHE", "off").lower(),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * (1 << 20)),
+            max_age=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 86400,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def cacheable(self, model_name) -> bool:
+        return self.enabled and model_name not in UNCACHED_MODELS
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key) -> str | None:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        if self.mode == "on":
+            try:
+                os.utime(path)  # recency for LRU eviction
+            except OSError:
+                pass
+        with self._lock:
+            self.stats["hits"] += 1
+        return response
+
+    def put(self, key, response, api_provider, model_name):
+        if self.mode != "on" or response is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({
+            "provider": api_provider,
+            "model": model_name,
+            "created": time.time(),
+            "response": response,
+        }, ensure_ascii=False).encode("utf-8")
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.stats["stores"] += 1
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Removes expired entries, then the least recently used ones until under 90% of max_bytes."""
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for path, entry_size, mtime in entries:
+            if size <= self.max_bytes * 0.9 and now - mtime <= self.max_age:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.stats["evictions"] += 1
+        self._size = size
+
+    def summary(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"LLM cache ({self.mode}): {self.stats['hits']} hits / {self.stats['misses']} misses "
+            f"({rate:.0%}), {self.stats['stores']} stored, {self.stats['evictions']} evicted"
+        )
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide ResponseCache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache.from_env()
+            if _cache.enabled:
+                atexit.register(lambda: print(_cache.summary()))
+        return _cache
@@ -1,11 +1,20 @@
 from .api_providers import (
     openai_completion,
     anthropic_completion,
-    gemini_completion
+    gemini_completion,
+    async_openai_completion,
+    async_anthropic_completion,
+    async_gemini_completion
 )
+from .clients import ClientRegistry, get_client_registry
 
 __all__ = [
     "openai_completion",
     "anthropic_completion",
-    "gemini_completion"
+    "gemini_completion",
+    "async_openai_completion",
+    "async_anthropic_completion",
+    "async_gemini_completion",
+    "ClientRegistry",
+    "get_client_registry"
 ]
\ No newline at end of file
@@ -1,16 +1,13 @@
-import os
 import dotenv
-from openai import OpenAI
-import anthropic
-import google.generativeai as genai
+from tools import guess_media_type
+from .clients import get_client_registry
+from api.metering import get_meter
 
 # Load .env file
 dotenv.load_dotenv()
 
 ## Distinguish between with and without images
-def openai_completion(system_prompt, model_name, base64_images, prompt):
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
+def _openai_request(system_prompt, model_name, base64_images, prompt):
     # Basic message structure
     messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": []}]
 
@@ -19,31 +16,31 @@ def openai_completion(system_prompt, model_name, base64_images, prompt):
         for base64_image in base64_images:
             messages[1]["content"].append({
                 "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{base64_image}"},
+                "image_url": {"url": f"data:{guess_media_type(base64_image)};base64,{base64_image}"},
             })
     
     # Add text prompt
     messages[1]["content"].append({"type": "text", "text": prompt})
     
     if model_name == "o4-mini-2025-04-16":
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            max_completion_tokens=3000,
-        )
-    else:
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            temperature=0,
-            max_tokens=1024,
-        )
-        
+        return dict(model=model_name, messages=messages, max_completion_tokens=3000)
+    return dict(model=model_name, messages=messages, temperature=0, max_tokens=1024)
+
+def openai_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().openai()
+    with get_meter().measure("openai", model_name, caller="api_caller", images=len(base64_images)) as call:
+        response = client.chat.completions.create(**_openai_request(system_prompt, model_name, base64_images, prompt))
+        call.usage = response.usage
     return response.choices[0].message.content
 
-def anthropic_completion(system_prompt, model_name, base64_images, prompt):
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    
+async def async_openai_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().async_openai()
+    with get_meter().measure("openai", model_name, caller="api_caller", images=len(base64_images)) as call:
+        response = await client.chat.completions.create(**_openai_request(system_prompt, model_name, base64_images, prompt))
+        call.usage = response.usage
+    return response.choices[0].message.content
+
+def _anthropic_request(system_prompt, model_name, base64_images, prompt):
     # Compose user message content
     user_content = []
     
@@ -54,7 +51,7 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
+                    "media_type": guess_media_type(base64_image),
                     "data": base64_image,
                 }
             })
@@ -65,8 +62,7 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
         "text": prompt
     })
 
-    # Create stream and handle response
-    with client.messages.stream(
+    return dict(
         max_tokens=1024,
         system=system_prompt,  # system prompt is passed as a separate parameter
         messages=[
@@ -77,17 +73,34 @@ def anthropic_completion(system_prompt, model_name, base64_images, prompt):
         ],
         temperature=0,
         model=model_name,
-    ) as stream:
+    )
+
+def anthropic_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().anthropic()
+
+    # Create stream and handle response
+    with get_meter().measure("anthropic", model_name, caller="api_caller", images=len(base64_images)) as call, \
+            client.messages.stream(**_anthropic_request(system_prompt, model_name, base64_images, prompt)) as stream:
         partial_chunks = []
         for chunk in stream.text_stream:
             partial_chunks.append(chunk)
+        call.usage = stream.get_final_message().usage
     
     return "".join(partial_chunks)
 
-def gemini_completion(system_prompt, model_name, base64_images, prompt):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel(model_name=model_name)
+async def async_anthropic_completion(system_prompt, model_name, base64_images, prompt):
+    client = get_client_registry().async_anthropic()
+
+    with get_meter().measure("anthropic", model_name, caller="api_caller", images=len(base64_images)) as call:
+        async with client.messages.stream(**_anthropic_request(system_prompt, model_name, base64_images, prompt)) as stream:
+            partial_chunks = []
+            async for chunk in stream.text_stream:
+                partial_chunks.append(chunk)
+            call.usage = (await stream.get_final_message()).usage
+
+    return "".join(partial_chunks)
 
+def _gemini_messages(system_prompt, base64_images, prompt):
     # Basic message structure
     messages = [
         {"role": "system", "text": system_prompt}
@@ -97,16 +110,28 @@ def gemini_completion(system_prompt, model_name, base64_images, prompt):
     if base64_images:
         for base64_image in base64_images:
             messages.append({
-                "mime_type": "image/png",
+                "mime_type": guess_media_type(base64_image),
                 "data": base64_image,
             })
     
     # Add text prompt
     messages.append(prompt)
+    return messages
+
+def gemini_completion(system_prompt, model_name, base64_images, prompt):
+    model = get_client_registry().gemini(model_name)
     
-    try:
-        response = model.generate_content(messages)
+    with get_meter().measure("gemini", model_name, caller="api_caller", images=len(base64_images)) as call:
+        # Errors propagate so the rate limiter can retry them; api_caller turns them into None
+        response = model.generate_content(_gemini_messages(system_prompt, base64_images, prompt))
+        call.usage = response.usage_metadata
+        return response.text
+
+async def async_gemini_completion(system_prompt, model_name, base64_images, prompt):
+    model = get_client_registry().gemini(model_name)
+
+    with get_meter().measure("gemini", model_name, caller="api_caller", images=len(base64_images)) as call:
+        # Errors propagate so the rate limiter can retry them; api_caller turns them into None
+        response = await model.generate_content_async(_gemini_messages(system_prompt, base64_images, prompt))
+        call.usage = response.usage_metadata
         return response.text
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Local before/after screen comparison, so an action's effect can be judged
+without asking a model when nothing on screen changed.
+"""
+
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+from .screen_grabber import CHANGE_TOLERANCE
+
+
+@dataclass
+class ScreenChange:
+    """
+    - ratio: fraction of pixels that changed
+    - pixels: number of pixels that changed
+    - boxes: (left, top, width, height) of the changed regions, largest first
+    - changed: verdict, True when pixels reaches the detector's min_pixels
+    """
+
+    ratio: float
+    pixels: int = 0
+    boxes: list[tuple[int, int, int, int]] = field(default_factory=list)
+    changed: bool = False
+
+
+def _changed_boxes(mask, cell, padding, max_boxes):
+    """Groups changed pixels into boxes by labelling a coarse grid of cell x cell blocks."""
+    height, width = mask.shape
+    grid_h, grid_w = -(-height // cell), -(-width // cell)
+    padded = np.zeros((grid_h * cell, grid_w * cell), dtype=bool)
+    padded[:height, :width] = mask
+    grid = padded.reshape(grid_h, cell, grid_w, cell).any(axis=(1, 3)).astype(np.uint8)
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(grid, connectivity=8)
+    boxes = [
+        (x * cell, y * cell, (x + w) * cell, (y + h) * cell)
+        for x, y, w, h, _ in stats[1:]
+    ]
+    if len(boxes) > max_boxes:
+        # Too scattered to crop usefully: use the region covering all of them
+        boxes = [(
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes),
+        )]
+
+    result = []
+    for x0, y0, x1, y1 in boxes:
+        x0, y0 = max(0, x0 - padding), max(0, y0 - padding)
+        x1, y1 = min(width, x1 + padding), min(height, y1 + padding)
+        result.append((x0, y0, x1 - x0, y1 - y0))
+    return sorted(result, key=lambda b: b[2] * b[3], reverse=True)
+
+
+def detect_change(
+    before: np.ndarray,
+    after: np.ndarray,
+    min_pixels: int = 1,
+    tolerance: int = CHANGE_TOLERANCE,
+    cell: int = 16,
+    padding: int = 16,
+    max_boxes: int = 4,
+) -> ScreenChange:
+    """
+    Compares two (H, W, 3) frames. Frames of different sizes (the window
+    was resized or moved to another monitor) count as fully changed.
+
+    min_pixels is an absolute count, not a share of the frame: a typed digit
+    or a new inventory icon changes only a few hundred pixels of a full
+    screen. The default counts any pixel past tolerance as a change.
+    """
+    if before.shape != after.shape:
+        height, width = after.shape[:2]
+        return ScreenChange(ratio=1.0, pixels=height * width, boxes=[(0, 0, width, height)], changed=True)
+
+    diff = np.abs(before.astype(np.int16) - after.astype(np.int16)).max(axis=-1)
+    mask = diff > tolerance
+    pixels = int(np.count_nonzero(mask))
+    ratio = pixels / mask.size
+    if pixels < max(1, min_pixels):
+        return ScreenChange(ratio=ratio, pixels=pixels)
+    return ScreenChange(ratio=ratio, pixels=pixels, boxes=_changed_boxes(mask, cell, padding, max_boxes), changed=True)
+
+
+def crop(pixels: np.ndarray, box: tuple[int, int, int, int]) -> np.ndarray:
+    left, top, width, height = box
+    return pixels[top:top + height, left:left + width]
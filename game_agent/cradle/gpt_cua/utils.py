@@ -8,6 +8,9 @@ from io import BytesIO
 import io
 from urllib.parse import urlparse
 
+from api.metering import count_images, get_meter
+from api.rate_limit import estimate_payload_tokens, get_rate_limiter
+
 load_dotenv(override=True)
 
 BLOCKED_DOMAINS = [
@@ -47,6 +50,10 @@ def sanitize_message(msg: dict) -> dict:
     return msg
 
 
+class ResponseError(Exception):
+    """A Responses API request that failed for good: not retryable, or out of rate-limiter retries."""
+
+
 def create_response(**kwargs):
     url = "https://api.openai.com/v1/responses"
     headers = {
@@ -58,12 +65,23 @@ def create_response(**kwargs):
     if openai_org:
         headers["Openai-Organization"] = openai_org
 
-    response = requests.post(url, headers=headers, json=kwargs)
-
-    if response.status_code != 200:
-        print(f"Error: {response.status_code} {response.text}")
-
-    return response.json()
+    with get_meter().measure("openai", kwargs.get("model"), caller="gpt_cua", images=count_images(kwargs.get("input"))) as call:
+        # Retries 429/5xx with backoff that honours Retry-After
+        response = get_rate_limiter().call(
+            "openai", kwargs.get("model"),
+            lambda: requests.post(url, headers=headers, json=kwargs),
+            tokens=estimate_payload_tokens(kwargs.get("input")),
+        )
+
+        if response.status_code != 200:
+            call.error = f"HTTP {response.status_code}"
+            print(f"Error: {response.status_code} {response.text}")
+            # Raised, not returned: the callers' retry loops are for empty replies only
+            raise ResponseError(f"HTTP {response.status_code}: {response.text}")
+
+        result = response.json()
+        call.usage = result.get("usage")
+    return result
 
 
 def check_blocklisted_url(url: str) -> None:
@@ -1,4 +1,4 @@
-from api import api_caller
+from api import async_api_caller
 from gui_grounding import LocalDesktopComputer
 import base64
 import asyncio
@@ -127,7 +127,7 @@ Example of correct response:
 
     for attempt in range(1, max_retries + 1):
         try:
-            response = api_caller(
+            response = await async_api_caller(
                 api_provider="anthropic",
                 system_prompt=system_prompt,
                 model_name="claude-3-7-sonnet-20250219",
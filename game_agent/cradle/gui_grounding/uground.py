@@ -9,7 +9,7 @@ from PIL import Image
 import io
 from dotenv import load_dotenv
 
-from api import api_caller
+from api import async_api_caller
 from gui_grounding import LocalDesktopComputer
 
 
@@ -88,7 +88,7 @@ You must return exactly one GUI action in JSON format using one of the following
 
     for attempt in range(1, max_retries + 1):
         try:
-            result = api_caller(
+            result = await async_api_caller(
                 api_provider=api_provider,
                 system_prompt=system_prompt,
                 model_name=model_name,
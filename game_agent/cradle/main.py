@@ -1,5 +1,6 @@
 import argparse
 from agent.cradle import run_game_agent
+from tools import ImageCodec
 import json
 import time
 
@@ -30,6 +31,9 @@ def main():
     parser.add_argument("--provider", default="openai")
     parser.add_argument("--cua", default="gpt")
     parser.add_argument("--max_actions", default=1000)
+    parser.add_argument("--image_codec", default="png", choices=["png", "jpeg", "webp"])
+    parser.add_argument("--image_quality", type=int, default=85)
+    parser.add_argument("--image_max_edge", type=int, default=None)
     args = parser.parse_args()
     
     game_name = select_game_from_json("./json/game_prompts.json")
@@ -42,7 +46,8 @@ def main():
         model_name=args.model,
         game_name=game_name,
         cua=args.cua,
-        max_actions=args.max_actions
+        max_actions=args.max_actions,
+        image_codec=ImageCodec(args.image_codec, args.image_quality, args.image_max_edge)
     )
 
     print("\n📦 Final execution result:")
@@ -5,7 +5,47 @@ from .load_data import (
 )
 
 from .screenshot import (
-    capture_flash_screenshot
+    capture_flash_screenshot,
+    capture_flash_frame
+)
+
+from .frame import Frame
+
+from .image_codec import (
+    ImageCodec,
+    guess_media_type
+)
+
+from .capture import (
+    CaptureSession,
+    get_capture_session,
+    get_flashpoint_window_position,
+    wait_until_stable
+)
+
+from .frame_store import (
+    FrameStore,
+    get_frame_store
+)
+
+from .memory_tiers import (
+    TieredMemory,
+    get_tiered_memory
+)
+
+from .frame_dedup import (
+    FrameDeduplicator,
+    collapse_runs,
+    hash_base64,
+    hash_file,
+    perceptual_hash,
+    unchanged_marker
+)
+
+from .change_detector import (
+    ScreenChange,
+    detect_change,
+    crop
 )
 
 from .utils import (
@@ -20,6 +60,27 @@ __all__ = [
     "load_game_prompt",
     "load_game_prompt_eval",
     "capture_flash_screenshot",
+    "capture_flash_frame",
+    "Frame",
+    "ImageCodec",
+    "guess_media_type",
+    "CaptureSession",
+    "get_capture_session",
+    "get_flashpoint_window_position",
+    "wait_until_stable",
+    "FrameStore",
+    "get_frame_store",
+    "TieredMemory",
+    "get_tiered_memory",
+    "ScreenChange",
+    "detect_change",
+    "crop",
+    "FrameDeduplicator",
+    "collapse_runs",
+    "hash_base64",
+    "hash_file",
+    "perceptual_hash",
+    "unchanged_marker",
     "encode_image",
     "extract_python_code",
     "extract_action_change",
@@ -0,0 +1,103 @@
+"""
+Perceptual-hash identity for screenshots, used to collapse runs of
+near-identical frames in the image histories sent to the models.
+"""
+
+import base64
+import io
+from functools import lru_cache
+
+import imagehash
+from PIL import Image
+
+# Hamming distance between 64-bit pHashes under which two frames count as the same screen
+MAX_HASH_DISTANCE = 4
+
+
+def perceptual_hash(image: Image.Image) -> imagehash.ImageHash:
+    return imagehash.phash(image)
+
+
+@lru_cache(maxsize=256)
+def hash_file(path: str) -> imagehash.ImageHash | None:
+    """
+    pHash of an image file, or None if it cannot be read.
+    FrameStore paths are content-addressed, so caching by path is safe.
+    """
+    try:
+        with Image.open(path) as image:
+            return perceptual_hash(image)
+    except OSError:
+        return None
+
+
+def hash_base64(data: str) -> imagehash.ImageHash | None:
+    """pHash of a base64-encoded image, or None if it cannot be decoded."""
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(data))) as image:
+            return perceptual_hash(image)
+    except (OSError, ValueError):
+        return None
+
+
+def same_frame(a, b, max_distance: int = MAX_HASH_DISTANCE) -> bool:
+    return a is not None and b is not None and a - b <= max_distance
+
+
+def collapse_runs(hashes: list, max_distance: int = MAX_HASH_DISTANCE) -> list[tuple[int, int]]:
+    """
+    Groups consecutive near-duplicate frames, given in chronological order.
+    Returns one (index, count) per run, where index is the newest frame of
+    the run and count the number of frames it stands for.
+    """
+    runs = []
+    for i, frame_hash in enumerate(hashes):
+        if runs and same_frame(hashes[i - 1], frame_hash, max_distance):
+            runs[-1] = (i, runs[-1][1] + 1)
+        else:
+            runs.append((i, 1))
+    return runs
+
+
+def unchanged_marker(count: int) -> str:
+    return f" (unchanged x{count})" if count > 1 else ""
+
+
+class FrameDeduplicator:
+    """
+    Incremental version of collapse_runs for histories that grow one frame
+    at a time: remembers the last frame and how many times it repeated.
+    """
+
+    def __init__(self, max_distance: int = MAX_HASH_DISTANCE):
+        self.max_distance = max_distance
+        self.last_hash = None
+        self.last_data = None
+        self.count = 0
+
+    def observe(self, frame_hash) -> int:
+        """Records a frame and returns the length of the run it belongs to (1 for a new screen)."""
+        if same_frame(self.last_hash, frame_hash, self.max_distance):
+            self.count += 1
+        else:
+            self.count = 1
+        self.last_hash = frame_hash
+        return self.count
+
+    def observe_base64(self, data: str) -> int:
+        return self.observe(hash_base64(data))
+
+    def observe_exact(self, data: str) -> int:
+        """
+        Like observe(), but only a byte-identical frame continues the run, for
+        places that tell the model the screen is identical: a near-duplicate
+        can differ in exactly the detail that matters (a digit, an item).
+        """
+        self.count = self.count + 1 if data is not None and data == self.last_data else 1
+        self.last_data = data
+        return self.count
+
+    def reset(self):
+        """Starts a new run, e.g. after an image that is not a full frame."""
+        self.last_hash = self.last_data = None
+        self.count = 0
@@ -1,5 +1,7 @@
 import os
-import mss
+
+from .capture import get_capture_session
+from .frame_store import get_frame_store
 
 def get_screenshot_dir(base_dir, cua, model_name, game_name):
     """Create directory based on game / model / agent"""
@@ -7,23 +9,31 @@ def get_screenshot_dir(base_dir, cua, model_name, game_name):
     os.makedirs(directory, exist_ok=True)
     return directory
 
-def get_next_screenshot_filename(directory):
-    """Generate the next sequential screenshot filename in the given directory"""
-    existing_files = [
-        f for f in os.listdir(directory)
-        if f.startswith("flash_screenshot_") and f.endswith(".png")
-    ]
+def capture_flash_frame(game_name, cua, model_name, time=None, save=True, region="screen"):
+    """
+    Capture the screen (region="screen") or only the Flashpoint window
+    (region="game") into an in-memory Frame, using the shared CaptureSession.
+    When save=True the frame is also stored in the FrameStore of the folder
+    structured by GUI agent / model (see capture_flash_screenshot).
+    """
+    if time not in (None, "", "after", "final"):
+        raise ValueError("Invalid value for 'time'. Use 'after', 'final', or leave it empty.")
+
+    frame = get_capture_session(region).grab()
+
+    if save:
+        if time == "after":
+            base_dir = "screenshots_after"
+        elif time == "final":
+            base_dir = "screenshots_final"
+        else:
+            base_dir = "screenshots"
 
-    numbers = []
-    for filename in existing_files:
-        try:
-            num_str = filename.replace("flash_screenshot_", "").replace(".png", "")
-            numbers.append(int(num_str))
-        except ValueError:
-            continue
+        directory = get_screenshot_dir(base_dir, cua, model_name, game_name)
+        get_frame_store(directory).put_frame(frame)
+        print(f"[INFO] Screenshot saved to: {frame.path}")
 
-    next_num = max(numbers, default=0) + 1
-    return f"flash_screenshot_{next_num:04d}.png"
+    return frame
 
 def capture_flash_screenshot(game_name, cua, model_name, time=None):
     """
@@ -32,24 +42,4 @@ def capture_flash_screenshot(game_name, cua, model_name, time=None):
     - time="after": screenshots_after/
     - time="final": screenshots_final/
     """
-    if time not in (None, "", "after", "final"):
-        raise ValueError("Invalid value for 'time'. Use 'after', 'final', or leave it empty.")
-
-    if time == "after":
-        base_dir = "screenshots_after"
-    elif time == "final":
-        base_dir = "screenshots_final"
-    else:
-        base_dir = "screenshots"
-
-    directory = get_screenshot_dir(base_dir, cua, model_name, game_name)
-    filename = get_next_screenshot_filename(directory)
-    screenshot_path = os.path.join(directory, filename)
-
-    with mss.mss() as sct:
-        monitor = sct.monitors[1]
-        screenshot = sct.grab(monitor)
-        mss.tools.to_png(screenshot.rgb, screenshot.size, output=screenshot_path)
-
-    print(f"[INFO] Screenshot saved to: {screenshot_path}")
-    return screenshot_path
\ No newline at end of file
+    return capture_flash_frame(game_name, cua, model_name, time=time, save=True).path
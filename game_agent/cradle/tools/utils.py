@@ -10,10 +10,20 @@ def encode_image(image_path):
         return base64.b64encode(image_file.read()).decode("utf-8")
     
     
-def encode_images_to_base64(image_paths):
+def encode_images_to_base64(image_paths, image_codec=None):
+    """
+    Base64-encodes image files. With an ImageCodec other than full-size PNG,
+    each file is re-encoded with those settings instead of sent as stored.
+    """
+    reencode = image_codec is not None and (image_codec.codec != "png" or image_codec.max_edge)
     encoded = []
     for path in image_paths:
         try:
+            if reencode:
+                from PIL import Image
+                with Image.open(path) as image:
+                    encoded.append(image_codec.encode_base64(image))
+                continue
             with open(path, "rb") as f:
                 encoded_str = base64.b64encode(f.read()).decode("utf-8")
                 encoded.append(encoded_str)
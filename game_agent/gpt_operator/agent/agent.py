@@ -5,7 +5,9 @@ from utils import (
     pp,
     sanitize_message,
     check_blocklisted_url,
+    ResponseError,
 )
+from frame_store import get_frame_store
 import json
 from typing import Callable, List, Dict, Any
 import os
@@ -42,8 +44,7 @@ class Agent:
         self.gpt_log_folder = gpt_log_folder
         self.gpt_log_file = None
 
-        if self.save_screenshots and not os.path.exists(self.screenshots_folder):
-            os.makedirs(self.screenshots_folder)
+        self.frame_store = get_frame_store(self.screenshots_folder) if self.save_screenshots else None
 
         if self.gpt_log_enabled and not os.path.exists(self.gpt_log_folder):
             os.makedirs(self.gpt_log_folder)
@@ -71,11 +72,8 @@ class Agent:
 
     def save_screenshot(self, screenshot_base64):
         try:
-            timestamp = int(time.time())
-            filename = f"{self.screenshots_folder}/screenshot_{timestamp}.png"
             img_data = base64.b64decode(screenshot_base64)
-            with open(filename, "wb") as f:
-                f.write(img_data)
+            filename = self.frame_store.put(img_data)
             print(f"📸 Screenshot saved: {filename}")
             return filename
         except Exception as e:
@@ -273,6 +271,8 @@ class Agent:
 
                 return new_items
 
+            except ResponseError:
+                raise  # the request itself failed; retrying it would fail the same way
             except Exception as e:
                 print(f"❌ Error occurred: {str(e)}. Retrying... ({attempt + 1}/{max_retries})")
                 if self.gpt_log_enabled and self.gpt_log_file:
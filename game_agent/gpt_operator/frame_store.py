@@ -0,0 +1,143 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def tail_lines(path, n):
+    """
+    Returns the last n lines of a text file without reading the whole file.
+    """
+    if n <= 0 or not os.path.exists(path):
+        return []
+
+    block = 8192
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b""
+        while end > 0 and data.count(b"\n") <= n:
+            start = max(0, end - block)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+
+    # Decode only whole lines: the first block may start inside a multi-byte character
+    lines = [line for line in data.splitlines() if line.strip()]
+    return [line.decode("utf-8") for line in lines[-n:]]
+
+
+class FrameStore:
+    """
+    Content-addressed screenshot store.
+
+    Frames are written once under <root>/<hash[:2]>/<hash>.png, so identical
+    frames share a single file. The hash is taken over the raw RGB pixels,
+    whether a frame arrives as a Frame or as encoded bytes. Every capture appends one line to
+    <root>/manifest.jsonl mapping its step number to the stored frame.
+    The step counter is read from the manifest once when the store is opened,
+    so allocating a frame afterwards is O(1).
+    """
+
+    def __init__(self, root, ext=".png"):
+        self.root = root
+        self.ext = ext
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._step = self._count_steps()
+
+    def _count_steps(self):
+        if not os.path.exists(self.manifest_path):
+            return 0
+        with open(self.manifest_path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def frame_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{self.ext}")
+
+    def _write_once(self, digest, encode):
+        path = self.frame_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encode())
+            os.replace(tmp_path, path)
+        return path
+
+    def _append_manifest(self, digest, meta):
+        with self._lock:
+            self._step += 1
+            entry = {
+                "step": self._step,
+                "frame": os.path.relpath(self.frame_path(digest), self.root),
+                "time": time.time(),
+                **meta,
+            }
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    @classmethod
+    def encoded_digest(cls, data: bytes) -> str:
+        """Digest of encoded image bytes by their RGB pixels, like put_frame() keys a Frame."""
+        from PIL import Image
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                return cls.digest(image.convert("RGB").tobytes())
+        except OSError:
+            return cls.digest(data)  # not an image PIL can decode
+
+    def put(self, data: bytes, **meta) -> str:
+        """Stores already-encoded image bytes and returns the frame path."""
+        digest = self.encoded_digest(data)
+        path = self._write_once(digest, lambda: data)
+        self._append_manifest(digest, meta)
+        return path
+
+    def put_frame(self, frame, **meta) -> str:
+        """
+        Stores a Frame keyed by its raw pixels, so a frame that is already
+        stored is never PNG-encoded again. Sets frame.path.
+        """
+        digest = self.digest(frame.rgb)
+        frame.path = self._write_once(digest, lambda: frame.png)
+        self._append_manifest(digest, meta)
+        return frame.path
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    def recent(self, n=10):
+        """Returns the frame paths of the last n steps, newest first."""
+        paths = []
+        for line in reversed(tail_lines(self.manifest_path, n)):
+            try:
+                paths.append(os.path.join(self.root, json.loads(line)["frame"]))
+            except (json.JSONDecodeError, KeyError):
+                continue
+        return paths
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_frame_store(root) -> FrameStore:
+    """Returns the process-wide FrameStore for a directory, opening it once."""
+    key = os.path.abspath(root)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = FrameStore(root)
+        return _stores[key]
@@ -1,5 +1,6 @@
 from agent.agent import Agent
 from computers import LocalDesktopComputer
+from utils import ResponseError
 from dotenv import load_dotenv
 import json
 import os
@@ -127,6 +128,9 @@ def main():
                 else:
                     print(f"⚠️ Model response is empty. Retrying... ({attempt + 1}/{max_retries})")
                     time.sleep(1)
+            except ResponseError as e:
+                print(f"❌ Model request failed: {e}. Terminating session.")
+                return
             except Exception as e:
                 print(f"❌ Error occurred: {e}. Retrying... ({attempt + 1}/{max_retries})")
                 time.sleep(2)
@@ -156,6 +160,9 @@ def main():
                     else:
                         print(f"⚠️ No model response. Retrying... ({attempt + 1}/{max_retries})")
                         time.sleep(1)
+                except ResponseError as e:
+                    print(f"❌ Model request failed: {e}. Stopping automatic progression.")
+                    return
                 except Exception as e:
                     print(f"❌ Error occurred: {e}. Retrying... ({attempt + 1}/{max_retries})")
                     time.sleep(2)